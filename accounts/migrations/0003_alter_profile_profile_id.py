@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_alter_user_is_active'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profile',
+            name='profile_id',
+            field=models.CharField(db_index=True, editable=False, max_length=10, unique=True),
+        ),
+    ]
@@ -118,7 +118,7 @@ class Profile(models.Model):
     address = models.CharField(max_length=100, blank=True)
     country = models.CharField(max_length=100, blank=True)
     state = models.CharField(max_length=100, blank=True)
-    profile_id = models.CharField(max_length=9, unique=True, editable=False, db_index=True)
+    profile_id = models.CharField(max_length=10, unique=True, editable=False, db_index=True)
     pin = models.CharField(max_length=100, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -133,11 +133,7 @@ class Profile(models.Model):
     def save(self, *args, **kwargs):
         from modules.utils.utils import AccountUtils
         if not self.profile_id:
-            while True:
-                pid = AccountUtils.generate_profile_id()
-                if not Profile.objects.filter(profile_id=pid).exists():
-                    self.profile_id = pid
-                    break
+            self.profile_id = AccountUtils.generate_profile_id()
         super().save(*args, **kwargs)
 
 
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AnalyticsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'analytics'
+
+    def ready(self):
+        from analytics.rollups import get_rollup_aggregator
+        from infrastructure.metrics import add_call_observer
+
+        add_call_observer(get_rollup_aggregator().record_call)
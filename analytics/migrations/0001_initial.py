@@ -0,0 +1,39 @@
+# Generated by Django 5.2.11 on 2026-10-18 01:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Rollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('minute', 'Minute'), ('hour', 'Hour'), ('day', 'Day')], max_length=6)),
+                ('bucket_start', models.DateTimeField()),
+                ('provider', models.CharField(max_length=50)),
+                ('merchant', models.CharField(blank=True, default='', max_length=64)),
+                ('currency', models.CharField(blank=True, default='', max_length=5)),
+                ('bank', models.CharField(blank=True, default='', max_length=50)),
+                ('events', models.PositiveBigIntegerField(default=0)),
+                ('successes', models.PositiveBigIntegerField(default=0)),
+                ('amount_sum', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('calls', models.PositiveBigIntegerField(default=0)),
+                ('call_failures', models.PositiveBigIntegerField(default=0)),
+                ('latency', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'rollup',
+                'verbose_name_plural': 'rollups',
+                'indexes': [models.Index(fields=['granularity', 'provider', 'bucket_start'], name='rollup_provider_idx'), models.Index(fields=['granularity', 'merchant', 'bucket_start'], name='rollup_merchant_idx')],
+                'unique_together': {('granularity', 'bucket_start', 'provider', 'merchant', 'currency', 'bank')},
+            },
+        ),
+    ]
@@ -1,3 +1,46 @@
 from django.db import models
 
-# Create your models here.
+
+class Rollup(models.Model):
+    """
+    Pre-aggregated provider activity for one time bucket and one combination
+    of dimensions (provider x merchant x currency x bank; empty string when a
+    dimension is unknown).
+
+    Written incrementally by ``analytics.rollups.RollupAggregator``: webhook
+    events feed ``events``/``successes``/``amount_sum``, provider API calls
+    feed ``calls``/``call_failures`` and the ``latency`` sketch
+    (``analytics.sketches.LatencySketch``). Reads merge the few rows a query
+    spans instead of scanning transactions.
+    """
+    GRANULARITY_CHOICES = [
+        ("minute", "Minute"),
+        ("hour", "Hour"),
+        ("day", "Day"),
+    ]
+
+    granularity = models.CharField(max_length=6, choices=GRANULARITY_CHOICES)
+    bucket_start = models.DateTimeField()
+    provider = models.CharField(max_length=50)
+    merchant = models.CharField(max_length=64, blank=True, default="")
+    currency = models.CharField(max_length=5, blank=True, default="")
+    bank = models.CharField(max_length=50, blank=True, default="")
+    events = models.PositiveBigIntegerField(default=0)
+    successes = models.PositiveBigIntegerField(default=0)
+    amount_sum = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    calls = models.PositiveBigIntegerField(default=0)
+    call_failures = models.PositiveBigIntegerField(default=0)
+    latency = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "rollup"
+        verbose_name_plural = "rollups"
+        unique_together = ("granularity", "bucket_start", "provider", "merchant", "currency", "bank")
+        indexes = [
+            models.Index(fields=["granularity", "provider", "bucket_start"], name="rollup_provider_idx"),
+            models.Index(fields=["granularity", "merchant", "bucket_start"], name="rollup_merchant_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.granularity} {self.bucket_start:%Y-%m-%d %H:%M} {self.provider}"
@@ -0,0 +1,342 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from analytics.sketches import LatencySketch
+
+log = logging.getLogger("my_logger")
+
+
+MINUTE = "minute"
+HOUR = "hour"
+DAY = "day"
+
+GRANULARITY_SECONDS = {MINUTE: 60, HOUR: 3600, DAY: 86400}
+
+DIMENSIONS = ("provider", "merchant", "currency", "bank")
+
+# Column sizes of the DIMENSIONS on analytics.models.Rollup; a longer value
+# would fail the write of every delta flushed with it.
+DIMENSION_MAX_LENGTHS = (50, 64, 5, 50)
+
+DEFAULT_ANALYTICS_CONFIG = {
+    # Each process folds events into in-memory deltas and writes them out
+    # this often, so the request path never touches the rollup table.
+    "FLUSH_INTERVAL": 10.0,
+    "GRANULARITIES": (MINUTE, HOUR, DAY),
+    # Rows older than this are pruned (None keeps them).
+    "RETENTION_DAYS": {MINUTE: 2, HOUR: 90, DAY: None},
+    "SKETCH_ACCURACY": 0.01,
+    "SKETCH_MAX_BINS": 2048,
+    # A delta that still cannot be written after this many flushes is
+    # dropped (and logged) rather than retried forever.
+    "MAX_WRITE_ATTEMPTS": 30,
+}
+
+
+def get_analytics_config() -> dict:
+    config = dict(DEFAULT_ANALYTICS_CONFIG)
+    config.update(getattr(settings, "ANALYTICS_ROLLUPS", {}) or {})
+    return config
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    seconds = GRANULARITY_SECONDS[granularity]
+    epoch = int(moment.timestamp()) // seconds * seconds
+    return datetime.fromtimestamp(epoch, dt_timezone.utc)
+
+
+def dimensions(provider, merchant, currency, bank) -> tuple:
+    """The rollup key's dimensions as stored: strings, cut to their column size."""
+    values = (provider, merchant, currency, bank)
+    return tuple(str(value or "")[:limit] for value, limit in zip(values, DIMENSION_MAX_LENGTHS))
+
+
+class RollupDelta:
+    __slots__ = ("events", "successes", "amount_sum", "calls", "call_failures", "latency", "write_attempts")
+
+    def __init__(self):
+        self.events = 0
+        self.successes = 0
+        self.amount_sum = Decimal(0)
+        self.calls = 0
+        self.call_failures = 0
+        self.latency = None
+        self.write_attempts = 0
+
+
+class RollupAggregator:
+    """
+    Incremental rollups.
+
+    ``record_event`` and ``record_call`` only update an in-memory delta per
+    (granularity, bucket, dimensions) key. A daemon thread writes the deltas
+    every ``FLUSH_INTERVAL`` seconds: missing rows are inserted, the touched
+    rows are locked in primary-key order (so concurrent workers cannot
+    deadlock), counters are added and latency sketches merged. When a flush
+    fails, its deltas are written one by one so only the failing ones are
+    kept for the next flush, at most ``MAX_WRITE_ATTEMPTS`` times.
+    """
+
+    def __init__(self, config: dict | None = None):
+        self.config = config or get_analytics_config()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        os.register_at_fork(after_in_child=self._reset_in_child)
+
+    def _deltas(self, moment: datetime, dimensions: tuple) -> list:
+        # Call with self._lock held, and update the deltas before releasing
+        # it, so a concurrent flush never writes a half-updated delta.
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="analytics-rollups", daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+        deltas = []
+        for granularity in self.config["GRANULARITIES"]:
+            key = (granularity, bucket_start(moment, granularity)) + dimensions
+            delta = self._pending.get(key)
+            if delta is None:
+                delta = self._pending[key] = RollupDelta()
+            deltas.append(delta)
+        return deltas
+
+    def record_event(self, event, moment: datetime | None = None):
+        """Count a normalized webhook event (``webhooks.normalizer.NormalizedEvent``)."""
+        metadata = event.metadata if isinstance(event.metadata, dict) else {}
+        key = dimensions(event.provider, metadata.get("merchant_id"), event.currency, event.bank)
+        success = event.status == "success"
+        amount = event.amount if success and event.amount is not None else Decimal(0)
+        with self._lock:
+            for delta in self._deltas(moment or timezone.now(), key):
+                delta.events += 1
+                delta.successes += success
+                delta.amount_sum += amount
+
+    def record_call(self, provider: str, endpoint: str, outcome: str, seconds: float):
+        """Count and time a provider API call; an observer for ``infrastructure.metrics``."""
+        with self._lock:
+            for delta in self._deltas(timezone.now(), dimensions(provider, "", "", "")):
+                delta.calls += 1
+                delta.call_failures += outcome != "success"
+                if delta.latency is None:
+                    delta.latency = LatencySketch(self.config["SKETCH_ACCURACY"], self.config["SKETCH_MAX_BINS"])
+                delta.latency.add(seconds)
+
+    def _reset_in_child(self):
+        # Deltas recorded before the fork are the parent's to write.
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _run(self):
+        while True:
+            time.sleep(self.config["FLUSH_INTERVAL"])
+            try:
+                self.flush()
+            except Exception as e:
+                log.error(f"Writing analytics rollups failed: {e}", exc_info=True)
+                close_old_connections()
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            self.write(pending)
+            return len(pending)
+        except Exception as e:
+            if len(pending) == 1:
+                self._retry_later(pending)
+                raise
+            log.warning(f"Writing {len(pending)} analytics rollups failed, writing them one by one: {e!r}")
+
+        # One bad row fails the whole transaction; find the deltas at fault.
+        failed = {}
+        error = None
+        for key, delta in pending.items():
+            try:
+                self.write({key: delta})
+            except Exception as e:
+                failed[key] = delta
+                error = e
+        self._retry_later(failed)
+        if error is not None:
+            raise error
+        return len(pending)
+
+    def _retry_later(self, failed: dict):
+        """Put failed deltas back for the next flush, dropping those out of attempts."""
+        with self._lock:
+            for key, delta in failed.items():
+                delta.write_attempts += 1
+                if delta.write_attempts >= self.config["MAX_WRITE_ATTEMPTS"]:
+                    log.error(f"Dropping analytics rollup {key} after {delta.write_attempts} failed writes")
+                    continue
+                current = self._pending.get(key)
+                if current is None:
+                    self._pending[key] = delta
+                else:
+                    _add(current, delta)
+                    current.write_attempts = max(current.write_attempts, delta.write_attempts)
+
+    def write(self, pending: dict):
+        from analytics.models import Rollup
+
+        fields = ("granularity", "bucket_start") + DIMENSIONS
+        now = timezone.now()
+        with transaction.atomic():
+            Rollup.objects.bulk_create(
+                [Rollup(**dict(zip(fields, key))) for key in pending],
+                ignore_conflicts=True,
+            )
+            rows = (
+                Rollup.objects.select_for_update()
+                .filter(
+                    granularity__in={key[0] for key in pending},
+                    bucket_start__in={key[1] for key in pending},
+                    provider__in={key[2] for key in pending},
+                )
+                .order_by("pk")
+            )
+            changed = []
+            for row in rows:
+                delta = pending.get(tuple(getattr(row, field) for field in fields))
+                if delta is None:
+                    continue
+                row.events += delta.events
+                row.successes += delta.successes
+                row.amount_sum += delta.amount_sum
+                row.calls += delta.calls
+                row.call_failures += delta.call_failures
+                if delta.latency is not None:
+                    sketch = self.load_sketch(row.latency)
+                    sketch.merge(delta.latency)
+                    row.latency = sketch.to_dict()
+                row.updated_at = now
+                changed.append(row)
+            Rollup.objects.bulk_update(
+                changed,
+                ["events", "successes", "amount_sum", "calls", "call_failures", "latency", "updated_at"],
+                batch_size=500,
+            )
+
+    def load_sketch(self, data: dict | None) -> LatencySketch:
+        return LatencySketch.from_dict(data, self.config["SKETCH_ACCURACY"], self.config["SKETCH_MAX_BINS"])
+
+    def prune(self, now: datetime | None = None) -> int:
+        from analytics.models import Rollup
+
+        now = now or timezone.now()
+        removed = 0
+        for granularity, days in self.config["RETENTION_DAYS"].items():
+            if days is None:
+                continue
+            expired = Rollup.objects.filter(granularity=granularity, bucket_start__lt=now - timedelta(days=days))
+            removed += expired.delete()[0]
+        return removed
+
+
+def _add(current: RollupDelta, delta: RollupDelta):
+    current.events += delta.events
+    current.successes += delta.successes
+    current.amount_sum += delta.amount_sum
+    current.calls += delta.calls
+    current.call_failures += delta.call_failures
+    if delta.latency is not None:
+        if current.latency is None:
+            current.latency = delta.latency
+        else:
+            current.latency.merge(delta.latency)
+
+
+def pick_granularity(start: datetime, end: datetime) -> str:
+    """The coarsest granularity that still gives a useful number of points."""
+    span = end - start
+    if span <= timedelta(hours=6):
+        return MINUTE
+    if span <= timedelta(days=7):
+        return HOUR
+    return DAY
+
+
+def summarize(start: datetime, end: datetime, granularity: str | None = None, filters: dict | None = None,
+              group_by=("provider",), series: bool = False, quantiles=(0.5, 0.95, 0.99)) -> list:
+    """
+    Merge the rollup rows between ``start`` and ``end`` into one entry per
+    ``group_by`` combination (and per bucket when ``series`` is true).
+
+    Cost is proportional to the number of stored buckets in range, not to
+    the number of transactions behind them.
+    """
+    from analytics.models import Rollup
+
+    granularity = granularity or pick_granularity(start, end)
+    aggregator = get_rollup_aggregator()
+    rows = Rollup.objects.filter(
+        granularity=granularity,
+        bucket_start__gte=bucket_start(start, granularity),
+        bucket_start__lt=end,
+        **{field: value for field, value in (filters or {}).items() if value is not None},
+    ).order_by("bucket_start")
+
+    groups = {}
+    for row in rows.iterator(chunk_size=2000):
+        key = tuple(getattr(row, field) for field in group_by)
+        if series:
+            key = (row.bucket_start,) + key
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = RollupDelta()
+        delta = RollupDelta()
+        delta.events, delta.successes, delta.amount_sum = row.events, row.successes, row.amount_sum
+        delta.calls, delta.call_failures = row.calls, row.call_failures
+        if row.latency:
+            delta.latency = aggregator.load_sketch(row.latency)
+        _add(group, delta)
+
+    results = []
+    for key, group in groups.items():
+        entry = {}
+        if series:
+            entry["bucket_start"] = key[0]
+            key = key[1:]
+        entry.update(zip(group_by, key))
+        entry.update({
+            "events": group.events,
+            "successes": group.successes,
+            "success_rate": round(group.successes / group.events, 4) if group.events else None,
+            "amount_sum": group.amount_sum,
+            "calls": group.calls,
+            "call_failures": group.call_failures,
+            "call_success_rate": round(1 - group.call_failures / group.calls, 4) if group.calls else None,
+        })
+        latency = group.latency
+        entry["latency_ms"] = {
+            f"p{round(q * 100)}": round(latency.quantile(q) * 1000, 2) if latency else None
+            for q in quantiles
+        }
+        results.append(entry)
+    return results
+
+
+_aggregator = None
+_aggregator_lock = threading.Lock()
+
+
+def get_rollup_aggregator() -> RollupAggregator:
+    global _aggregator
+    if _aggregator is None:
+        with _aggregator_lock:
+            if _aggregator is None:
+                _aggregator = RollupAggregator()
+    return _aggregator
@@ -0,0 +1,95 @@
+import math
+
+
+class LatencySketch:
+    """
+    Mergeable quantile sketch (DDSketch): values fall into logarithmic bins,
+    so any quantile is within ``relative_accuracy`` of the true value, and
+    two sketches merge by adding bin counts. That makes per-minute sketches
+    roll up exactly into hours and days, and lets an API merge any number of
+    stored buckets without touching raw samples.
+
+    When more than ``max_bins`` bins are in use, the lowest are collapsed
+    into one; only the fastest quantiles lose accuracy.
+    """
+
+    __slots__ = ("relative_accuracy", "max_bins", "gamma", "_log_gamma", "bins", "zero_count", "count", "total")
+
+    # Values at or below this (seconds) count as zero.
+    MIN_VALUE = 1e-6
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float, count: int = 1):
+        self.count += count
+        self.total += value * count
+        if value <= self.MIN_VALUE:
+            self.zero_count += count
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.bins[index] = self.bins.get(index, 0) + count
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def merge(self, other: "LatencySketch"):
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def _collapse(self):
+        indexes = sorted(self.bins)
+        excess = indexes[: len(indexes) - self.max_bins + 1]
+        folded = sum(self.bins.pop(index) for index in excess)
+        target = excess[-1]
+        self.bins[target] = self.bins.get(target, 0) + folded
+
+    def quantile(self, q: float) -> float | None:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def to_dict(self) -> dict:
+        return {
+            "accuracy": self.relative_accuracy,
+            "bins": {str(index): count for index, count in self.bins.items()},
+            "zero": self.zero_count,
+            "count": self.count,
+            "sum": self.total,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict | None, relative_accuracy: float = 0.01, max_bins: int = 2048) -> "LatencySketch":
+        """Load ``to_dict`` output; an empty ``data`` gives an empty sketch."""
+        data = data or {}
+        sketch = cls(data.get("accuracy", relative_accuracy), max_bins)
+        sketch.bins = {int(index): count for index, count in (data.get("bins") or {}).items()}
+        sketch.zero_count = data.get("zero", 0)
+        sketch.count = data.get("count", 0)
+        sketch.total = data.get("sum", 0.0)
+        return sketch
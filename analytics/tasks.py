@@ -0,0 +1,14 @@
+import logging
+
+from celery import shared_task
+
+log = logging.getLogger("my_logger")
+
+
+@shared_task(name="analytics.prune_rollups")
+def prune_rollups():
+    """Drop rollup rows past their granularity's retention (ANALYTICS_ROLLUPS)."""
+    from analytics.rollups import get_rollup_aggregator
+
+    removed = get_rollup_aggregator().prune()
+    log.info(f"Pruned {removed} analytics rollup rows")
@@ -1,3 +1,129 @@
-from django.shortcuts import render
+import hmac
+import ipaddress
+from datetime import timedelta
 
-# Create your views here.
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
+from rest_framework import status, viewsets
+from rest_framework.response import Response
+
+from analytics.rollups import DIMENSIONS, GRANULARITY_SECONDS, summarize
+from infrastructure.metrics import get_hedge_metrics, get_metrics_config, get_metrics_registry, get_provider_metrics
+from routing.banks import get_bank_health_tracker
+
+
+def _from_networks(request, networks) -> bool:
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network, strict=False) for network in networks or ())
+
+
+@require_GET
+def metrics(request):
+    """
+    ``GET /metrics``: provider call counters and latency histograms for all
+    workers on this host, in the Prometheus text format. Only answered for
+    ``METRICS['ALLOWED_NETWORKS']`` or with the ``AUTH_TOKEN``.
+    """
+    config = get_metrics_config()
+    token = config["AUTH_TOKEN"]
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    authorized = bool(token) and hmac.compare_digest(supplied.encode(), token.encode())
+    if not authorized and not _from_networks(request, config["ALLOWED_NETWORKS"]):
+        return HttpResponse(status=401 if token else 403)
+    # Registered here too, so series written by other workers are rendered
+    # even if this one has not made a provider call or hedge yet.
+    get_provider_metrics()
+    get_hedge_metrics()
+    return HttpResponse(get_metrics_registry().render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class RollupViewSet(viewsets.ViewSet):
+    """
+    Provider success rates, volumes and latency percentiles, read from the
+    pre-aggregated rollups (analytics/rollups.py).
+
+    Query parameters: ``start``/``end`` (ISO 8601, default the last 24
+    hours), ``granularity`` (minute/hour/day, default picked from the
+    range), ``group_by`` (comma-separated: provider, merchant, currency,
+    bank) and a filter per dimension. Non-staff users only see their own
+    merchants.
+    """
+
+    def _query(self, request):
+        params = request.query_params
+        end = parse_datetime(params["end"]) if params.get("end") else timezone.now()
+        start = parse_datetime(params["start"]) if params.get("start") else end - timedelta(days=1)
+        if start is None or end is None or start >= end:
+            raise ValueError("start and end must be ISO 8601 datetimes with start before end")
+        if timezone.is_naive(start):
+            start = timezone.make_aware(start)
+        if timezone.is_naive(end):
+            end = timezone.make_aware(end)
+
+        granularity = params.get("granularity")
+        if granularity and granularity not in GRANULARITY_SECONDS:
+            raise ValueError(f"granularity must be one of {', '.join(GRANULARITY_SECONDS)}")
+
+        group_by = tuple(filter(None, params.get("group_by", "provider").split(",")))
+        if not set(group_by) <= set(DIMENSIONS):
+            raise ValueError(f"group_by may only contain {', '.join(DIMENSIONS)}")
+
+        filters = {dimension: params.get(dimension) for dimension in DIMENSIONS}
+        if not request.user.is_staff:
+            merchant_ids = list(request.user.merchants.values_list("merchant_id", flat=True))
+            if filters["merchant"] and filters["merchant"] not in merchant_ids:
+                raise PermissionError("Not one of your merchants")
+            filters["merchant__in"] = merchant_ids
+        return start, end, granularity, filters, group_by
+
+    def _respond(self, request, series):
+        try:
+            start, end, granularity, filters, group_by = self._query(request)
+        except ValueError as e:
+            return Response({"status": "failed", "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except PermissionError as e:
+            return Response({"status": "failed", "message": str(e)}, status=status.HTTP_403_FORBIDDEN)
+
+        results = summarize(start, end, granularity, filters, group_by, series=series)
+        return Response({
+            "status": "success",
+            "data": {
+                "start": start,
+                "end": end,
+                "group_by": group_by,
+                "results": results,
+            },
+        })
+
+    def summary(self, request):
+        """Totals over the range, one entry per ``group_by`` combination."""
+        return self._respond(request, series=False)
+
+    def series(self, request):
+        """Like ``summary``, broken down per time bucket."""
+        return self._respond(request, series=True)
+
+
+class BankHealthViewSet(viewsets.ViewSet):
+    """
+    Banks currently failing on a provider, from this process's streaming
+    tracker (routing/banks.py): estimated calls, failures and leading
+    failure reasons over the tracking window. Staff only.
+    """
+
+    def degraded(self, request):
+        if not request.user.is_staff:
+            return Response({"status": "failed", "message": "Staff only"}, status=status.HTTP_403_FORBIDDEN)
+        tracker = get_bank_health_tracker()
+        return Response({
+            "status": "success",
+            "data": {
+                "window_seconds": tracker.config["WINDOW_SECONDS"],
+                "results": tracker.degraded(request.query_params.get("provider")),
+            },
+        })
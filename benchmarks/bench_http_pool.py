@@ -0,0 +1,97 @@
+"""
+Benchmark: per-call connections vs. the pooled provider transport.
+
+Starts a local keep-alive HTTP stub server and measures requests per second
+for the module-level ``requests.request`` (a new TCP connection per call,
+which is what the connectors did before) and for ``ProviderTransport``.
+
+Usage:
+    python benchmarks/bench_http_pool.py --requests 2000 --threads 8
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure(PROVIDER_HTTP_POOLS={"default": {"POOL_MAXSIZE": 32}})
+    django.setup()
+
+import requests
+
+from infrastructure.http import ProviderTransport, get_pool_config
+
+BODY = json.dumps({"status": True, "message": "ok", "data": {}}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(label, call, url, total, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for response in pool.map(lambda _: call(url), range(total)):
+            response.raise_for_status()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {total / elapsed:>10.0f} req/s  ({elapsed:.2f}s for {total} requests)")
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    server = start_stub_server()
+    url = f"http://127.0.0.1:{server.server_address[1]}/transaction/verify/ref"
+
+    transport = ProviderTransport("bench", get_pool_config("bench"))
+
+    unpooled = run(
+        "requests.request (no pool)",
+        lambda u: requests.request("GET", u, timeout=5),
+        url, args.requests, args.threads,
+    )
+    pooled = run(
+        "ProviderTransport (pooled)",
+        lambda u: transport.request("GET", u, timeout=5),
+        url, args.requests, args.threads,
+    )
+    print(f"speedup: {pooled / unpooled:.2f}x")
+
+    transport.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
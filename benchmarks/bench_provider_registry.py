@@ -0,0 +1,73 @@
+"""
+Microbenchmark: per-request provider construction vs. the provider registry.
+
+Measures how long it takes to get a usable provider instance the way
+``PaymentService`` did before (``provider_class()`` per request: environment
+lookup, logging and a fresh API client with its sub-clients) and through
+``ProviderRegistry.get``. No HTTP calls are made.
+
+Usage:
+    python benchmarks/bench_provider_registry.py --requests 20000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "connectors"))
+
+import django
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure(
+        PAYSTACK_BASE_URL="https://api.paystack.co",
+        LIVE_PAYSTACK_SECRET_KEY="sk_live_benchmark",
+        TEST_PAYSTACK_SECRET_KEY="sk_test_benchmark",
+        PAYMENT_PROVIDER={"FLUTTERWAVE": {"secret_key": "FLWSECK_TEST-benchmark"}},
+        # Read at import time by modules.utils (via its mail gateway).
+        MAILGUN_BASE_URL="", MAILGUN_DOMAIN="", MAILGUN_API_KEY="",
+        DEFAULT_FROM_EMAIL="", EMAIL_PREFIX="",
+        LOGGING_CONFIG=None,
+    )
+    django.setup()
+
+# The environment lookup logs at INFO; keep the handler cost in the numbers,
+# as it is in production, but off the terminal.
+logging.getLogger("my_logger").addHandler(logging.NullHandler())
+logging.getLogger("my_logger").propagate = False
+logging.getLogger("my_logger").setLevel(logging.INFO)
+
+from payments.providers import PAYMENT_PROVIDERS  # noqa: E402  (connectors/ on the path, as in the app)
+from connectors.payments.providers.registry import ProviderRegistry  # noqa: E402
+
+
+def measure(label, get, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        get()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {requests / elapsed:>12,.0f} /s  ({elapsed / requests * 1e6:8.2f} us/request)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    registry = ProviderRegistry()
+    merchant = {"secret_key": "sk_test_merchant"}
+    for name, provider_class in PAYMENT_PROVIDERS.items():
+        before = measure(f"{name}: construct per request", provider_class, args.requests)
+        after = measure(f"{name}: registry", lambda: registry.get(provider_class), args.requests)
+        measure(f"{name}: registry, merchant keys", lambda: registry.get(provider_class, merchant), args.requests)
+        print(f"{name}: {before / after:.0f}x less overhead per request\n")
+
+
+if __name__ == "__main__":
+    main()
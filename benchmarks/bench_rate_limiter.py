@@ -0,0 +1,93 @@
+"""
+Microbenchmark: rate limiter decisions per second.
+
+Measures ``reserve()`` throughput of the GCRA limiter (no sleeping) on a
+single thread and across threads, spread over many merchant keys. With
+``--redis-url`` the shared RedisBackend is measured as well; each decision
+is then one Lua script round trip.
+
+Usage:
+    python benchmarks/bench_rate_limiter.py --decisions 200000
+    python benchmarks/bench_rate_limiter.py --redis-url redis://localhost:6379/0
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure()
+    django.setup()
+
+from infrastructure.rate_limiter import (
+    DEFAULT_RATE_LIMIT_CONFIG,
+    Limit,
+    LocalBackend,
+    RateLimiter,
+    RateLimitExceeded,
+    RedisBackend,
+)
+
+LIMIT = Limit(interval=1 / 1000, burst=100, max_wait=0.0)
+
+
+def run(limiter, decisions, threads, keys):
+    per_thread = decisions // threads
+    counts = [[0, 0] for _ in range(threads)]
+
+    def worker(index):
+        allowed = rejected = 0
+        for i in range(per_thread):
+            try:
+                limiter.reserve(f"merchant:{(i + index) % keys}", LIMIT)
+                allowed += 1
+            except RateLimitExceeded:
+                rejected += 1
+        counts[index] = [allowed, rejected]
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    allowed = sum(c[0] for c in counts)
+    rejected = sum(c[1] for c in counts)
+    total = per_thread * threads
+    return total / elapsed, elapsed / total * 1e6, allowed, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--decisions", type=int, default=200_000)
+    parser.add_argument("--keys", type=int, default=1_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--redis-url", default=None)
+    args = parser.parse_args()
+
+    config = dict(DEFAULT_RATE_LIMIT_CONFIG, REDIS_URL=args.redis_url)
+    backends = [("local", LocalBackend)]
+    if args.redis_url:
+        backends.append(("redis", RedisBackend))
+
+    for name, backend_class in backends:
+        for threads in (1, args.threads):
+            limiter = RateLimiter(config, backend=backend_class(config))
+            decisions = args.decisions if name == "local" else args.decisions // 10
+            rate, latency, allowed, rejected = run(limiter, decisions, threads, args.keys)
+            print(
+                f"{name:<6} threads={threads:<3} {rate:>12,.0f} decisions/s  "
+                f"({latency:.2f} us/decision, allowed={allowed:,}, rejected={rejected:,})"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Microbenchmark: routing decisions per second.
+
+Pre-loads the engine with outcomes for three providers and then measures how
+many ``rank()`` calls and ``record()`` calls a single thread can make.
+
+Usage:
+    python benchmarks/bench_routing.py --decisions 200000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure()
+    django.setup()
+
+from routing.engine import DEFAULT_ROUTING_CONFIG, RoutingEngine
+
+PROVIDERS = ["paystack", "flutterwave", "nomba"]
+CURRENCIES = ["NGN", "GHS", "KES"]
+METHODS = ["card", "bank_transfer", "ussd"]
+
+
+def build_engine(warmup):
+    engine = RoutingEngine(PROVIDERS, config=dict(DEFAULT_ROUTING_CONFIG))
+    rng = random.Random(7)
+    for _ in range(warmup):
+        engine.record(
+            rng.choice(PROVIDERS),
+            success=rng.random() < 0.93,
+            latency=rng.lognormvariate(-0.5, 0.6),
+            error_class="timeout",
+            currency=rng.choice(CURRENCIES),
+            payment_method=rng.choice(METHODS),
+        )
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--decisions", type=int, default=200_000)
+    parser.add_argument("--warmup", type=int, default=50_000)
+    args = parser.parse_args()
+
+    engine = build_engine(args.warmup)
+    pairs = [(c, m) for c in CURRENCIES for m in METHODS]
+
+    start = time.perf_counter()
+    for i in range(args.decisions):
+        currency, method = pairs[i % len(pairs)]
+        engine.rank(currency, method)
+    elapsed = time.perf_counter() - start
+    print(f"rank():   {args.decisions / elapsed:>12,.0f} decisions/s  ({elapsed / args.decisions * 1e6:.2f} us/decision)")
+
+    start = time.perf_counter()
+    for i in range(args.decisions):
+        currency, method = pairs[i % len(pairs)]
+        engine.record(PROVIDERS[i % 3], success=True, latency=0.4, currency=currency, payment_method=method)
+    elapsed = time.perf_counter() - start
+    print(f"record(): {args.decisions / elapsed:>12,.0f} outcomes/s   ({elapsed / args.decisions * 1e6:.2f} us/outcome)")
+
+    print("ranking for NGN/card:", engine.rank("NGN", "card"))
+
+
+if __name__ == "__main__":
+    main()
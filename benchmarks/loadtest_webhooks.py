@@ -0,0 +1,172 @@
+"""
+Load test: webhook ingress throughput and ack latency.
+
+Fires signed Paystack ``charge.success`` deliveries at ``/v1/webhooks/paystack/``
+with a fixed number in flight, like a provider replaying a retry burst, and
+reports events/s and ack latency percentiles. ``--redelivery-rate`` makes that
+fraction of deliveries repeat an earlier one byte for byte, as provider
+retries do; those should be acked without being stored again.
+
+By default the view is called in-process (SQLite, in-memory Celery broker),
+which measures the ingress itself: signature check, normalization and group
+commit, without HTTP server overhead. Point ``--url`` at a running ASGI
+server (e.g. ``uvicorn payinfra.asgi:application``) to test a real
+deployment; ``--secret`` must then match its Paystack secret key.
+
+Usage:
+    python benchmarks/loadtest_webhooks.py --events 20000 --concurrency 500
+    python benchmarks/loadtest_webhooks.py --url http://localhost:8000/v1/webhooks/paystack/ --secret sk_test_x
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+
+def setup_in_process(secret):
+    import django
+    from django.conf import settings
+
+    if not settings.configured:
+        settings.configure(
+            DEBUG=False,
+            SECRET_KEY="loadtest",
+            ALLOWED_HOSTS=["*"],
+            INSTALLED_APPS=["django.contrib.contenttypes", "django.contrib.auth", "transactions", "analytics"],
+            DATABASES={
+                "default": {
+                    "ENGINE": "django.db.backends.sqlite3",
+                    "NAME": os.path.join(tempfile.mkdtemp(), "loadtest.sqlite3"),
+                }
+            },
+            PAYMENT_PROVIDER={"PAYSTACK": {"mode": "test", "secret_keys": {"test": secret}}},
+            CELERY_BROKER_URL="memory://",
+        )
+        django.setup()
+
+    from django.core.management import call_command
+    from payinfra.celery import app as celery_app
+
+    # The pipeline tasks are shared tasks; send them through the project's
+    # app, configured from the settings above.
+    celery_app.set_current()
+    call_command("migrate", verbosity=0)
+
+
+def signed_delivery(secret):
+    body = json.dumps({
+        "event": "charge.success",
+        "data": {
+            "reference": uuid.uuid4().hex,
+            "amount": 500000,
+            "currency": "NGN",
+            "status": "success",
+            "metadata": {"net_amount": "5000"},
+        },
+    }).encode()
+    signature = hmac.new(secret.encode(), body, hashlib.sha512).hexdigest()
+    return body, {"Content-Type": "application/json", "X-Paystack-Signature": signature}
+
+
+async def run(send, secret, events, concurrency, redelivery_rate=0.0):
+    latencies = []
+    failures = 0
+    remaining = events
+    sent = []
+
+    async def worker():
+        nonlocal remaining, failures
+        while remaining > 0:
+            remaining -= 1
+            if sent and random.random() < redelivery_rate:
+                body, headers = random.choice(sent)
+            else:
+                body, headers = signed_delivery(secret)
+                sent.append((body, headers))
+            started = time.perf_counter()
+            status_code = await send(body, headers)
+            latencies.append(time.perf_counter() - started)
+            if status_code != 200:
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, sorted(latencies), failures
+
+
+def percentile(values, fraction):
+    return values[min(int(fraction * len(values)), len(values) - 1)] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--secret", default="sk_test_loadtest")
+    parser.add_argument("--redelivery-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    async def over_http():
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+            async def send(body, headers):
+                return (await client.post(args.url, content=body, headers=headers)).status_code
+
+            return await run(send, args.secret, args.events, args.concurrency, args.redelivery_rate)
+
+    async def in_process():
+        from django.test import RequestFactory
+
+        from webhooks.views import webhook_ingress
+
+        factory = RequestFactory()
+
+        async def send(body, headers):
+            request = factory.post(
+                "/v1/webhooks/paystack/",
+                data=body,
+                content_type=headers["Content-Type"],
+                HTTP_X_PAYSTACK_SIGNATURE=headers["X-Paystack-Signature"],
+            )
+            return (await webhook_ingress(request, "paystack")).status_code
+
+        return await run(send, args.secret, args.events, args.concurrency, args.redelivery_rate)
+
+    if args.url:
+        elapsed, latencies, failures = asyncio.run(over_http())
+    else:
+        setup_in_process(args.secret)
+        elapsed, latencies, failures = asyncio.run(in_process())
+    print(
+        f"{args.events:,} events, concurrency={args.concurrency}: "
+        f"{args.events / elapsed:,.0f} events/s, failures={failures:,}"
+    )
+    print(
+        f"ack latency ms: p50={percentile(latencies, 0.5):.1f} "
+        f"p95={percentile(latencies, 0.95):.1f} p99={percentile(latencies, 0.99):.1f}"
+    )
+
+    if not args.url:
+        from transactions.models import WebhookLog, WebhookReceipt
+
+        print(
+            f"stored WebhookLog rows: {WebhookLog.objects.count():,}, "
+            f"WebhookReceipt rows: {WebhookReceipt.objects.count():,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
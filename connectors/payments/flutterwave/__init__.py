@@ -6,6 +6,7 @@ including support for charges, customers, payments, and payment methods.
 
 Main Components:
 - FlutterwaveClient: Main client for all Flutterwave operations
+- AsyncFlutterwaveClient: asyncio variant of FlutterwaveClient
 - FlutterwaveCharges: Handle charge operations
 - FlutterwaveCustomers: Handle customer operations  
 - FlutterwavePayments: Handle payment link creation and verification
@@ -33,7 +34,7 @@ Usage:
     )
 """
 
-from .flutterwave import FlutterwaveClient
+from .flutterwave import AsyncFlutterwaveClient, FlutterwaveClient
 from .charges import FlutterwaveCharges
 from .customers import FlutterwaveCustomers
 from .payment_methods import FlutterwavePaymentMethods
@@ -51,6 +52,7 @@ from .exceptions import (
 
 __all__ = [
     "FlutterwaveClient",
+    "AsyncFlutterwaveClient",
     "FlutterwaveCharges", 
     "FlutterwaveCustomers",
     "FlutterwavePaymentMethods",
@@ -3,6 +3,10 @@ import uuid
 import logging
 from typing import Dict, Any, Optional
 
+from infrastructure.circuit_breaker import endpoint_family
+from infrastructure.http import get_async_transport, get_transport
+from infrastructure.metrics import observe_provider_call
+
 from .exceptions import (
     FlutterwaveAPIException,
     FlutterwaveNetworkException,
@@ -15,6 +19,14 @@ logger = logging.getLogger(__name__)
 class FlutterwaveAPIClient:
     """Base client for Flutterwave API operations."""
 
+    # Circuit breaker families, first matching path prefix wins.
+    ENDPOINT_FAMILIES = (
+        ("/v3/payments", "initialize"),
+        ("/charges", "initialize"),
+        ("/v3/transactions/verify_by_reference", "verify"),
+        ("/v3/transfers", "transfer"),
+    )
+
     def __init__(self, secret_key: str, is_sandbox: bool = True):
         """
         Initialize the Flutterwave API client.
@@ -29,6 +41,8 @@ class FlutterwaveAPIClient:
         # Flutterwave uses the same base domain for both sandbox (test keys) and live (live keys).
         # The environment is determined by the API keys supplied.
         self.base_url = "https://api.flutterwave.com"
+        self.timeout = 30
+        self.transport = get_transport("flutterwave")
 
     def _get_headers(self, idempotency_key: Optional[str] = None, trace_id: Optional[str] = None) -> Dict[str, str]:
         """
@@ -82,65 +96,76 @@ class FlutterwaveAPIClient:
         """
         url = f"{self.base_url}{endpoint}"
         headers = self._get_headers(idempotency_key, trace_id)
+        self._log_request(method, url, headers, params, data, idempotency_key, trace_id)
 
-        # Log request details
-        masked_secret_key = self.secret_key[:6] + "..." + self.secret_key[-4:] if len(self.secret_key) > 10 else "INVALID_KEY"
-        logger.info(f"Flutterwave API Request - Method: {method}, URL: {url}")
-        logger.info(f"Flutterwave API Request - Headers: {{'Authorization': 'Bearer {masked_secret_key}', 'Content-Type': '{headers.get('Content-Type')}'}}")
-        logger.info(f"Flutterwave API Request - Params: {params}")
-        logger.info(f"Flutterwave API Request - Data: {data}")
-        logger.info(f"Flutterwave API Request - Idempotency Key: {idempotency_key}")
-        logger.info(f"Flutterwave API Request - Trace ID: {trace_id}")
-        logger.info(f"Flutterwave API Request - Is Sandbox: {self.is_sandbox}")
-        logger.info(f"Flutterwave API Request - Base URL: {self.base_url}")
-
+        family = endpoint_family(endpoint, self.ENDPOINT_FAMILIES)
         try:
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=headers,
-                json=data,
-                params=params,
-                timeout=30
-            )
-
-            # Log response details
-            logger.info(f"Flutterwave API Response - Status Code: {response.status_code}")
-            logger.info(f"Flutterwave API Response - Headers: {dict(response.headers)}")
-            
-            # Parse response
-            try:
-                response_data = response.json()
-                logger.info(f"Flutterwave API Response - Body: {response_data}")
-            except ValueError:
-                logger.error(f"Flutterwave API Response - Invalid JSON: {response.text}")
-                raise FlutterwaveAPIException(
-                    f"Invalid JSON response: {response.text}",
-                    response.status_code
+            with observe_provider_call("flutterwave", family):
+                response = self.transport.request(
+                    method=method,
+                    url=url,
+                    family=family,
+                    headers=headers,
+                    json=data,
+                    params=params,
+                    timeout=self.timeout
                 )
-
-            # Check for successful response
-            if response.status_code in [200, 201]:
-                if response_data.get("status") == "success":
-                    logger.info("Flutterwave API Request Successful")
-                    return response_data
-                else:
-                    # API returned success status code but status field is not success
-                    logger.error(f"Flutterwave API Request Failed - Response: {response_data}")
-                    raise FlutterwaveAPIException(
-                        response_data.get("message", "API request failed"),
-                        response.status_code,
-                        response_data
-                    )
-            else:
-                # HTTP error status code - use exception mapping
-                logger.error(f"Flutterwave API Request Failed - Status Code: {response.status_code}, Response: {response_data}")
-                raise map_api_exception(response.status_code, response_data)
+                return self._handle_response(response)
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Flutterwave API Network Error: {str(e)}")
             raise FlutterwaveNetworkException(f"Network error: {str(e)}", original_exception=e)
 
+    def _log_request(self, method, url, headers, params, data, idempotency_key, trace_id):
+        # One structured record per call; the secret key and card fields are
+        # redacted and the message rendered on the logging thread
+        # (infrastructure/logging.py).
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Flutterwave API Request %s %s",
+                method,
+                url,
+                extra={
+                    "params": params,
+                    "data": data,
+                    "idempotency_key": idempotency_key,
+                    "trace_id": trace_id,
+                    "sandbox": self.is_sandbox,
+                },
+            )
+
+    def _handle_response(self, response) -> Dict[str, Any]:
+        """
+        Parse a Flutterwave response (requests or httpx) and map API errors
+        onto Flutterwave exceptions.
+        """
+        try:
+            response_data = response.json()
+        except ValueError:
+            logger.error("Flutterwave API Response - Invalid JSON (status %s): %s", response.status_code, response.text)
+            raise FlutterwaveAPIException(
+                f"Invalid JSON response: {response.text}",
+                response.status_code
+            )
+
+        # Check for successful response
+        if response.status_code in [200, 201]:
+            if response_data.get("status") == "success":
+                logger.info("Flutterwave API Response %s", response.status_code, extra={"body": response_data})
+                return response_data
+            else:
+                # API returned success status code but status field is not success
+                logger.error("Flutterwave API Request Failed - Response: %s", response_data)
+                raise FlutterwaveAPIException(
+                    response_data.get("message", "API request failed"),
+                    response.status_code,
+                    response_data
+                )
+        else:
+            # HTTP error status code - use exception mapping
+            logger.error("Flutterwave API Request Failed - Status Code: %s, Response: %s", response.status_code, response_data)
+            raise map_api_exception(response.status_code, response_data)
+
     def get(self, endpoint: str, params: Optional[Dict] = None, **kwargs) -> Dict[str, Any]:
         """Make GET request."""
         return self._make_request("GET", endpoint, params=params, **kwargs)
@@ -159,3 +184,67 @@ class FlutterwaveAPIClient:
     def delete(self, endpoint: str, **kwargs) -> Dict[str, Any]:
         """Make DELETE request."""
         return self._make_request("DELETE", endpoint, **kwargs)
+
+
+class AsyncFlutterwaveAPIClient(FlutterwaveAPIClient):
+    """
+    asyncio variant of ``FlutterwaveAPIClient``: the HTTP helpers are coroutines.
+
+    Mixed in ahead of a sync service class (``class AsyncFlutterwavePayments(
+    AsyncFlutterwaveAPIClient, FlutterwavePayments)``) it makes every service
+    method awaitable, since they validate, build a payload and return
+    ``self.get``/``self.post``.
+    """
+
+    def __init__(self, secret_key: str, is_sandbox: bool = True):
+        super().__init__(secret_key, is_sandbox)
+        self.transport = get_async_transport("flutterwave")
+
+    async def _make_request(
+        self, 
+        method: str, 
+        endpoint: str, 
+        data: Optional[Dict] = None, 
+        params: Optional[Dict] = None,
+        idempotency_key: Optional[str] = None,
+        trace_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        url = f"{self.base_url}{endpoint}"
+        headers = self._get_headers(idempotency_key, trace_id)
+        self._log_request(method, url, headers, params, data, idempotency_key, trace_id)
+
+        family = endpoint_family(endpoint, self.ENDPOINT_FAMILIES)
+        try:
+            with observe_provider_call("flutterwave", family):
+                response = await self.transport.request(
+                    method=method,
+                    url=url,
+                    family=family,
+                    headers=headers,
+                    json=data,
+                    params=params,
+                    timeout=self.timeout
+                )
+                return self._handle_response(response)
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Flutterwave API Network Error: {str(e)}")
+            raise FlutterwaveNetworkException(f"Network error: {str(e)}", original_exception=e)
+
+    async def get(self, endpoint: str, params: Optional[Dict] = None, **kwargs) -> Dict[str, Any]:
+        """Make GET request."""
+        return await self._make_request("GET", endpoint, params=params, **kwargs)
+
+    async def post(self, endpoint: str, data: Optional[Dict] = None, **kwargs) -> Dict[str, Any]:
+        """Make POST request."""
+        if "idempotency_key" not in kwargs:
+            kwargs["idempotency_key"] = str(uuid.uuid4())
+        return await self._make_request("POST", endpoint, data=data, **kwargs)
+
+    async def put(self, endpoint: str, data: Optional[Dict] = None, **kwargs) -> Dict[str, Any]:
+        """Make PUT request."""
+        return await self._make_request("PUT", endpoint, data=data, **kwargs)
+
+    async def delete(self, endpoint: str, **kwargs) -> Dict[str, Any]:
+        """Make DELETE request."""
+        return await self._make_request("DELETE", endpoint, **kwargs)
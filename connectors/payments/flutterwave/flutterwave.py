@@ -1,4 +1,5 @@
 import logging
+from .base import AsyncFlutterwaveAPIClient
 from .charges import FlutterwaveCharges
 from .customers import FlutterwaveCustomers
 from .payment_methods import FlutterwavePaymentMethods
@@ -36,3 +37,40 @@ class FlutterwaveClient:
     def __repr__(self):
         env = "sandbox" if self.is_sandbox else "production"
         return f"FlutterwaveClient(environment={env})"
+
+
+class AsyncFlutterwaveCharges(AsyncFlutterwaveAPIClient, FlutterwaveCharges):
+    pass
+
+
+class AsyncFlutterwaveCustomers(AsyncFlutterwaveAPIClient, FlutterwaveCustomers):
+    pass
+
+
+class AsyncFlutterwavePaymentMethods(AsyncFlutterwaveAPIClient, FlutterwavePaymentMethods):
+    pass
+
+
+class AsyncFlutterwavePayments(AsyncFlutterwaveAPIClient, FlutterwavePayments):
+    pass
+
+
+class AsyncFlutterwaveTransfers(AsyncFlutterwaveAPIClient, FlutterwaveTransfers):
+    pass
+
+
+class AsyncFlutterwaveClient(FlutterwaveClient):
+    """
+    Async Flutterwave client: same services as ``FlutterwaveClient``, every
+    API call is awaitable.
+    """
+
+    def __init__(self, secret_key: str, is_sandbox: bool = True):
+        self.secret_key = secret_key
+        self.is_sandbox = is_sandbox
+
+        self.charges = AsyncFlutterwaveCharges(secret_key, is_sandbox)
+        self.customers = AsyncFlutterwaveCustomers(secret_key, is_sandbox)
+        self.payment_methods = AsyncFlutterwavePaymentMethods(secret_key, is_sandbox)
+        self.payments = AsyncFlutterwavePayments(secret_key, is_sandbox)
+        self.transfers = AsyncFlutterwaveTransfers(secret_key, is_sandbox)
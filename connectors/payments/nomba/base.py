@@ -1,122 +1,82 @@
 # modules/payments/nomba/base.py
 
+import asyncio
 import requests
-import time
 import logging
-from datetime import datetime
 from modules.utils.utils import ServiceProvidersEnvironment
+from infrastructure.circuit_breaker import endpoint_family
+from infrastructure.http import get_async_transport, get_transport, raise_for_status
+from infrastructure.metrics import observe_provider_call
+from payments.nomba.tokens import get_token_manager
 
 log = logging.getLogger("my_logger")
 
 
 class NombaBase:
+    # Circuit breaker families, first matching path prefix wins. Lookups have
+    # families of their own so their failures cannot open the payout breaker.
+    ENDPOINT_FAMILIES = (
+        ("/transactions", "verify"),
+        ("/transfers/bank/lookup", "bank_lookup"),
+        ("/transfers/banks", "bank_lookup"),
+        ("/transfers/bank", "transfer"),
+        ("/bill", "bills"),
+    )
+
     def __init__(self):
-        self.environment = ServiceProvidersEnvironment.get_nomba_environment_details()
+        self.environment = ServiceProvidersEnvironment().get_nomba_environment_details()
         self.base_url = self.environment["URL"]
 
-        self.tokens = {
-            "access_token": None,
-            "refresh_token": None,
-            "expiry_time": 0,
-        }
+        # Shared by every Nomba client in the process (and, through the
+        # cache, across workers); see payments/nomba/tokens.py.
+        self.token_manager = get_token_manager(self.environment)
 
         self.timeout = 30
-
-    # =====================
-    # Token Management
-    # =====================
-    def _update_tokens(self, token_data: dict):
-        self.tokens["access_token"] = token_data.get("access_token")
-        self.tokens["refresh_token"] = token_data.get(
-            "refresh_token", self.tokens["refresh_token"]
-        )
-
-        expires_at = token_data.get("expiresAt")
-        if expires_at:
-            expires_at = datetime.fromisoformat(expires_at.replace("Z", "+00:00"))
-            self.tokens["expiry_time"] = expires_at.timestamp()
-        else:
-            self.tokens["expiry_time"] = time.time() + 3600
-
-    def _get_new_access_token(self):
-        payload = {
-            "grant_type": "client_credentials",
-            "client_id": self.environment["NOMBA_CLIENT_ID"],
-            "client_secret": self.environment["NOMBA_CLIENT_SECRET"],
-        }
-
-        headers = {
-            "Content-Type": "application/json",
-            "accountId": self.environment["NOMBA_ACCOUNT_ID"],
-        }
-
-        response = requests.post(
-            f"{self.base_url}/auth/token/issue",
-            json=payload,
-            headers=headers,
-            timeout=self.timeout,
-        )
-
-        response.raise_for_status()
-        data = response.json()
-
-        if data.get("code") != "00":
-            raise Exception(data.get("message", "Failed to issue token"))
-
-        self._update_tokens(data["data"])
-
-    def _refresh_access_token(self):
-        payload = {
-            "grant_type": "client_credentials",
-            "refresh_token": self.tokens["refresh_token"],
-        }
-
-        headers = self._headers(include_auth=True)
-
-        response = requests.post(
-            f"{self.base_url}/auth/token/issue",
-            json=payload,
-            headers=headers,
-            timeout=self.timeout,
-        )
-
-        response.raise_for_status()
-        self._update_tokens(response.json()["data"])
+        self.transport = get_transport("nomba")
 
     def _ensure_token(self):
-        if not self.tokens["access_token"] or time.time() >= self.tokens["expiry_time"]:
-            try:
-                self._refresh_access_token()
-            except Exception:
-                self._get_new_access_token()
+        return self.token_manager.access_token()
 
-    def _headers(self, include_auth=False):
+    def _headers(self, token=None):
         headers = {
             "Content-Type": "application/json",
             "accountId": self.environment["NOMBA_ACCOUNT_ID"],
         }
-        if include_auth:
-            headers["Authorization"] = f"Bearer {self.tokens['access_token']}"
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
         return headers
 
     # =====================
     # HTTP Helpers (Paystack-like)
     # =====================
     def _request(self, method, endpoint, params=None, json=None):
-        self._ensure_token()
+        token = self._ensure_token()
 
         url = f"{self.base_url}{endpoint}"
-        response = requests.request(
+        family = endpoint_family(endpoint, self.ENDPOINT_FAMILIES)
+        with observe_provider_call("nomba", family):
+            response = self._send(method, url, family, params, json, token)
+            if response.status_code == 401:
+                # Revoked before its expiry: drop it for every worker, retry once.
+                self.token_manager.invalidate(token)
+                response = self._send(method, url, family, params, json, self._ensure_token())
+
+            return self._handle_response(response)
+
+    def _send(self, method, url, family, params, json, token):
+        return self.transport.request(
             method=method,
             url=url,
-            headers=self._headers(include_auth=True),
+            family=family,
+            headers=self._headers(token),
             params=params,
             json=json,
             timeout=self.timeout,
         )
 
+    def _handle_response(self, response):
         try:
-            response.raise_for_status()
+            raise_for_status(response)
         except requests.HTTPError:
             log.error("Nomba error: %s", response.text)
             raise
@@ -128,3 +88,51 @@ class NombaBase:
 
     def post(self, endpoint, json=None):
         return self._request("POST", endpoint, json=json)
+
+
+class AsyncNombaBase(NombaBase):
+    """
+    asyncio variant of ``NombaBase``: the HTTP helpers are coroutines. Tokens
+    come from the same shared manager; only a cold process issues one, in a
+    worker thread.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.transport = get_async_transport("nomba")
+
+    async def _ensure_token(self):
+        token = self.token_manager.cached_token()
+        if token is None:
+            # Cold process only: issue the first token off the event loop.
+            token = await asyncio.to_thread(self.token_manager.access_token)
+        return token
+
+    async def _request(self, method, endpoint, params=None, json=None):
+        token = await self._ensure_token()
+
+        url = f"{self.base_url}{endpoint}"
+        family = endpoint_family(endpoint, self.ENDPOINT_FAMILIES)
+        with observe_provider_call("nomba", family):
+            response = await self._send(method, url, family, params, json, token)
+            if response.status_code == 401:
+                await asyncio.to_thread(self.token_manager.invalidate, token)
+                response = await self._send(method, url, family, params, json, await self._ensure_token())
+            return self._handle_response(response)
+
+    async def _send(self, method, url, family, params, json, token):
+        return await self.transport.request(
+            method=method,
+            url=url,
+            family=family,
+            headers=self._headers(token),
+            params=params,
+            json=json,
+            timeout=self.timeout,
+        )
+
+    async def get(self, endpoint, params=None):
+        return await self._request("GET", endpoint, params=params)
+
+    async def post(self, endpoint, json=None):
+        return await self._request("POST", endpoint, json=json)
@@ -3,6 +3,7 @@
 from payments.nomba.bills import Bills
 from payments.nomba.transfers import Transfers
 from payments.nomba.transactions import Transactions
+from payments.nomba.base import AsyncNombaBase
 
 
 class NombaClient:
@@ -13,4 +14,40 @@ class NombaClient:
     def __init__(self):
         self.bills = Bills()
         self.transfers = Transfers()
-        self.transactions = Transactions()
\ No newline at end of file
+        self.transactions = Transactions()
+
+
+class AsyncBills(AsyncNombaBase, Bills):
+    pass
+
+
+class AsyncTransfers(AsyncNombaBase, Transfers):
+    pass
+
+
+class AsyncTransactions(AsyncNombaBase, Transactions):
+    # Transactions post-processes responses, so it cannot reuse the sync methods.
+
+    async def fetch(self, merchant_tx_ref: str):
+        response = await self.get(
+            "/transactions/accounts/single",
+            params={"merchantTxRef": merchant_tx_ref},
+        )
+        data = response.get("data")
+        return {"status": data.get("status")} if data else {"status": "failed"}
+
+    async def fetch_disco(self, merchant_tx_ref: str):
+        response = await self.fetch(merchant_tx_ref)
+        response["token"] = response.get("phcnVendToken")
+        return response
+
+
+class AsyncNombaClient:
+    """
+    Async Nomba Client - every call is awaitable
+    """
+
+    def __init__(self):
+        self.bills = AsyncBills()
+        self.transfers = AsyncTransfers()
+        self.transactions = AsyncTransactions()
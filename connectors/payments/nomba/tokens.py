@@ -0,0 +1,244 @@
+# modules/payments/nomba/tokens.py
+
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+
+from infrastructure.http import get_transport, raise_for_status
+
+log = logging.getLogger("my_logger")
+
+
+DEFAULT_NOMBA_TOKEN_CONFIG = {
+    # Shared tier: a Django cache (point it at Redis so all workers share it).
+    "CACHE_ALIAS": "default",
+    # Tokens are renewed in the background this long before expiresAt, so
+    # requests never wait for /auth/token/issue once the first token exists.
+    "REFRESH_MARGIN": 300,
+    # Only one worker issues a token at a time; the others wait up to
+    # WAIT_TIMEOUT for it to appear in the cache, then issue their own.
+    "LOCK_SECONDS": 15,
+    "WAIT_TIMEOUT": 10.0,
+    "POLL_INTERVAL": 0.1,
+    # Delay before the renewal thread retries a failed renewal.
+    "RETRY_INTERVAL": 15.0,
+    # Used when the token response carries no expiresAt.
+    "DEFAULT_LIFETIME": 3600,
+}
+
+
+def get_nomba_token_config() -> dict:
+    config = dict(DEFAULT_NOMBA_TOKEN_CONFIG)
+    config.update(getattr(settings, "NOMBA_TOKENS", {}) or {})
+    return config
+
+
+class NombaTokenManager:
+    """
+    One Nomba access token per account, shared by every client instance in
+    the process and, through the Django cache, by every worker.
+
+    ``access_token`` returns the current token without I/O. Only the first
+    call in a cold process issues one, under a lock, so concurrent callers
+    wait for a single ``/auth/token/issue`` (across workers, a short lock in
+    the cache does the same). A daemon thread renews the token
+    ``REFRESH_MARGIN`` seconds before it expires, taking a renewal another
+    worker already stored when there is one.
+    """
+
+    def __init__(self, environment: dict, config: dict | None = None):
+        self.environment = environment
+        self.config = config or get_nomba_token_config()
+        self.cache = caches[self.config["CACHE_ALIAS"]]
+        identity = f"{environment['URL']}|{environment['NOMBA_ACCOUNT_ID']}|{environment['NOMBA_CLIENT_ID']}"
+        self.cache_key = f"nomba:token:{hashlib.sha256(identity.encode()).hexdigest()}"
+        self.transport = get_transport("nomba")
+        self.timeout = 30
+        self._token = None
+        self._lock = threading.Lock()
+        self._renewer = None
+        os.register_at_fork(after_in_child=self._reset_in_child)
+
+    def _reset_in_child(self):
+        # The token is still good; the renewal thread did not survive the fork.
+        self._lock = threading.Lock()
+        self._renewer = None
+
+    @staticmethod
+    def _valid(token: dict | None, margin: float = 0) -> bool:
+        return bool(token and token.get("access_token")) and time.time() < token["expiry_time"] - margin
+
+    def cached_token(self) -> str | None:
+        """The current token if this process holds a valid one; never does I/O."""
+        token = self._token
+        return token["access_token"] if self._valid(token) else None
+
+    def access_token(self) -> str:
+        token = self._token
+        if not self._valid(token):
+            with self._lock:
+                token = self._token
+                if not self._valid(token):
+                    token = self._obtain(margin=0)
+        self._start_renewer()
+        return token["access_token"]
+
+    def invalidate(self, access_token: str):
+        """Drop ``access_token`` (e.g. after a 401) so the next call issues a new one."""
+        with self._lock:
+            if self._token and self._token["access_token"] == access_token:
+                self._token = None
+            shared = self.cache.get(self.cache_key)
+            if shared and shared["access_token"] == access_token:
+                self.cache.delete(self.cache_key)
+
+    def renew(self):
+        """Replace the token if it expires within ``REFRESH_MARGIN``."""
+        with self._lock:
+            self._obtain(margin=self.config["REFRESH_MARGIN"])
+
+    # -- issuing -------------------------------------------------------------
+
+    def _obtain(self, margin: float) -> dict:
+        # Call with self._lock held. Prefers a token another worker stored.
+        previous = self._token
+        token = self.cache.get(self.cache_key)
+        if not self._valid(token, margin):
+            token = self._issue_shared(previous or token, margin)
+        self._token = token
+        return token
+
+    def _issue_shared(self, previous: dict | None, margin: float) -> dict:
+        lock_key = f"{self.cache_key}:lock"
+        lock = uuid.uuid4().hex
+        if not self.cache.add(lock_key, lock, self.config["LOCK_SECONDS"]):
+            token = self._wait_for_other_worker(margin)
+            if token is not None:
+                return token
+            lock = None
+
+        try:
+            token = self._issue(previous)
+            self.cache.set(self.cache_key, token, max(int(token["expiry_time"] - time.time()), 1))
+            return token
+        finally:
+            if lock is not None and self.cache.get(lock_key) == lock:
+                self.cache.delete(lock_key)
+
+    def _wait_for_other_worker(self, margin: float) -> dict | None:
+        deadline = time.monotonic() + self.config["WAIT_TIMEOUT"]
+        while time.monotonic() < deadline:
+            time.sleep(self.config["POLL_INTERVAL"])
+            token = self.cache.get(self.cache_key)
+            if self._valid(token, margin):
+                return token
+        log.warning("Gave up waiting for another worker to issue a Nomba token; issuing one here")
+        return None
+
+    def _issue(self, previous: dict | None) -> dict:
+        if previous and previous.get("refresh_token"):
+            try:
+                return self._refresh(previous)
+            except Exception as e:
+                log.info(f"Nomba token refresh failed, issuing a new one: {e}")
+        return self._new()
+
+    def _new(self) -> dict:
+        response = self.transport.post(
+            f"{self.environment['URL']}/auth/token/issue",
+            family="auth",
+            json={
+                "grant_type": "client_credentials",
+                "client_id": self.environment["NOMBA_CLIENT_ID"],
+                "client_secret": self.environment["NOMBA_CLIENT_SECRET"],
+            },
+            headers={
+                "Content-Type": "application/json",
+                "accountId": self.environment["NOMBA_ACCOUNT_ID"],
+            },
+            timeout=self.timeout,
+        )
+        raise_for_status(response)
+        data = response.json()
+        if data.get("code") != "00":
+            raise Exception(data.get("message", "Failed to issue token"))
+        return self._parse(data["data"])
+
+    def _refresh(self, previous: dict) -> dict:
+        response = self.transport.post(
+            f"{self.environment['URL']}/auth/token/issue",
+            family="auth",
+            json={
+                "grant_type": "client_credentials",
+                "refresh_token": previous["refresh_token"],
+            },
+            headers={
+                "Content-Type": "application/json",
+                "accountId": self.environment["NOMBA_ACCOUNT_ID"],
+                "Authorization": f"Bearer {previous['access_token']}",
+            },
+            timeout=self.timeout,
+        )
+        raise_for_status(response)
+        return self._parse(response.json()["data"], previous)
+
+    def _parse(self, token_data: dict, previous: dict | None = None) -> dict:
+        expires_at = token_data.get("expiresAt")
+        if expires_at:
+            expiry_time = datetime.fromisoformat(expires_at.replace("Z", "+00:00")).timestamp()
+        else:
+            expiry_time = time.time() + self.config["DEFAULT_LIFETIME"]
+        return {
+            "access_token": token_data.get("access_token"),
+            "refresh_token": token_data.get("refresh_token", (previous or {}).get("refresh_token")),
+            "expiry_time": expiry_time,
+        }
+
+    # -- background renewal ----------------------------------------------------
+
+    def _start_renewer(self):
+        if self._renewer is None:
+            with self._lock:
+                if self._renewer is None:
+                    self._renewer = threading.Thread(target=self._renew_forever, name="nomba-token-renewer", daemon=True)
+                    self._renewer.start()
+
+    def _renew_forever(self):
+        margin = self.config["REFRESH_MARGIN"]
+        while True:
+            token = self._token
+            if token is None:
+                delay = self.config["RETRY_INTERVAL"]
+            else:
+                # Jittered, so the workers sharing a token do not all wake at once.
+                delay = token["expiry_time"] - margin - time.time() + random.uniform(0, margin / 4)
+            time.sleep(max(delay, 1.0))
+            try:
+                self.renew()
+            except Exception as e:
+                log.warning(f"Renewing the Nomba access token failed: {e}")
+                time.sleep(self.config["RETRY_INTERVAL"])
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_token_manager(environment: dict) -> NombaTokenManager:
+    """The process-wide token manager for this Nomba account and client id."""
+    key = (environment["URL"], environment["NOMBA_ACCOUNT_ID"], environment["NOMBA_CLIENT_ID"])
+    manager = _managers.get(key)
+    if manager is None:
+        with _managers_lock:
+            manager = _managers.get(key)
+            if manager is None:
+                manager = _managers[key] = NombaTokenManager(environment)
+    return manager
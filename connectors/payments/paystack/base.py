@@ -1,8 +1,22 @@
 import requests
 import logging
+from infrastructure.circuit_breaker import endpoint_family
+from infrastructure.http import get_async_transport, get_transport, raise_for_status
+from infrastructure.metrics import observe_provider_call
 log = logging.getLogger('my_logger')
 
 class PaystackBase:
+    # Circuit breaker families, first matching path prefix wins. Lookups have
+    # families of their own so their failures cannot open the payout breaker.
+    ENDPOINT_FAMILIES = (
+        ("/transaction/initialize", "initialize"),
+        ("/transaction/charge_authorization", "initialize"),
+        ("/transaction/verify", "verify"),
+        ("/transferrecipient", "recipient"),
+        ("/transfer", "transfer"),
+        ("/bank", "bank_lookup"),
+    )
+
     def __init__(self, secret_key):
         if not secret_key:
             raise ValueError("A Paystack secret key is required")
@@ -14,6 +28,7 @@ class PaystackBase:
         }
         self.base_url = "https://api.paystack.co"
         self.timeout = 30
+        self.transport = get_transport("paystack")
 
     def _make_request(self, method, endpoint, params=None, data=None, json=None):
         """
@@ -35,40 +50,47 @@ class PaystackBase:
             Exception: For Paystack API errors
         """
         url = f"{self.base_url}{endpoint}"
+        family = endpoint_family(endpoint, self.ENDPOINT_FAMILIES)
         try:
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=self.headers,
-                params=params,
-                data=data,
-                json=json,
-                timeout=self.timeout,
-            )
-            try:
-                response.raise_for_status()
-            except requests.exceptions.HTTPError as e:
-                # 🔥 THIS is what you need
-                log.error("Paystack error response: %s", response.text)
-                raise
-
-            # Attempt to parse the response as JSON
-            try:
-                response_data = response.json()
-            except ValueError:
-                raise ValueError(f"Invalid JSON response: {response.text}")
-
-            # Check for Paystack-specific errors
-            if not response_data.get("status", False):
-                raise Exception(
-                    f"Paystack API error: {response_data.get('message', 'Unknown error')}",
+            with observe_provider_call("paystack", family):
+                response = self.transport.request(
+                    method=method,
+                    url=url,
+                    family=family,
+                    headers=self.headers,
+                    params=params,
+                    data=data,
+                    json=json,
+                    timeout=self.timeout,
                 )
-
-            return response_data
+                return self._handle_response(response)
 
         except requests.exceptions.RequestException as e:
             raise Exception(f"HTTP request failed: {e!s}")
 
+    def _handle_response(self, response):
+        """Validate and parse a Paystack response (requests or httpx)."""
+        try:
+            raise_for_status(response)
+        except requests.exceptions.HTTPError as e:
+            # 🔥 THIS is what you need
+            log.error("Paystack error response: %s", response.text)
+            raise
+
+        # Attempt to parse the response as JSON
+        try:
+            response_data = response.json()
+        except ValueError:
+            raise ValueError(f"Invalid JSON response: {response.text}")
+
+        # Check for Paystack-specific errors
+        if not response_data.get("status", False):
+            raise Exception(
+                f"Paystack API error: {response_data.get('message', 'Unknown error')}",
+            )
+
+        return response_data
+
     def get(self, endpoint, params=None):
         """Shortcut for making GET requests"""
         return self._make_request("GET", endpoint, params=params)
@@ -84,3 +106,49 @@ class PaystackBase:
     def delete(self, endpoint, params=None):
         """Shortcut for making DELETE requests"""
         return self._make_request("DELETE", endpoint, params=params)
+
+
+class AsyncPaystackBase(PaystackBase):
+    """
+    asyncio variant of ``PaystackBase``: the HTTP helpers are coroutines.
+
+    Combined with a sync sub-client (``class AsyncTransactions(AsyncPaystackBase,
+    Transactions)``) every API method returns an awaitable, because those
+    methods only build a payload and return ``self.get``/``self.post``.
+    """
+
+    def __init__(self, secret_key):
+        super().__init__(secret_key)
+        self.transport = get_async_transport("paystack")
+
+    async def _make_request(self, method, endpoint, params=None, data=None, json=None):
+        url = f"{self.base_url}{endpoint}"
+        family = endpoint_family(endpoint, self.ENDPOINT_FAMILIES)
+        try:
+            with observe_provider_call("paystack", family):
+                response = await self.transport.request(
+                    method=method,
+                    url=url,
+                    family=family,
+                    headers=self.headers,
+                    params=params,
+                    data=data,
+                    json=json,
+                    timeout=self.timeout,
+                )
+                return self._handle_response(response)
+
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"HTTP request failed: {e!s}")
+
+    async def get(self, endpoint, params=None):
+        return await self._make_request("GET", endpoint, params=params)
+
+    async def post(self, endpoint, json=None, data=None):
+        return await self._make_request("POST", endpoint, json=json, data=data)
+
+    async def put(self, endpoint, json=None, data=None):
+        return await self._make_request("PUT", endpoint, json=json, data=data)
+
+    async def delete(self, endpoint, params=None):
+        return await self._make_request("DELETE", endpoint, params=params)
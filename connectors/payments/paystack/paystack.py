@@ -3,6 +3,7 @@ from payments.paystack.misc import Miscellaneous
 from payments.paystack.verification import Verification
 from payments.paystack.transfer import Transfers
 from payments.paystack.subaccounts import Subaccounts
+from payments.paystack.base import AsyncPaystackBase
 
 
 class PaystackClient:
@@ -16,8 +17,41 @@ class PaystackClient:
         self.verification = Verification(secret_key)
         self.transfer = Transfers(secret_key)
         self.subaccounts = Subaccounts(secret_key)
-        
-        
+
+
+class AsyncTransactions(AsyncPaystackBase, Transactions):
+    pass
+
+
+class AsyncMiscellaneous(AsyncPaystackBase, Miscellaneous):
+    pass
+
+
+class AsyncVerification(AsyncPaystackBase, Verification):
+    pass
+
+
+class AsyncTransfers(AsyncPaystackBase, Transfers):
+    pass
+
+
+class AsyncSubaccounts(AsyncPaystackBase, Subaccounts):
+    pass
+
+
+class AsyncPaystackClient:
+    """
+    Async Paystack Client: same API as ``PaystackClient``, every call is awaitable.
+    """
+
+    def __init__(self, secret_key):
+        self.transactions = AsyncTransactions(secret_key)
+        self.miscellaneous = AsyncMiscellaneous(secret_key)
+        self.verification = AsyncVerification(secret_key)
+        self.transfer = AsyncTransfers(secret_key)
+        self.subaccounts = AsyncSubaccounts(secret_key)
+
+
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 from django.db import transaction
-from connectors.payments.providers.paystack import PaystackProvider
-from connectors.payments.providers.flutterwave import FlutterwaveProvider
+from connectors.payments.providers.paystack import AsyncPaystackProvider, PaystackProvider
+from connectors.payments.providers.flutterwave import AsyncFlutterwaveProvider, FlutterwaveProvider
 
 def load_payment_providers():
     """
@@ -22,9 +22,21 @@ def load_payment_providers():
 
 PAYMENT_PROVIDERS = load_payment_providers()
 
+# asyncio variants, keyed like PAYMENT_PROVIDERS.
+ASYNC_PAYMENT_PROVIDERS = {
+    name: provider
+    for name, provider in {
+        "paystack": AsyncPaystackProvider,
+        "flutterwave": AsyncFlutterwaveProvider,
+    }.items()
+    if name in PAYMENT_PROVIDERS
+}
 
-def register_payment_provider(provider_name, client_class):
+
+def register_payment_provider(provider_name, client_class, async_client_class=None):
     PAYMENT_PROVIDERS[provider_name] = client_class
+    if async_client_class is not None:
+        ASYNC_PAYMENT_PROVIDERS[provider_name] = async_client_class
 
 
 # def sync_payment_providers(sender=None, **kwargs):
@@ -4,8 +4,8 @@ from decimal import Decimal
 import uuid
 
 from django.conf import settings
-from payments.providers.base import BasePaymentProvider
-from payments.flutterwave import FlutterwaveClient
+from connectors.payments.providers.base import BasePaymentProvider
+from payments.flutterwave import AsyncFlutterwaveClient, FlutterwaveClient
 from payments.flutterwave.exceptions import FlutterwaveAPIException
 
 # Set up logging
@@ -16,15 +16,23 @@ class FlutterwaveProvider(BasePaymentProvider):
     Flutterwave Payment Provider Implementation.
     """
 
-    def __init__(self):
+    client_class = FlutterwaveClient
+
+    def __init__(self, secret_key: Optional[str] = None, webhook_secret: Optional[str] = None):
         """
-        Initialize Flutterwave provider using settings.
+        Initialize Flutterwave provider using settings, or with an explicit
+        ``secret_key`` (e.g. a merchant's own).
+
+        Build instances through ``providers.registry.get_provider_registry``
+        rather than per request.
         """
-        flutterwave_settings = settings.PAYMENT_PROVIDER.get("FLUTTERWAVE", {})
+        flutterwave_settings = getattr(settings, "PAYMENT_PROVIDER", {}).get("FLUTTERWAVE", {})
 
-        secret_key = flutterwave_settings.get("secret_key")
+        if secret_key is None:
+            secret_key = flutterwave_settings.get("secret_key")
+            webhook_secret = flutterwave_settings.get("webhook_secret")
         self.callback_url = flutterwave_settings.get("callback_url")
-        self.webhook_secret = flutterwave_settings.get("webhook_secret")
+        self.webhook_secret = webhook_secret
         
         # Determine if we're in sandbox mode
         self.is_sandbox = secret_key and secret_key.startswith("FLWSECK_TEST")
@@ -34,7 +42,7 @@ class FlutterwaveProvider(BasePaymentProvider):
             raise ValueError("Flutterwave secret key is missing in settings.")
 
         # Initialize API client
-        super().__init__(api_client=FlutterwaveClient(
+        super().__init__(api_client=self.client_class(
             secret_key=secret_key, 
             is_sandbox=self.is_sandbox
         ))
@@ -61,78 +69,12 @@ class FlutterwaveProvider(BasePaymentProvider):
             Transaction initialization response
         """
         try:
-            # Convert amount from minor units (kobo) to major units (naira) and ensure two decimal places
-            amount_decimal = (Decimal(amount) / 100).quantize(Decimal("0.01"))
-            amount_str = format(amount_decimal, "f")
-
-            customer_name = kwargs.get("name", "Anonymous")
-            phone_number = kwargs.get("phone_number")
-            payment_options = kwargs.get("payment_options")
-            subaccounts = kwargs.get("subaccounts")
-            payment_plan = kwargs.get("payment_plan")
-            customizations = kwargs.get("customizations") or {
-                "title": kwargs.get("title") or "Titaar Payment"
-            }
-            redirect_url = kwargs.get("callback_url") or self.callback_url
-
-            if not redirect_url:
-                logger.error("Redirect/callback URL is required for Flutterwave payments.")
-                raise ValueError("Redirect/callback URL is required for Flutterwave payments.")
-
-            customer_data = {
-                "email": email,
-                "name": customer_name,
-            }
-            if phone_number:
-                customer_data["phonenumber"] = phone_number
-
-            reference = kwargs.get("reference", f"TITAA-{uuid.uuid4().hex[:12].upper()}")
-
-            metadata = {
-                "order_id": kwargs.get("order_id"),
-                "customer_email": email,
-                "source": "titaa_backend"
-            }
-            if kwargs.get("metadata"):
-                metadata.update(kwargs["metadata"])
-
-            # Remove None values from metadata
-            metadata = {key: value for key, value in metadata.items() if value is not None}
-
-            payment_response = self.api_client.payments.create_payment(
-                tx_ref=reference,
-                amount=amount_str,
-                currency=currency.upper(),
-                redirect_url=redirect_url,
-                customer=customer_data,
-                customizations=customizations,
-                meta=metadata or None,
-                payment_options=payment_options,
-                subaccounts=subaccounts,
-                payment_plan=payment_plan,
-            )
-            
-            payment_response.setdefault("data", {})
-            payment_response["data"].update({
-                "tx_ref": reference,
-                "amount": amount_str,
-                "currency": currency.upper(),
-                "redirect_url": redirect_url
-            })
-
-            return payment_response
+            request = self._payment_request(email, amount, currency, **kwargs)
+            payment_response = self.api_client.payments.create_payment(**request)
+            return self._payment_created(payment_response, request)
 
         except FlutterwaveAPIException as e:
-            logger.error(f"FlutterwaveAPIException during transaction initialization: {str(e)}")
-            logger.error(f"Exception details - Status Code: {e.status_code}, Error Code: {e.error_code}, Response Data: {e.response_data}")
-            return {
-                "status": "error",
-                "message": str(e),
-                "error": {
-                    "code": e.error_code,
-                    "status_code": e.status_code
-                }
-            }
+            return self._api_error_response(e, "transaction initialization")
         except Exception as e:
             logger.error(f"Unexpected error during transaction initialization: {str(e)}", exc_info=True)
             return {
@@ -140,6 +82,80 @@ class FlutterwaveProvider(BasePaymentProvider):
                 "message": f"Unexpected error: {str(e)}"
             }
 
+    def _payment_request(self, email: str, amount: int, currency: str, **kwargs) -> Dict[str, Any]:
+        """Build the ``create_payment`` arguments for a transaction."""
+        # Convert amount from minor units (kobo) to major units (naira) and ensure two decimal places
+        amount_decimal = (Decimal(amount) / 100).quantize(Decimal("0.01"))
+        amount_str = format(amount_decimal, "f")
+
+        customer_name = kwargs.get("name", "Anonymous")
+        phone_number = kwargs.get("phone_number")
+        customizations = kwargs.get("customizations") or {
+            "title": kwargs.get("title") or "Titaar Payment"
+        }
+        redirect_url = kwargs.get("callback_url") or self.callback_url
+
+        if not redirect_url:
+            logger.error("Redirect/callback URL is required for Flutterwave payments.")
+            raise ValueError("Redirect/callback URL is required for Flutterwave payments.")
+
+        customer_data = {
+            "email": email,
+            "name": customer_name,
+        }
+        if phone_number:
+            customer_data["phonenumber"] = phone_number
+
+        reference = kwargs.get("reference", f"TITAA-{uuid.uuid4().hex[:12].upper()}")
+
+        metadata = {
+            "order_id": kwargs.get("order_id"),
+            "customer_email": email,
+            "source": "titaa_backend"
+        }
+        if kwargs.get("metadata"):
+            metadata.update(kwargs["metadata"])
+
+        # Remove None values from metadata
+        metadata = {key: value for key, value in metadata.items() if value is not None}
+
+        return {
+            "tx_ref": reference,
+            "amount": amount_str,
+            "currency": currency.upper(),
+            "redirect_url": redirect_url,
+            "customer": customer_data,
+            "customizations": customizations,
+            "meta": metadata or None,
+            "payment_options": kwargs.get("payment_options"),
+            "subaccounts": kwargs.get("subaccounts"),
+            "payment_plan": kwargs.get("payment_plan"),
+        }
+
+    @staticmethod
+    def _payment_created(payment_response: Dict[str, Any], request: Dict[str, Any]) -> Dict[str, Any]:
+        payment_response.setdefault("data", {})
+        payment_response["data"].update({
+            "tx_ref": request["tx_ref"],
+            "amount": request["amount"],
+            "currency": request["currency"],
+            "redirect_url": request["redirect_url"]
+        })
+        return payment_response
+
+    @staticmethod
+    def _api_error_response(e: FlutterwaveAPIException, action: str) -> Dict[str, Any]:
+        logger.error(f"FlutterwaveAPIException during {action}: {str(e)}")
+        logger.error(f"Exception details - Status Code: {e.status_code}, Error Code: {e.error_code}, Response Data: {e.response_data}")
+        return {
+            "status": "error",
+            "message": str(e),
+            "error": {
+                "code": e.error_code,
+                "status_code": e.status_code
+            }
+        }
+
     def verify_transaction(self, transaction_id: str) -> Dict[str, Any]:
         """
         Verify a transaction using its ID or reference.
@@ -155,16 +171,7 @@ class FlutterwaveProvider(BasePaymentProvider):
             return result
 
         except FlutterwaveAPIException as e:
-            logger.error(f"FlutterwaveAPIException during transaction verification: {str(e)}")
-            logger.error(f"Exception details - Status Code: {e.status_code}, Error Code: {e.error_code}, Response Data: {e.response_data}")
-            return {
-                "status": "error",
-                "message": str(e),
-                "error": {
-                    "code": e.error_code,
-                    "status_code": e.status_code
-                }
-            }
+            return self._api_error_response(e, "transaction verification")
         except Exception as e:
             logger.error(f"Unexpected error during transaction verification: {str(e)}", exc_info=True)
             return {
@@ -306,3 +313,64 @@ class FlutterwaveProvider(BasePaymentProvider):
             "message": "Account resolution not implemented in charges API"
         }
         return account_data
+
+
+class AsyncFlutterwaveProvider(FlutterwaveProvider):
+    """
+    asyncio variant of ``FlutterwaveProvider``; API calls are coroutines.
+    """
+
+    client_class = AsyncFlutterwaveClient
+
+    async def initialize_transaction(
+        self, 
+        email: str, 
+        amount: int, 
+        currency: str = "NGN",
+        **kwargs
+    ) -> Dict[str, Any]:
+        try:
+            request = self._payment_request(email, amount, currency, **kwargs)
+            payment_response = await self.api_client.payments.create_payment(**request)
+            return self._payment_created(payment_response, request)
+
+        except FlutterwaveAPIException as e:
+            return self._api_error_response(e, "transaction initialization")
+        except Exception as e:
+            logger.error(f"Unexpected error during transaction initialization: {str(e)}", exc_info=True)
+            return {
+                "status": "error", 
+                "message": f"Unexpected error: {str(e)}"
+            }
+
+    async def verify_transaction(self, transaction_id: str) -> Dict[str, Any]:
+        try:
+            return await self.api_client.payments.verify_payment_by_reference(transaction_id)
+
+        except FlutterwaveAPIException as e:
+            return self._api_error_response(e, "transaction verification")
+        except Exception as e:
+            logger.error(f"Unexpected error during transaction verification: {str(e)}", exc_info=True)
+            return {
+                "status": "error",
+                "message": f"Verification failed: {str(e)}"
+            }
+
+    async def process_payment(self, amount: float, currency: str, customer_info: Dict[str, Any]) -> Dict[str, Any]:
+        email = customer_info.get("email") or ""
+        return await self.initialize_transaction(
+            email=email,
+            amount=int(amount * 100),  # Convert to minor units
+            currency=currency,
+            name=customer_info.get("name"),
+            phone_number=customer_info.get("phone")
+        )
+
+    async def refund_payment(self, transaction_id: str, amount: Optional[float] = None) -> Dict[str, Any]:
+        return super().refund_payment(transaction_id, amount)
+
+    async def list_banks(self, country: str = "NG") -> Dict[str, Any]:
+        return super().list_banks(country)
+
+    async def resolve_account(self, account_number: str, bank_code: str) -> Dict[str, Any]:
+        return super().resolve_account(account_number, bank_code)
@@ -2,8 +2,10 @@ import logging
 import uuid
 from typing import Any
 from payments.providers.base import BaseProvider
-from payments.nomba.nomba import NombaClient
+from payments.nomba.nomba import AsyncNombaClient, NombaClient
 from modules.utils.utils import ServiceProvidersEnvironment
+from infrastructure.cache import get_response_cache
+from routing.banks import observe_bank_call
 
 log = logging.getLogger("my_logger")
 
@@ -13,16 +15,18 @@ class NombaProvider(BaseProvider):
     Nomba Payment Provider Implementation
     """
 
+    client_class = NombaClient
+
     def __init__(self):
         """
         Initializes Nomba provider using environment-based credentials.
         """
-        env_details = ServiceProvidersEnvironment.get_nomba_environment_details()
+        env_details = ServiceProvidersEnvironment().get_nomba_environment_details()
 
         if not env_details:
             raise ValueError("Nomba environment configuration is missing.")
 
-        super().__init__(api_client=NombaClient())
+        super().__init__(api_client=self.client_class())
         self.name = "Nomba"
     # =========================
     # Airtime & Data
@@ -138,14 +142,24 @@ class NombaProvider(BaseProvider):
     # =========================
 
     def list_banks(self):
-        return self.api_client.transfers.banks()
+        return get_response_cache("banks").get_or_call(("nomba",), self.api_client.transfers.banks)
 
     def resolve_account(self, account_number: str, bank_code: str) -> dict[str, Any]:
-        result = self.api_client.transfers.resolve_account(
-            account_number=account_number,
-            bank_code=bank_code,
+        return get_response_cache("accounts").get_or_call(
+            ("nomba", bank_code, account_number),
+            lambda: self._resolve_account(account_number, bank_code),
         )
 
+    def _resolve_account(self, account_number: str, bank_code: str) -> dict[str, Any]:
+        with observe_bank_call("nomba", bank_code):
+            result = self.api_client.transfers.resolve_account(
+                account_number=account_number,
+                bank_code=bank_code,
+            )
+        return self._clean_account(result)
+
+    @staticmethod
+    def _clean_account(result):
         data = result.get("data", {})
         return {
             "accountName": data.get("accountName"),
@@ -166,21 +180,42 @@ class NombaProvider(BaseProvider):
         Initiate bank transfer via Nomba.
         Amount is in NAIRA.
         """
+        with observe_bank_call("nomba", bank_code):
+            return self.api_client.transfers.transfer(
+                **self._transfer_payload(amount, account_number, account_name, bank_code, reference, sender_name, narration)
+            )
 
-        reference = reference or f"NOMBA-{uuid.uuid4().hex[:12]}"
-        sender_name = sender_name or "iGospel"
-        narration = narration or "Withdrawal"
-
-        return self.api_client.transfers.transfer(
-            amount=int(amount),
+    def transfer_to_account(
+        self,
+        amount,
+        account_number: str,
+        account_name: str,
+        bank_code: str,
+        reference: str | None = None,
+        narration: str | None = None,
+    ):
+        """Provider-neutral payout (see ``PaystackProvider.transfer_to_account``)."""
+        return self.initiate_transfer(
+            amount=amount,
             account_number=account_number,
             account_name=account_name,
             bank_code=bank_code,
             reference=reference,
-            sender_name=sender_name,
             narration=narration,
         )
 
+    @staticmethod
+    def _transfer_payload(amount, account_number, account_name, bank_code, reference, sender_name, narration):
+        return {
+            "amount": int(amount),
+            "account_number": account_number,
+            "account_name": account_name,
+            "bank_code": bank_code,
+            "reference": reference or f"NOMBA-{uuid.uuid4().hex[:12]}",
+            "sender_name": sender_name or "iGospel",
+            "narration": narration or "Withdrawal",
+        }
+
     # =========================
     # Transactions
     # =========================
@@ -190,3 +225,44 @@ class NombaProvider(BaseProvider):
 
     def verify_electricity_transaction(self, reference: str):
         return self.api_client.transactions.fetch_disco(reference)
+
+
+class AsyncNombaProvider(NombaProvider):
+    """
+    asyncio variant of ``NombaProvider``. Pass-through methods return the
+    async client's coroutines; only response post-processing is redefined.
+    """
+
+    client_class = AsyncNombaClient
+
+    async def list_banks(self):
+        return await get_response_cache("banks").aget_or_call(("nomba",), self.api_client.transfers.banks)
+
+    async def resolve_account(self, account_number: str, bank_code: str) -> dict[str, Any]:
+        return await get_response_cache("accounts").aget_or_call(
+            ("nomba", bank_code, account_number),
+            lambda: self._resolve_account(account_number, bank_code),
+        )
+
+    async def _resolve_account(self, account_number: str, bank_code: str) -> dict[str, Any]:
+        with observe_bank_call("nomba", bank_code):
+            result = await self.api_client.transfers.resolve_account(
+                account_number=account_number,
+                bank_code=bank_code,
+            )
+        return self._clean_account(result)
+
+    async def initiate_transfer(
+        self,
+        amount: int,
+        account_number: str,
+        account_name: str,
+        bank_code: str,
+        reference: str | None = None,
+        sender_name: str | None = None,
+        narration: str | None = None,
+    ):
+        with observe_bank_call("nomba", bank_code):
+            return await self.api_client.transfers.transfer(
+                **self._transfer_payload(amount, account_number, account_name, bank_code, reference, sender_name, narration)
+            )
@@ -1,9 +1,13 @@
 import logging
+from decimal import Decimal
 from typing import Any
 from django.conf import settings
-from payments.providers.base import BasePaymentProvider
-from payments.paystack.paystack import PaystackClient
+from connectors.payments.providers.base import BasePaymentProvider
+from payments.paystack.paystack import AsyncPaystackClient, PaystackClient
 from modules.utils.utils import ServiceProvidersEnvironment  # import the function
+from infrastructure.cache import get_response_cache
+from infrastructure.rate_limiter import RateLimitExceeded, parse_retry_after
+from routing.banks import observe_bank_call
 
 log = logging.getLogger("my_logger")
 
@@ -13,19 +17,26 @@ class PaystackProvider(BasePaymentProvider):
     Paystack Payment Provider Implementation using settings and active DB environment.
     """
 
-    def __init__(self):
+    client_class = PaystackClient
+
+    def __init__(self, secret_key: str | None = None):
         """
         Initializes Paystack provider using the secret key from settings,
         dynamically switching between test and live based on ThirdPartyEnvironment.
+        An explicit ``secret_key`` (e.g. a merchant's own) skips the lookup.
+
+        Build instances through ``providers.registry.get_provider_registry``
+        rather than per request.
         """
-        env_details = ServiceProvidersEnvironment.get_paystack_environment_details()
-        secret_key = env_details.get("PAYSTACK_SECRET_KEY")
+        if secret_key is None:
+            env_details = ServiceProvidersEnvironment().get_paystack_environment_details()
+            secret_key = env_details.get("PAYSTACK_SECRET_KEY")
         self.callback_url = getattr(settings, "PAYSTACK_CALLBACK_URL", None)
 
         if not secret_key:
             raise ValueError("Paystack secret key is missing in settings.")
 
-        super().__init__(api_client=PaystackClient(secret_key=secret_key))
+        super().__init__(api_client=self.client_class(secret_key=secret_key))
         self.name = "Paystack"
 
     def initialize_transaction(self, email, amount, **kwargs):
@@ -63,9 +74,15 @@ class PaystackProvider(BasePaymentProvider):
     def list_banks(self, params=None):
         """
         List banks and return only name and code for each bank.
+        Cached (infrastructure/cache.py): the list changes rarely.
         """
-        raw_data = self.api_client.miscellaneous.list_banks(params=params)
+        return get_response_cache("banks").get_or_call(
+            ("paystack", params),
+            lambda: self._clean_banks(self.api_client.miscellaneous.list_banks(params=params)),
+        )
 
+    @staticmethod
+    def _clean_banks(raw_data):
         # If raw_data is a dict with 'data', extract it; else assume it's a list
         if isinstance(raw_data, dict):
             banks = raw_data.get("data", [])
@@ -80,20 +97,42 @@ class PaystackProvider(BasePaymentProvider):
         return cleaned_banks
     
     def resolve_account(self, account_number: str, bank_code: str) -> dict:
+        """
+        Account name lookup, cached per (bank, account) with unknown accounts
+        cached briefly too: this is the call Paystack rate-limits.
+        """
         import requests
         try:
-            result = self.api_client.verification.resolve_account_number(account_number, bank_code)
-            paystack_data = result.get("data", {})
-            return {
-                "accountName": paystack_data.get("account_name"),
-                "accountNumber": paystack_data.get("account_number")
-            }
+            return get_response_cache("accounts").get_or_call(
+                ("paystack", bank_code, account_number),
+                lambda: self._resolve_account(account_number, bank_code),
+            )
         except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 429:
-                # Rate limited
-                raise Exception("Paystack API rate limit exceeded. Try again later.")
+            self._raise_rate_limited(e)
             raise
 
+    def _resolve_account(self, account_number: str, bank_code: str) -> dict:
+        with observe_bank_call("paystack", bank_code):
+            result = self.api_client.verification.resolve_account_number(account_number, bank_code)
+        return self._clean_account(result)
+
+    @staticmethod
+    def _clean_account(result):
+        paystack_data = result.get("data", {})
+        return {
+            "accountName": paystack_data.get("account_name"),
+            "accountNumber": paystack_data.get("account_number")
+        }
+
+    @staticmethod
+    def _raise_rate_limited(error):
+        if error.response is not None and error.response.status_code == 429:
+            # The transport has already paused outbound Paystack calls.
+            raise RateLimitExceeded(
+                "provider:paystack",
+                retry_after=parse_retry_after(error.response.headers.get("Retry-After")) or 1.0,
+            )
+
     # =========================
     # Transfers
     # =========================
@@ -120,6 +159,7 @@ class PaystackProvider(BasePaymentProvider):
         recipient: str,
         reason: str | None = None,
         source: str = "balance",
+        bank_code: str | None = None,
         **kwargs,
     ):
         """
@@ -127,14 +167,53 @@ class PaystackProvider(BasePaymentProvider):
 
         amount: Amount in kobo
         recipient: Recipient code from Paystack
+        bank_code: The recipient's bank, when known; only used for bank
+            health tracking (routing/banks.py)
         """
-        return self.api_client.transfer.initiate_transfer(
-            source=source,
-            amount=int(amount),
-            recipient=recipient,
-            reason=reason,
-            **kwargs,
-        )
+        with observe_bank_call("paystack", bank_code):
+            return self.api_client.transfer.initiate_transfer(
+                source=source,
+                amount=int(amount),
+                recipient=recipient,
+                reason=reason,
+                **kwargs,
+            )
+
+    def transfer_to_account(
+        self,
+        amount,
+        account_number: str,
+        account_name: str,
+        bank_code: str,
+        reference: str | None = None,
+        narration: str | None = None,
+    ):
+        """
+        Pay ``amount`` (in naira) out to a bank account: creates the transfer
+        recipient, then the transfer. Same signature on every provider that
+        can pay out, so withdrawals can be routed (see ``WithdrawalService``).
+        """
+        recipient = self.create_transfer_recipient(name=account_name, account_number=account_number, bank_code=bank_code)
+        recipient_code = self._recipient_code(recipient)
+        if not recipient_code:
+            return {"status": False, "message": recipient.get("message") or "Transfer recipient could not be created"}
+        return self.initiate_transfer(**self._transfer_kwargs(amount, recipient_code, bank_code, reference, narration))
+
+    @staticmethod
+    def _recipient_code(response) -> str | None:
+        return ((response or {}).get("data") or {}).get("recipient_code")
+
+    @staticmethod
+    def _transfer_kwargs(amount, recipient_code, bank_code, reference, narration) -> dict:
+        kwargs = {
+            "amount": int(Decimal(amount) * 100),  # kobo
+            "recipient": recipient_code,
+            "reason": narration,
+            "bank_code": bank_code,
+        }
+        if reference:
+            kwargs["reference"] = reference
+        return kwargs
 
     def finalize_transfer(self, transfer_code: str, otp: str):
         """
@@ -246,7 +325,6 @@ class PaystackProvider(BasePaymentProvider):
         return self.api_client.subaccounts.fetch_subaccount(subaccount_code)
 
 
-
     # def list_banks(self, params=None):
     #     return self.api_client.miscellaneous.list_banks(params=params)
     
@@ -254,3 +332,71 @@ class PaystackProvider(BasePaymentProvider):
     #     return self.api_client.verification.resolve_account_number(
     #         account_number, bank_code
     #     )
+
+
+class AsyncPaystackProvider(PaystackProvider):
+    """
+    asyncio variant of ``PaystackProvider``.
+
+    Methods that only forward to the API client return the client's
+    coroutine and are inherited as-is; the ones that post-process a
+    response are redefined as coroutines.
+    """
+
+    client_class = AsyncPaystackClient
+
+    async def list_banks(self, params=None):
+        return await get_response_cache("banks").aget_or_call(("paystack", params), lambda: self._list_banks(params))
+
+    async def _list_banks(self, params=None):
+        raw_data = await self.api_client.miscellaneous.list_banks(params=params)
+        return self._clean_banks(raw_data)
+
+    async def resolve_account(self, account_number: str, bank_code: str) -> dict:
+        import requests
+        try:
+            return await get_response_cache("accounts").aget_or_call(
+                ("paystack", bank_code, account_number),
+                lambda: self._resolve_account(account_number, bank_code),
+            )
+        except requests.exceptions.HTTPError as e:
+            self._raise_rate_limited(e)
+            raise
+
+    async def _resolve_account(self, account_number: str, bank_code: str) -> dict:
+        with observe_bank_call("paystack", bank_code):
+            result = await self.api_client.verification.resolve_account_number(account_number, bank_code)
+        return self._clean_account(result)
+
+    async def initiate_transfer(
+        self,
+        amount: int,
+        recipient: str,
+        reason: str | None = None,
+        source: str = "balance",
+        bank_code: str | None = None,
+        **kwargs,
+    ):
+        with observe_bank_call("paystack", bank_code):
+            return await self.api_client.transfer.initiate_transfer(
+                source=source,
+                amount=int(amount),
+                recipient=recipient,
+                reason=reason,
+                **kwargs,
+            )
+
+    async def transfer_to_account(
+        self,
+        amount,
+        account_number: str,
+        account_name: str,
+        bank_code: str,
+        reference: str | None = None,
+        narration: str | None = None,
+    ):
+        recipient = await self.create_transfer_recipient(name=account_name, account_number=account_number, bank_code=bank_code)
+        recipient_code = self._recipient_code(recipient)
+        if not recipient_code:
+            return {"status": False, "message": recipient.get("message") or "Transfer recipient could not be created"}
+        return await self.initiate_transfer(**self._transfer_kwargs(amount, recipient_code, bank_code, reference, narration))
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from infrastructure.cache import LRUCache
+
+log = logging.getLogger("my_logger")
+
+
+DEFAULT_PROVIDER_REGISTRY_CONFIG = {
+    # One instance per provider class and credential set; the least recently
+    # used beyond this are dropped (merchant credentials make this unbounded).
+    "MAX_ENTRIES": 512,
+    # Instances are rebuilt after this long, so keys changed in the
+    # environment are picked up without a restart.
+    "TTL_SECONDS": 60 * 60,
+}
+
+
+def get_provider_registry_config() -> dict:
+    config = dict(DEFAULT_PROVIDER_REGISTRY_CONFIG)
+    config.update(getattr(settings, "PROVIDER_REGISTRY", {}) or {})
+    return config
+
+
+def credentials_fingerprint(credentials: dict | None) -> str | None:
+    """Stable digest of a credential set, so secrets are never used as keys."""
+    if not credentials:
+        return None
+    encoded = json.dumps(credentials, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class ProviderRegistry:
+    """
+    Long-lived, ready-to-use provider instances.
+
+    Building a provider resolves its environment (settings, logging) and
+    constructs its API client and sub-clients, which is wasted work per
+    request: the instances hold no per-request state, and their transports
+    are already shared and thread-safe (infrastructure/http.py). The registry
+    builds each ``(provider class, credentials)`` pair once, on first use,
+    and hands the same instance to every caller.
+
+    Rotated credentials fingerprint differently and so get a fresh instance;
+    ``invalidate`` drops the old ones straight away.
+    """
+
+    def __init__(self, config: dict | None = None):
+        self.config = config or get_provider_registry_config()
+        self._instances = LRUCache(self.config["MAX_ENTRIES"])
+        self._lock = threading.Lock()
+
+    def get(self, provider_class, credentials: dict | None = None):
+        """
+        The shared instance of ``provider_class``, built with ``credentials``
+        as keyword arguments (or from settings when there are none).
+        """
+        key = (provider_class, credentials_fingerprint(credentials))
+        instance = self._instances.get(key)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(key)
+                if instance is None:
+                    instance = provider_class(**(credentials or {}))
+                    self._instances.set(key, instance, self.config["TTL_SECONDS"])
+                    log.info(f"Provider registry built {provider_class.__name__}")
+        return instance
+
+    def invalidate(self, provider_class=None, credentials: dict | None = None) -> int:
+        """
+        Drop cached instances: of one class and credential set, of one class,
+        or (with no arguments) all of them. Returns how many were dropped.
+        """
+        fingerprint = credentials_fingerprint(credentials)
+
+        def matches(key):
+            cls, key_fingerprint = key
+            if provider_class is not None and not issubclass(cls, provider_class):
+                return False
+            return credentials is None or key_fingerprint == fingerprint
+
+        return self._instances.discard_if(matches)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_provider_registry() -> ProviderRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ProviderRegistry()
+    return _registry
+
+
+@receiver(setting_changed)
+def _drop_providers_on_setting_change(sender, setting, **kwargs):
+    # Providers read their keys from settings when built (override_settings).
+    if _registry is not None:
+        _registry.invalidate()
@@ -0,0 +1,336 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Awaitable, Callable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from requests.exceptions import HTTPError
+
+log = logging.getLogger("my_logger")
+
+
+DEFAULT_RESPONSE_CACHE_CONFIG = {
+    # Shared tier: a Django cache (point it at Redis so all workers share it).
+    "CACHE_ALIAS": "default",
+    # Per-process LRU in front of the shared tier. Entries expire with their
+    # shared copy, or after LOCAL_TTL, whichever is sooner.
+    "LOCAL_MAX_ENTRIES": 2048,
+    "LOCAL_TTL": 60,
+    # Only one caller across all workers fetches a missing key; the others
+    # wait up to WAIT_TIMEOUT for its result, then fetch themselves.
+    "LOCK_SECONDS": 15,
+    "WAIT_TIMEOUT": 10.0,
+    "POLL_INTERVAL": 0.05,
+    "MAX_POLL_INTERVAL": 0.5,
+    # Per cache name: TTL for results, NEGATIVE_TTL for definitive failures.
+    "CACHES": {
+        "banks": {"TTL": 24 * 60 * 60, "NEGATIVE_TTL": 60},
+        "accounts": {"TTL": 6 * 60 * 60, "NEGATIVE_TTL": 10 * 60},
+    },
+}
+
+# Provider answers that will not change on retry (unknown account, bad bank
+# code). Rate limits, auth and server errors are never cached.
+NEGATIVE_STATUS_CODES = {400, 404, 422}
+
+
+def get_response_cache_config() -> dict:
+    config = dict(DEFAULT_RESPONSE_CACHE_CONFIG)
+    overrides = getattr(settings, "RESPONSE_CACHE", {}) or {}
+    config.update(overrides)
+    config["CACHES"] = {**DEFAULT_RESPONSE_CACHE_CONFIG["CACHES"], **overrides.get("CACHES", {})}
+    return config
+
+
+def status_code_of(exc: BaseException | None) -> int | None:
+    """
+    HTTP status behind ``exc``, also when a connector re-raised the
+    ``HTTPError`` as a plain exception inside its ``except`` block.
+    """
+    seen = 0
+    while exc is not None and seen < 3:
+        status_code = getattr(exc, "status_code", None)
+        if status_code is None and isinstance(exc, HTTPError) and exc.response is not None:
+            status_code = exc.response.status_code
+        if status_code is not None:
+            return status_code
+        exc = exc.__cause__ or exc.__context__
+        seen += 1
+    return None
+
+
+def is_negative(exc: BaseException) -> bool:
+    """Whether ``exc`` is a definitive provider answer worth caching."""
+    return status_code_of(exc) in NEGATIVE_STATUS_CODES
+
+
+class CachedFailure(HTTPError):
+    """A failure replayed from the cache instead of calling the provider again."""
+
+    def __init__(self, message: str, status_code: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class LRUCache:
+    """Bounded in-process map with a per-entry expiry; thread-safe."""
+
+    def __init__(self, max_entries: int = 2048, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires <= self.clock():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float):
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_if(self, predicate) -> int:
+        """Drop every entry whose key satisfies ``predicate``; returns how many."""
+        with self._lock:
+            doomed = [key for key in self._entries if predicate(key)]
+            for key in doomed:
+                del self._entries[key]
+        return len(doomed)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class ResponseCache:
+    """
+    Caches provider lookups that rarely change (bank lists, account names).
+
+    Entries live in a shared Django cache with a TTL per cache name, and in
+    a small per-process LRU in front of it. Definitive failures (see
+    ``is_negative``) are cached too, for ``NEGATIVE_TTL``, and replayed as
+    ``CachedFailure``.
+
+    A missing key is fetched once: concurrent callers in this process wait on
+    the first one, and callers in other processes wait on a short lock in the
+    shared cache, polling for the result. A caller that waits longer than
+    ``WAIT_TIMEOUT`` fetches anyway rather than failing.
+    """
+
+    def __init__(self, name: str, config: dict | None = None):
+        self.config = config or get_response_cache_config()
+        self.name = name
+        entry = self.config["CACHES"].get(name, {})
+        self.ttl = entry.get("TTL", 300)
+        self.negative_ttl = entry.get("NEGATIVE_TTL", 0)
+        self.cache = caches[self.config["CACHE_ALIAS"]]
+        self.local = LRUCache(self.config["LOCAL_MAX_ENTRIES"])
+        self._inflight = {}
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reset_in_child)
+
+    def _reset_in_child(self):
+        # In-flight fetches belong to the parent's threads.
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def key(self, *parts) -> str:
+        # Hashed: keys carry account numbers, which have no business in Redis.
+        encoded = json.dumps(parts, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+        return f"respcache:{self.name}:{hashlib.sha256(encoded.encode()).hexdigest()}"
+
+    # -- entries -------------------------------------------------------------
+
+    @staticmethod
+    def _unwrap(entry):
+        if entry["ok"]:
+            return entry["value"]
+        raise CachedFailure(entry["error"], entry["status_code"])
+
+    def _failure(self, exc: BaseException) -> dict | None:
+        """The entry to cache for ``exc``, or None if it must not be cached."""
+        if not self.negative_ttl or not is_negative(exc):
+            return None
+        return {"ok": False, "error": str(exc), "status_code": status_code_of(exc)}
+
+    def _remember_locally(self, key: str, entry: dict):
+        ttl = self.ttl if entry["ok"] else self.negative_ttl
+        self.local.set(key, entry, min(ttl, self.config["LOCAL_TTL"]))
+
+    def _store(self, key: str, entry: dict):
+        self.cache.set(key, entry, self.ttl if entry["ok"] else self.negative_ttl)
+        self._remember_locally(key, entry)
+
+    async def _astore(self, key: str, entry: dict):
+        await self.cache.aset(key, entry, self.ttl if entry["ok"] else self.negative_ttl)
+        self._remember_locally(key, entry)
+
+    def invalidate(self, *parts):
+        key = self.key(*parts)
+        self.local.delete(key)
+        self.cache.delete(key)
+
+    # -- sync ----------------------------------------------------------------
+
+    def get_or_call(self, parts: tuple, func: Callable[[], Any]) -> Any:
+        """Return the cached result for ``parts``, calling ``func`` on a miss."""
+        key = self.key(*parts)
+        entry = self.local.get(key)
+        if entry is None:
+            entry = self.cache.get(key)
+            if entry is not None:
+                self._remember_locally(key, entry)
+        if entry is not None:
+            return self._unwrap(entry)
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+
+        if not leader:
+            # Another thread here is already fetching; share its outcome.
+            try:
+                return future.result(self.config["WAIT_TIMEOUT"])
+            except FutureTimeout:
+                pass
+            return func()
+
+        try:
+            value = self._fetch(key, func)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _fetch(self, key: str, func):
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex
+        if not self.cache.add(lock_key, token, self.config["LOCK_SECONDS"]):
+            entry = self._wait_for_other_process(key)
+            if entry is not None:
+                self._remember_locally(key, entry)
+                return self._unwrap(entry)
+            token = None
+
+        try:
+            try:
+                value = func()
+            except Exception as e:
+                entry = self._failure(e)
+                if entry is not None:
+                    self._store(key, entry)
+                raise
+            self._store(key, {"ok": True, "value": value})
+            return value
+        finally:
+            if token is not None and self.cache.get(lock_key) == token:
+                self.cache.delete(lock_key)
+
+    def _wait_for_other_process(self, key: str):
+        deadline = time.monotonic() + self.config["WAIT_TIMEOUT"]
+        delay = self.config["POLL_INTERVAL"]
+        while time.monotonic() + delay < deadline:
+            time.sleep(delay)
+            delay = min(delay * 2, self.config["MAX_POLL_INTERVAL"])
+            entry = self.cache.get(key)
+            if entry is not None:
+                return entry
+        log.warning(f"Gave up waiting for another worker to fill {key}; fetching it here")
+        return None
+
+    # -- async ---------------------------------------------------------------
+
+    async def aget_or_call(self, parts: tuple, func: Callable[[], Awaitable[Any]]) -> Any:
+        """``get_or_call`` for coroutines; ``func`` returns an awaitable."""
+        key = self.key(*parts)
+        entry = self.local.get(key)
+        if entry is not None:
+            return self._unwrap(entry)
+        entry = await self.cache.aget(key)
+        if entry is not None:
+            self._remember_locally(key, entry)
+            return self._unwrap(entry)
+
+        # Coalesce per event loop: a future cannot be awaited from another.
+        inflight_key = (key, id(asyncio.get_running_loop()))
+        future = self._inflight.get(inflight_key)
+        if future is None:
+            future = self._inflight[inflight_key] = asyncio.ensure_future(self._afetch(key, func))
+            future.add_done_callback(lambda _: self._inflight.pop(inflight_key, None))
+        # Shielded, so one caller's cancellation does not cancel the others'.
+        return await asyncio.shield(future)
+
+    async def _afetch(self, key: str, func):
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex
+        if not await self.cache.aadd(lock_key, token, self.config["LOCK_SECONDS"]):
+            deadline = time.monotonic() + self.config["WAIT_TIMEOUT"]
+            delay = self.config["POLL_INTERVAL"]
+            while time.monotonic() + delay < deadline:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.config["MAX_POLL_INTERVAL"])
+                entry = await self.cache.aget(key)
+                if entry is not None:
+                    self._remember_locally(key, entry)
+                    return self._unwrap(entry)
+            log.warning(f"Gave up waiting for another worker to fill {key}; fetching it here")
+            token = None
+
+        try:
+            try:
+                value = await func()
+            except Exception as e:
+                entry = self._failure(e)
+                if entry is not None:
+                    await self._astore(key, entry)
+                raise
+            await self._astore(key, {"ok": True, "value": value})
+            return value
+        finally:
+            if token is not None and await self.cache.aget(lock_key) == token:
+                await self.cache.adelete(lock_key)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_response_cache(name: str) -> ResponseCache:
+    cache = _caches.get(name)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(name)
+            if cache is None:
+                cache = _caches[name] = ResponseCache(name)
+    return cache
@@ -0,0 +1,328 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.module_loading import import_string
+
+log = logging.getLogger("my_logger")
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+DEFAULT_BREAKER_CONFIG = {
+    "BACKEND": "infrastructure.circuit_breaker.CacheBackend",
+    "CACHE_ALIAS": "default",
+    # Calls are counted in fixed windows of this length.
+    "WINDOW_SECONDS": 30,
+    # Do not judge a window until it has seen this many calls.
+    "MIN_CALLS": 20,
+    # Trip when this fraction of calls in the window failed ...
+    "FAILURE_RATE": 0.5,
+    # ... or when this fraction took longer than SLOW_CALL_SECONDS.
+    "SLOW_CALL_SECONDS": 10.0,
+    "SLOW_CALL_RATE": 0.5,
+    # How long the breaker stays open before letting probes through.
+    "OPEN_SECONDS": 30,
+    # At most one probe request per interval while half-open (across workers).
+    "PROBE_INTERVAL": 2,
+    # Consecutive successful probes needed to close again.
+    "HALF_OPEN_SUCCESSES": 3,
+    # How long a worker trusts its last read of the shared state.
+    "STATE_CACHE_SECONDS": 1.0,
+}
+
+
+def get_breaker_config() -> dict:
+    config = dict(DEFAULT_BREAKER_CONFIG)
+    config.update(getattr(settings, "CIRCUIT_BREAKER", {}) or {})
+    return config
+
+
+def endpoint_family(endpoint: str, families) -> str:
+    """
+    Map an API path onto an endpoint family (initialize, verify, transfer, ...).
+
+    ``families`` is a sequence of ``(path_prefix, family)`` pairs; the first
+    matching prefix wins and unmatched paths fall into ``"other"``. Prefixes
+    match whole path segments, so ``/transfer`` covers ``/transfer/bulk`` but
+    not ``/transferrecipient``.
+    """
+    path = endpoint.split("?", 1)[0]
+    for prefix, family in families:
+        if path == prefix or path.startswith(prefix + "/"):
+            return family
+    return "other"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose breaker is open."""
+
+    def __init__(self, name: str, retry_after: float | None = None):
+        super().__init__(f"Circuit open for {name}")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class InProcessBackend:
+    """
+    Breaker state held in this process only. Each worker trips on its own.
+    """
+
+    def __init__(self, config: dict):
+        self._lock = threading.Lock()
+        self._windows = {}
+        self._values = {}
+
+    def _get(self, key):
+        value, expires = self._values.get(key, (None, 0))
+        if expires and expires < time.monotonic():
+            self._values.pop(key, None)
+            return None
+        return value
+
+    def _set(self, key, value, ttl):
+        self._values[key] = (value, time.monotonic() + ttl)
+
+    def record(self, name, window, failed, slow, ttl):
+        with self._lock:
+            current = self._windows.get(name)
+            if current is None or current[0] != window:
+                current = [window, 0, 0, 0]
+                self._windows[name] = current
+            current[1] += 1
+            current[2] += int(failed)
+            current[3] += int(slow)
+            return current[1], current[2], current[3]
+
+    def get_open_until(self, name):
+        with self._lock:
+            return self._get(f"{name}:open_until")
+
+    def set_open_until(self, name, until, ttl):
+        with self._lock:
+            self._set(f"{name}:open_until", until, ttl)
+            self._values.pop(f"{name}:probe_ok", None)
+
+    def clear(self, name):
+        with self._lock:
+            for suffix in ("open_until", "probe", "probe_ok"):
+                self._values.pop(f"{name}:{suffix}", None)
+            self._windows.pop(name, None)
+
+    def acquire_probe(self, name, interval):
+        with self._lock:
+            if self._get(f"{name}:probe") is not None:
+                return False
+            self._set(f"{name}:probe", 1, interval)
+            return True
+
+    def incr_probe_successes(self, name, ttl):
+        with self._lock:
+            count = (self._get(f"{name}:probe_ok") or 0) + 1
+            self._set(f"{name}:probe_ok", count, ttl)
+            return count
+
+
+class CacheBackend:
+    """
+    Breaker state in a Django cache, shared by every worker process.
+
+    Point ``CACHE_ALIAS`` at a Redis cache in production; counters rely on the
+    backend's atomic ``add``/``incr``. On a local-memory cache the state is
+    per process, like ``InProcessBackend`` (``check --deploy`` reports it).
+
+    A window's counters share one cache value, packed into ``COUNTER_BITS``
+    wide fields (total, failed, slow), so recording a call is a single
+    ``incr`` rather than one per counter plus a read of the others.
+    """
+
+    prefix = "cb"
+    COUNTER_BITS = 21
+
+    def __init__(self, config: dict):
+        self.cache = caches[config["CACHE_ALIAS"]]
+
+    def _key(self, name, suffix):
+        return f"{self.prefix}:{name}:{suffix}"
+
+    def _incr(self, key, delta, ttl):
+        try:
+            return self.cache.incr(key, delta)
+        except ValueError:  # first call in the window, or expired
+            if self.cache.add(key, delta, ttl):
+                return delta
+            return self.cache.incr(key, delta)
+
+    def record(self, name, window, failed, slow, ttl):
+        bits = self.COUNTER_BITS
+        delta = 1 + (int(failed) << bits) + (int(slow) << 2 * bits)
+        packed = self._incr(self._key(name, f"{window}:calls"), delta, ttl)
+        mask = (1 << bits) - 1
+        return packed & mask, (packed >> bits) & mask, packed >> 2 * bits
+
+    def get_open_until(self, name):
+        return self.cache.get(self._key(name, "open_until"))
+
+    def set_open_until(self, name, until, ttl):
+        self.cache.set(self._key(name, "open_until"), until, ttl)
+        self.cache.delete(self._key(name, "probe_ok"))
+
+    def clear(self, name):
+        self.cache.delete_many([self._key(name, s) for s in ("open_until", "probe", "probe_ok")])
+
+    def acquire_probe(self, name, interval):
+        return self.cache.add(self._key(name, "probe"), 1, interval)
+
+    def incr_probe_successes(self, name, ttl):
+        return self._incr(self._key(name, "probe_ok"), 1, ttl)
+
+
+class CircuitBreaker:
+    """
+    Breaker for one provider endpoint family, e.g. ``paystack:initialize``.
+
+    closed     calls flow; failures and slow calls are counted per window.
+    open       calls fail immediately with ``CircuitOpenError``.
+    half_open  after OPEN_SECONDS, one probe per PROBE_INTERVAL is let
+               through; HALF_OPEN_SUCCESSES good probes close the breaker,
+               a failed probe re-opens it.
+
+    ``open_until`` is stored as wall-clock time so every worker sharing the
+    backend agrees on when the open period ends.
+    """
+
+    def __init__(self, name: str, backend, config: dict):
+        self.name = name
+        self.backend = backend
+        self.config = config
+        self._cached_state = None
+        self._cached_at = 0.0
+
+    def _read_state(self):
+        open_until = self.backend.get_open_until(self.name)
+        if open_until is None:
+            return CLOSED, None
+        if time.time() < open_until:
+            return OPEN, open_until
+        return HALF_OPEN, open_until
+
+    def state(self, fresh: bool = False):
+        """Current ``(state, open_until)``; cached locally for STATE_CACHE_SECONDS."""
+        now = time.monotonic()
+        if fresh or self._cached_state is None or now - self._cached_at > self.config["STATE_CACHE_SECONDS"]:
+            self._cached_state = self._read_state()
+            self._cached_at = now
+        return self._cached_state
+
+    @property
+    def is_open(self) -> bool:
+        return self.state()[0] == OPEN
+
+    def before_call(self):
+        """Raise ``CircuitOpenError`` unless this call may go to the provider."""
+        state, open_until = self.state()
+        if state == CLOSED:
+            return
+        if state == OPEN:
+            raise CircuitOpenError(self.name, retry_after=open_until - time.time())
+        if not self.backend.acquire_probe(self.name, self.config["PROBE_INTERVAL"]):
+            raise CircuitOpenError(self.name, retry_after=self.config["PROBE_INTERVAL"])
+
+    def record(self, success: bool, latency: float):
+        # The locally cached state is at most STATE_CACHE_SECONDS old: a call
+        # recorded just after another worker changed the state is counted
+        # as if it came before the change.
+        state, _ = self.state()
+        if state == HALF_OPEN:
+            if success:
+                ok = self.backend.incr_probe_successes(self.name, self.config["OPEN_SECONDS"] * 2)
+                if ok >= self.config["HALF_OPEN_SUCCESSES"]:
+                    self.backend.clear(self.name)
+                    self._cached_state = None
+                    log.info(f"Circuit {self.name} closed after {ok} successful probes")
+            else:
+                self._trip("probe failed")
+            return
+        if state == OPEN:
+            return
+
+        window_seconds = self.config["WINDOW_SECONDS"]
+        window = int(time.time() // window_seconds)
+        slow = latency >= self.config["SLOW_CALL_SECONDS"]
+        total, failures, slow_calls = self.backend.record(
+            self.name, window, not success, slow, window_seconds * 2
+        )
+        if total < self.config["MIN_CALLS"]:
+            return
+        if failures / total >= self.config["FAILURE_RATE"]:
+            self._trip(f"failure rate {failures}/{total}")
+        elif slow_calls / total >= self.config["SLOW_CALL_RATE"]:
+            self._trip(f"slow call rate {slow_calls}/{total}")
+
+    def _trip(self, reason: str):
+        open_seconds = self.config["OPEN_SECONDS"]
+        # Keep the marker around long enough for the half-open phase.
+        self.backend.set_open_until(self.name, time.time() + open_seconds, open_seconds * 10)
+        self._cached_state = None
+        log.warning(f"Circuit {self.name} opened for {open_seconds}s: {reason}")
+
+
+class BreakerRegistry:
+    """Process-wide set of breakers sharing one backend."""
+
+    def __init__(self, config: dict | None = None):
+        self.config = config or get_breaker_config()
+        self.backend = import_string(self.config["BACKEND"])(self.config)
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str, family: str) -> CircuitBreaker:
+        name = f"{provider}:{family}"
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(name)
+                if breaker is None:
+                    breaker = CircuitBreaker(name, self.backend, self.config)
+                    self._breakers[name] = breaker
+        return breaker
+
+    def is_open(self, provider: str, family: str) -> bool:
+        return self.get(provider, family).is_open
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_breaker_registry() -> BreakerRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = BreakerRegistry()
+    return _registry
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_breaker_cache(app_configs, **kwargs):
+    """``check --deploy``: shared breakers need a cache every worker can see."""
+    config = get_breaker_config()
+    if config["BACKEND"] != "infrastructure.circuit_breaker.CacheBackend":
+        return []
+    if not isinstance(caches[config["CACHE_ALIAS"]], LocMemCache):
+        return []
+    return [
+        checks.Error(
+            f"CIRCUIT_BREAKER uses the local-memory cache {config['CACHE_ALIAS']!r}, so each worker "
+            "process trips its breakers on its own.",
+            hint="Set CACHE_URL to a Redis cache, or use InProcessBackend if per-process breakers are intended.",
+            id="infrastructure.E001",
+        )
+    ]
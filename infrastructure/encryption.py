@@ -0,0 +1,268 @@
+import base64
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+from django.utils.module_loading import import_string
+
+from infrastructure.cache import LRUCache
+
+log = logging.getLogger("my_logger")
+
+
+DEFAULT_ENCRYPTION_CONFIG = {
+    # Holds the master keys; any class with active_key_id(),
+    # generate_data_key() and decrypt_data_key() can stand in for a real KMS.
+    "KMS_BACKEND": "infrastructure.encryption.LocalKeyFileKMS",
+    "KEY_FILE": None,
+    # A data key encrypts values for DATA_KEY_LIFETIME seconds or
+    # DATA_KEY_MAX_USES values, whichever comes first, so writes reach the
+    # KMS about once per lifetime rather than once per value.
+    "DATA_KEY_LIFETIME": 60 * 60,
+    "DATA_KEY_MAX_USES": 100_000,
+    # Unwrapped data keys kept in memory for decryption.
+    "DATA_KEY_CACHE_SIZE": 1024,
+    "DATA_KEY_CACHE_TTL": 60 * 60,
+}
+
+# Prefix of every envelope; values without it are legacy plaintext.
+ENVELOPE_PREFIX = "enc1$"
+
+
+def get_encryption_config() -> dict:
+    config = dict(DEFAULT_ENCRYPTION_CONFIG)
+    config.update(getattr(settings, "ENCRYPTION", {}) or {})
+    return config
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class DecryptionError(Exception):
+    """A stored value could not be decrypted (wrong key or tampered data)."""
+
+
+class LocalKeyFileKMS:
+    """
+    KMS stand-in backed by a JSON key file:
+    ``{"active": "<key id>", "keys": {"<key id>": "<base64 AES-256 key>"}}``.
+
+    Data keys are wrapped with the active master key (AES-GCM, key id as
+    associated data). Retired master keys stay in the file so existing data
+    keys can still be unwrapped until ``rotate_encryption_keys`` has run. The
+    file is re-read when it changes on disk.
+    """
+
+    def __init__(self, key_file):
+        if not key_file:
+            raise ImproperlyConfigured("ENCRYPTION['KEY_FILE'] is not set")
+        self.key_file = str(key_file)
+        self._keyring = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def add_master_key(cls, key_file) -> str:
+        """Append a new master key to ``key_file`` (created if missing) and make it active."""
+        key_file = str(key_file)
+        keyring = {"active": None, "keys": {}}
+        if os.path.exists(key_file):
+            with open(key_file) as f:
+                keyring = json.load(f)
+        key_id = time.strftime("%Y%m%d%H%M%S") + "-" + secrets.token_hex(2)
+        keyring["keys"][key_id] = base64.b64encode(AESGCM.generate_key(bit_length=256)).decode()
+        keyring["active"] = key_id
+
+        directory = os.path.dirname(key_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{key_file}.tmp"
+        fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(keyring, f, indent=2)
+        os.replace(temporary, key_file)
+        return key_id
+
+    def _load(self, force: bool = False) -> dict:
+        with self._lock:
+            try:
+                mtime = os.stat(self.key_file).st_mtime_ns
+            except FileNotFoundError:
+                raise ImproperlyConfigured(
+                    f"Encryption key file {self.key_file} does not exist; "
+                    "create one with `manage.py rotate_encryption_keys --new-master-key`"
+                )
+            if self._keyring is None or force or mtime != self._mtime:
+                with open(self.key_file) as f:
+                    data = json.load(f)
+                self._keyring = {
+                    "active": data["active"],
+                    "keys": {key_id: base64.b64decode(key) for key_id, key in data["keys"].items()},
+                }
+                self._mtime = mtime
+            return self._keyring
+
+    def active_key_id(self) -> str:
+        return self._load()["active"]
+
+    def generate_data_key(self) -> tuple[bytes, str, str]:
+        """A fresh data key: ``(plaintext, wrapped, master key id)``."""
+        keyring = self._load()
+        key_id = keyring["active"]
+        data_key = AESGCM.generate_key(bit_length=256)
+        nonce = os.urandom(12)
+        wrapped = nonce + AESGCM(keyring["keys"][key_id]).encrypt(nonce, data_key, key_id.encode())
+        return data_key, _b64encode(wrapped), key_id
+
+    def decrypt_data_key(self, wrapped: str, key_id: str) -> bytes:
+        keyring = self._load()
+        if key_id not in keyring["keys"]:
+            keyring = self._load(force=True)
+        master_key = keyring["keys"].get(key_id)
+        if master_key is None:
+            raise DecryptionError(f"Unknown master key {key_id}")
+        raw = _b64decode(wrapped)
+        try:
+            return AESGCM(master_key).decrypt(raw[:12], raw[12:], key_id.encode())
+        except InvalidTag:
+            raise DecryptionError(f"Data key does not unwrap with master key {key_id}")
+
+
+class _DataKey:
+    __slots__ = ("plaintext", "wrapped", "key_id", "expires_at", "uses")
+
+    def __init__(self, plaintext, wrapped, key_id, expires_at):
+        self.plaintext = plaintext
+        self.wrapped = wrapped
+        self.key_id = key_id
+        self.expires_at = expires_at
+        self.uses = 0
+
+
+class EnvelopeEncryptor:
+    """
+    Envelope encryption for short secrets stored in the database.
+
+    Each value is encrypted with AES-256-GCM under a data key, and stored
+    together with that data key wrapped by the KMS master key:
+    ``enc1$<master key id>$<wrapped data key>$<nonce + ciphertext>``.
+
+    Encryption reuses the current data key until it expires, and unwrapped
+    data keys are cached, so reading a value is one AES-GCM decryption and
+    only a cache miss goes to the KMS.
+    """
+
+    def __init__(self, config: dict | None = None, kms=None, clock=time.monotonic):
+        self.config = config or get_encryption_config()
+        self.kms = kms or import_string(self.config["KMS_BACKEND"])(self.config["KEY_FILE"])
+        self.clock = clock
+        self.data_keys = LRUCache(self.config["DATA_KEY_CACHE_SIZE"], clock=clock)
+        self._current = None
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reset_in_child)
+
+    def _reset_in_child(self):
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_encrypted(value) -> bool:
+        return isinstance(value, str) and value.startswith(ENVELOPE_PREFIX)
+
+    def _data_key(self) -> _DataKey:
+        with self._lock:
+            current = self._current
+            if (
+                current is None
+                or current.expires_at <= self.clock()
+                or current.uses >= self.config["DATA_KEY_MAX_USES"]
+                # The master key was rotated since this data key was made.
+                or current.key_id != self.kms.active_key_id()
+            ):
+                plaintext, wrapped, key_id = self.kms.generate_data_key()
+                current = self._current = _DataKey(
+                    plaintext, wrapped, key_id, self.clock() + self.config["DATA_KEY_LIFETIME"]
+                )
+                self.data_keys.set(wrapped, plaintext, self.config["DATA_KEY_CACHE_TTL"])
+            current.uses += 1
+            return current
+
+    def encrypt(self, plaintext: str) -> str:
+        data_key = self._data_key()
+        nonce = os.urandom(12)
+        ciphertext = AESGCM(data_key.plaintext).encrypt(nonce, plaintext.encode(), None)
+        return f"{ENVELOPE_PREFIX}{data_key.key_id}${data_key.wrapped}${_b64encode(nonce + ciphertext)}"
+
+    def decrypt(self, value: str) -> str:
+        try:
+            key_id, wrapped, payload = value[len(ENVELOPE_PREFIX):].split("$")
+        except ValueError:
+            raise DecryptionError("Malformed encrypted value")
+        data_key = self.data_keys.get(wrapped)
+        if data_key is None:
+            data_key = self.kms.decrypt_data_key(wrapped, key_id)
+            self.data_keys.set(wrapped, data_key, self.config["DATA_KEY_CACHE_TTL"])
+        raw = _b64decode(payload)
+        try:
+            return AESGCM(data_key).decrypt(raw[:12], raw[12:], None).decode()
+        except InvalidTag:
+            raise DecryptionError("Encrypted value failed authentication")
+
+    def key_id_of(self, value: str) -> str | None:
+        """Master key id an envelope was written under; None for plaintext."""
+        if not self.is_encrypted(value):
+            return None
+        return value[len(ENVELOPE_PREFIX):].split("$", 1)[0]
+
+
+_encryptor = None
+_encryptor_lock = threading.Lock()
+
+
+def get_encryptor() -> EnvelopeEncryptor:
+    global _encryptor
+    if _encryptor is None:
+        with _encryptor_lock:
+            if _encryptor is None:
+                _encryptor = EnvelopeEncryptor()
+    return _encryptor
+
+
+class EncryptedCharField(models.CharField):
+    """
+    ``CharField`` stored as an envelope (see ``EnvelopeEncryptor``) and
+    decrypted on load. ``max_length`` is the column size, which must leave
+    room for the envelope (about 180 characters plus 4/3 of the plaintext).
+
+    Rows written before the field was encrypted are read back as they are
+    and encrypted on their next save, or by ``rotate_encryption_keys``.
+    Every save produces a different ciphertext, so the field cannot be
+    filtered on or made unique.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("max_length", 1024)
+        super().__init__(*args, **kwargs)
+
+    def from_db_value(self, value, expression, connection):
+        if EnvelopeEncryptor.is_encrypted(value):
+            return get_encryptor().decrypt(value)
+        return value
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is None or value == "" or EnvelopeEncryptor.is_encrypted(value):
+            return value
+        return get_encryptor().encrypt(value)
@@ -0,0 +1,335 @@
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from requests import Session
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, HTTPError, RequestException, Timeout
+
+from infrastructure.circuit_breaker import get_breaker_registry
+from infrastructure.rate_limiter import get_rate_limiter, parse_retry_after
+
+log = logging.getLogger("my_logger")
+
+
+DEFAULT_POOL_CONFIG = {
+    # Number of distinct hosts a provider session keeps connection pools for.
+    "POOL_CONNECTIONS": 4,
+    # Keep-alive connections retained per host.
+    "POOL_MAXSIZE": 20,
+    # When True, callers wait for a free connection instead of opening an
+    # extra (non-pooled) one once POOL_MAXSIZE connections are busy.
+    "POOL_BLOCK": False,
+    # Transport level retries (connection errors only). Retrying payment
+    # calls is the failover layer's job, so this stays at 0.
+    "MAX_RETRIES": 0,
+    # Upper bound on concurrent connections per event loop for the async
+    # transport; further calls wait for a free connection.
+    "ASYNC_MAX_CONNECTIONS": 200,
+}
+
+
+def get_pool_config(provider: str) -> dict:
+    """
+    Resolve the pool configuration for a provider.
+
+    Values come from ``settings.PROVIDER_HTTP_POOLS``: the ``"default"`` entry
+    applies to every provider and a provider-specific entry overrides it.
+    """
+    pools = getattr(settings, "PROVIDER_HTTP_POOLS", {}) or {}
+    config = dict(DEFAULT_POOL_CONFIG)
+    config.update(pools.get("default", {}))
+    config.update(pools.get(provider, {}))
+    return config
+
+
+_deadline = contextvars.ContextVar("provider_request_deadline", default=None)
+
+
+class DeadlineExceeded(Timeout):
+    """Raised when the caller's request budget ran out before the call was sent."""
+
+
+@contextmanager
+def request_deadline(seconds: float):
+    """
+    Cap every provider call made inside the block to ``seconds`` from now.
+
+    Nested deadlines can only shorten the budget, never extend it.
+    """
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_budget() -> float | None:
+    """Seconds left before the active deadline, or None when no deadline is set."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def resolve_timeout(timeout):
+    """
+    Shrink a connector's configured timeout to fit the active deadline.
+    """
+    remaining = remaining_budget()
+    if remaining is None:
+        return timeout
+    if remaining <= 0:
+        raise DeadlineExceeded("Request timed out: deadline exceeded before sending")
+    if timeout is None:
+        return remaining
+    if isinstance(timeout, tuple):
+        return tuple(min(part, remaining) if part is not None else remaining for part in timeout)
+    return min(timeout, remaining)
+
+
+class ProviderTransport:
+    """
+    Connection-pooled HTTP transport shared by every client of one provider.
+
+    All Paystack, Flutterwave and Nomba sub-clients of a process share one
+    ``requests.Session`` per provider, so TCP/TLS connections are reused
+    across calls instead of being opened per request.
+    """
+
+    def __init__(self, provider: str, config: dict | None = None):
+        self.provider = provider
+        self.config = config or get_pool_config(provider)
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _build_session(self) -> Session:
+        adapter = HTTPAdapter(
+            pool_connections=self.config["POOL_CONNECTIONS"],
+            pool_maxsize=self.config["POOL_MAXSIZE"],
+            pool_block=self.config["POOL_BLOCK"],
+            max_retries=self.config["MAX_RETRIES"],
+        )
+        session = Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        log.info(
+            "Created %s HTTP pool (maxsize=%s, block=%s) in pid %s",
+            self.provider,
+            self.config["POOL_MAXSIZE"],
+            self.config["POOL_BLOCK"],
+            os.getpid(),
+        )
+        return session
+
+    @property
+    def session(self) -> Session:
+        # Sockets must never be shared across a fork (e.g. gunicorn --preload),
+        # so a child process lazily builds its own session.
+        pid = os.getpid()
+        if self._session is None or self._pid != pid:
+            with self._lock:
+                if self._session is None or self._pid != pid:
+                    self._session = self._build_session()
+                    self._pid = pid
+        return self._session
+
+    def request(self, method: str, url: str, family: str = "other", **kwargs):
+        """
+        Send a request through the pooled session (same signature as ``requests.request``).
+
+        ``family`` selects the circuit breaker (``<provider>:<family>``) that
+        guards the call; an open breaker raises ``CircuitOpenError`` without
+        touching the network. 5xx responses and network errors count as failures.
+
+        Calls are paced to the provider's outbound quota first: the caller may
+        wait for a slot (never past the active deadline) or get
+        ``RateLimitExceeded``. A 429 pauses the whole provider for Retry-After.
+        """
+        limiter = get_rate_limiter()
+        wait = limiter.reserve_provider(self.provider, max_wait=remaining_budget())
+        if wait > 0:
+            time.sleep(wait)
+        kwargs["timeout"] = resolve_timeout(kwargs.get("timeout"))
+        breaker = get_breaker_registry().get(self.provider, family)
+        breaker.before_call()
+
+        started = time.monotonic()
+        try:
+            response = self.session.request(method=method, url=url, **kwargs)
+        except RequestException:
+            breaker.record(False, time.monotonic() - started)
+            raise
+        breaker.record(response.status_code < 500, time.monotonic() - started)
+        if response.status_code == 429:
+            limiter.penalize_provider(self.provider, parse_retry_after(response.headers.get("Retry-After")))
+        return response
+
+    def post(self, url: str, family: str = "other", **kwargs):
+        return self.request("POST", url, family=family, **kwargs)
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+            self._pid = None
+
+
+_transports: dict[str, ProviderTransport] = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(provider: str) -> ProviderTransport:
+    """
+    Return the process-wide transport for ``provider``, creating it on first use.
+    """
+    transport = _transports.get(provider)
+    if transport is None:
+        with _transports_lock:
+            transport = _transports.get(provider)
+            if transport is None:
+                transport = ProviderTransport(provider)
+                _transports[provider] = transport
+    return transport
+
+
+def close_transports():
+    """Close every pooled session (used on shutdown and by benchmarks)."""
+    with _transports_lock:
+        for transport in _transports.values():
+            transport.close()
+        _transports.clear()
+
+
+def raise_for_status(response):
+    """
+    Raise ``requests.HTTPError`` for a 4xx/5xx response.
+
+    Works for both ``requests`` and ``httpx`` responses, so connectors keep a
+    single error-handling path for their sync and async variants.
+    """
+    if response.status_code >= 400:
+        raise HTTPError(f"{response.status_code} Error for url: {response.url}", response=response)
+
+
+def _httpx_timeout(timeout):
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+def _off_loop(func):
+    # Cache round trips (Redis in production) must not block the event loop;
+    # none of these touch the database, so any worker thread will do.
+    return sync_to_async(func, thread_sensitive=False)
+
+
+class AsyncProviderTransport:
+    """
+    asyncio counterpart of ``ProviderTransport`` built on ``httpx.AsyncClient``.
+
+    httpx pools are bound to the event loop that created them, so one client
+    is kept per loop. Deadlines, rate limits and circuit breakers apply
+    exactly as for the sync transport. Their bookkeeping reads and writes the
+    shared cache, so it runs in worker threads rather than on the loop.
+    httpx network errors are re-raised as the equivalent ``requests``
+    exceptions so callers and error classification see the same types.
+    """
+
+    def __init__(self, provider: str, config: dict | None = None):
+        self.provider = provider
+        self.config = config or get_pool_config(provider)
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _build_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self.config["ASYNC_MAX_CONNECTIONS"],
+            max_keepalive_connections=self.config["POOL_MAXSIZE"],
+        )
+        log.info(
+            "Created %s async HTTP pool (max_connections=%s) in pid %s",
+            self.provider,
+            self.config["ASYNC_MAX_CONNECTIONS"],
+            os.getpid(),
+        )
+        return httpx.AsyncClient(limits=limits)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._build_client()
+            self._clients[loop] = client
+        return client
+
+    async def request(self, method: str, url: str, family: str = "other", **kwargs):
+        limiter = get_rate_limiter()
+        wait = await _off_loop(limiter.reserve_provider)(self.provider, max_wait=remaining_budget())
+        if wait > 0:
+            await asyncio.sleep(wait)
+        timeout = resolve_timeout(kwargs.pop("timeout", None))
+        breaker = get_breaker_registry().get(self.provider, family)
+        await _off_loop(breaker.before_call)()
+
+        started = time.monotonic()
+        try:
+            response = await self.client.request(method, url, timeout=_httpx_timeout(timeout), **kwargs)
+        except httpx.TimeoutException as e:
+            await _off_loop(breaker.record)(False, time.monotonic() - started)
+            raise Timeout(str(e) or "Request timed out") from e
+        except httpx.TransportError as e:
+            await _off_loop(breaker.record)(False, time.monotonic() - started)
+            raise ConnectionError(str(e)) from e
+        await _off_loop(breaker.record)(response.status_code < 500, time.monotonic() - started)
+        if response.status_code == 429:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            await _off_loop(limiter.penalize_provider)(self.provider, retry_after)
+        return response
+
+    async def post(self, url: str, family: str = "other", **kwargs):
+        return await self.request("POST", url, family=family, **kwargs)
+
+    async def close(self):
+        """Close the client of the running loop."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+_async_transports: dict[str, AsyncProviderTransport] = {}
+
+
+def get_async_transport(provider: str) -> AsyncProviderTransport:
+    """
+    Return the process-wide async transport for ``provider``.
+    """
+    transport = _async_transports.get(provider)
+    if transport is None:
+        with _transports_lock:
+            transport = _async_transports.get(provider)
+            if transport is None:
+                transport = AsyncProviderTransport(provider)
+                _async_transports[provider] = transport
+    return transport
+
+
+async def close_async_transports():
+    """Close the async clients bound to the running loop."""
+    for transport in list(_async_transports.values()):
+        await transport.close()
@@ -0,0 +1,330 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from datetime import timedelta
+from typing import Any, Callable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+log = logging.getLogger("my_logger")
+
+
+DEFAULT_IDEMPOTENCY_CONFIG = {
+    # Fast tier: a Django cache (point it at Redis so all workers share it).
+    "CACHE_ALIAS": "default",
+    # How long a completed response is replayed for the same key.
+    "TTL_SECONDS": 24 * 60 * 60,
+    # Completed responses are kept in the cache for at most this long; older
+    # replays are served from the database.
+    "CACHE_TTL_SECONDS": 60 * 60,
+    # Lease on an in-progress claim. A claim older than this belongs to a
+    # worker that died mid-request and may be taken over.
+    "LOCK_SECONDS": 60,
+    # How long a duplicate waits for the first request before giving up.
+    "WAIT_TIMEOUT": 30.0,
+    "POLL_INTERVAL": 0.05,
+    "MAX_POLL_INTERVAL": 1.0,
+}
+
+MAX_KEY_LENGTH = 255
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+def get_idempotency_config() -> dict:
+    config = dict(DEFAULT_IDEMPOTENCY_CONFIG)
+    config.update(getattr(settings, "IDEMPOTENCY", {}) or {})
+    return config
+
+
+def fingerprint(data) -> str:
+    """Stable hash of the request payload, used to detect key reuse."""
+    encoded = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class IdempotencyConflict(Exception):
+    """The key was already used for a request with a different payload."""
+
+
+class IdempotencyInProgress(Exception):
+    """The first request with this key is still running after WAIT_TIMEOUT."""
+
+    def __init__(self, message: str = "A request with this idempotency key is still in progress",
+                 retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class IdempotencyFailed(Exception):
+    """The first request with this key failed and its failure was kept (``keep_failures``)."""
+
+
+class IdempotencyStore:
+    """
+    Two-tier idempotency-key store.
+
+    A request is identified by ``(scope, key)``; the scope carries the owner
+    (merchant, user) so keys never collide across tenants.
+
+    - Fast tier (Django cache): completed responses and a short claim lock,
+      so retries and concurrent duplicates are answered without touching
+      Postgres or the provider.
+    - Durable tier (``IdempotencyRecord``): the unique (scope, key) row is the
+      source of truth and survives cache eviction and restarts.
+
+    Duplicates inside one process wait on an ``Event`` set by the first
+    thread; duplicates in other processes poll with backoff until the result
+    is stored or ``WAIT_TIMEOUT`` passes.
+    """
+
+    def __init__(self, config: dict | None = None):
+        self.config = config or get_idempotency_config()
+        self.cache = caches[self.config["CACHE_ALIAS"]]
+        self._inflight: dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _cache_key(scope, key, suffix):
+        digest = hashlib.sha256(f"{scope}\x00{key}".encode()).hexdigest()
+        return f"idem:{digest}:{suffix}"
+
+    @staticmethod
+    def _normalize(value):
+        # Store and replay exactly what a JSONField round trip gives back.
+        return json.loads(json.dumps(value, cls=DjangoJSONEncoder))
+
+    def run(
+        self,
+        scope: str,
+        key: str,
+        fingerprint_data,
+        func: Callable[[], Any],
+        should_store: Callable[[Any], bool] | None = None,
+        keep_failures: bool = False,
+    ) -> tuple[Any, bool]:
+        """
+        Run ``func`` at most once per ``(scope, key)``.
+
+        Returns ``(value, replayed)``. A stored value is returned in its JSON
+        form, so the first caller and later replays see identical data.
+        Results rejected by ``should_store`` (and exceptions) release the key,
+        letting the client retry.
+
+        With ``keep_failures`` an exception is stored instead and the key
+        stays taken: replays raise ``IdempotencyFailed`` without calling
+        ``func`` again. For calls that may have had an effect even though
+        they failed, such as a transfer that timed out.
+        """
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise ValueError(f"Idempotency key must be 1-{MAX_KEY_LENGTH} characters")
+
+        request_hash = fingerprint(fingerprint_data)
+        local_key = self._cache_key(scope, key, "local")
+        deadline = time.monotonic() + self.config["WAIT_TIMEOUT"]
+        delay = self.config["POLL_INTERVAL"]
+
+        while True:
+            cached = self._get_cached(scope, key, request_hash)
+            if cached is not None:
+                return cached[0], True
+
+            with self._lock:
+                event = self._inflight.get(local_key)
+                leader = event is None
+                if leader:
+                    event = threading.Event()
+                    self._inflight[local_key] = event
+
+            if not leader:
+                # Another thread here already owns this key; let it do the work.
+                if not event.wait(max(deadline - time.monotonic(), 0)):
+                    raise IdempotencyInProgress(retry_after=self.config["POLL_INTERVAL"])
+                continue
+
+            try:
+                return self._run_as_leader(scope, key, request_hash, func, should_store, keep_failures, deadline, delay)
+            finally:
+                with self._lock:
+                    self._inflight.pop(local_key, None)
+                event.set()
+
+    def _run_as_leader(self, scope, key, request_hash, func, should_store, keep_failures, deadline, delay):
+        while True:
+            outcome, payload = self._claim(scope, key, request_hash)
+            if outcome == "replay":
+                return payload, True
+            if outcome == "claimed":
+                return self._execute(scope, key, request_hash, payload, func, should_store, keep_failures), False
+
+            if time.monotonic() + delay > deadline:
+                raise IdempotencyInProgress(retry_after=delay)
+            time.sleep(delay)
+            delay = min(delay * 2, self.config["MAX_POLL_INTERVAL"])
+
+            cached = self._get_cached(scope, key, request_hash)
+            if cached is not None:
+                return cached[0], True
+
+    def _get_cached(self, scope, key, request_hash):
+        entry = self.cache.get(self._cache_key(scope, key, "result"))
+        if entry is None:
+            return None
+        if entry["hash"] != request_hash:
+            raise IdempotencyConflict("Idempotency key was already used with a different request")
+        if entry.get("status") == FAILED:
+            raise IdempotencyFailed(entry["response"]["message"])
+        return (entry["response"],)
+
+    def _set_cached(self, scope, key, request_hash, response, status=COMPLETED):
+        self.cache.set(
+            self._cache_key(scope, key, "result"),
+            {"hash": request_hash, "response": response, "status": status},
+            min(self.config["TTL_SECONDS"], self.config["CACHE_TTL_SECONDS"]),
+        )
+
+    def _claim(self, scope, key, request_hash):
+        """
+        Try to become the one request allowed to run for this key.
+
+        Returns ``("claimed", (token, record))``, ``("replay", response)`` or
+        ``("busy", None)``.
+        """
+        lock_key = self._cache_key(scope, key, "lock")
+        token = uuid.uuid4().hex
+        if not self.cache.add(lock_key, token, self.config["LOCK_SECONDS"]):
+            return "busy", None
+
+        try:
+            outcome, payload = self._claim_durable(scope, key, request_hash)
+        except Exception:
+            self._release_lock(lock_key, token)
+            raise
+        if outcome != "claimed":
+            self._release_lock(lock_key, token)
+            return outcome, payload
+        return outcome, (token, payload)
+
+    def _claim_durable(self, scope, key, request_hash):
+        from transactions.models import IdempotencyRecord
+
+        now = timezone.now()
+        locked_until = now + timedelta(seconds=self.config["LOCK_SECONDS"])
+        expires_at = now + timedelta(seconds=self.config["TTL_SECONDS"])
+        try:
+            with transaction.atomic():
+                record = IdempotencyRecord.objects.create(
+                    scope=scope,
+                    key=key,
+                    request_hash=request_hash,
+                    status=IN_PROGRESS,
+                    locked_until=locked_until,
+                    expires_at=expires_at,
+                )
+            return "claimed", record
+        except IntegrityError:
+            pass
+
+        record = IdempotencyRecord.objects.filter(scope=scope, key=key).first()
+        if record is None:
+            # Purged between the insert and the read; try again.
+            return "busy", None
+
+        if record.expires_at > now:
+            if record.request_hash != request_hash:
+                raise IdempotencyConflict("Idempotency key was already used with a different request")
+            if record.status == COMPLETED:
+                self._set_cached(scope, key, request_hash, record.response)
+                return "replay", record.response
+            if record.status == FAILED:
+                self._set_cached(scope, key, request_hash, record.response, FAILED)
+                raise IdempotencyFailed(record.response["message"])
+            if record.locked_until > now:
+                return "busy", None
+            log.warning(f"Taking over abandoned idempotency claim {scope}:{key}")
+
+        # Expired or abandoned: take it over only if nobody else did first.
+        taken = IdempotencyRecord.objects.filter(
+            pk=record.pk, status=record.status, locked_until=record.locked_until
+        ).update(
+            request_hash=request_hash,
+            status=IN_PROGRESS,
+            response=None,
+            locked_until=locked_until,
+            expires_at=expires_at,
+        )
+        if not taken:
+            return "busy", None
+        record.request_hash = request_hash
+        record.status = IN_PROGRESS
+        return "claimed", record
+
+    def _execute(self, scope, key, request_hash, claim, func, should_store, keep_failures=False):
+        from transactions.models import IdempotencyRecord
+
+        token, record = claim
+        lock_key = self._cache_key(scope, key, "lock")
+        try:
+            value = func()
+        except BaseException as e:
+            if keep_failures and isinstance(e, Exception):
+                response = {"message": str(e)}
+                IdempotencyRecord.objects.filter(pk=record.pk).update(status=FAILED, response=response)
+                self._set_cached(scope, key, request_hash, response, FAILED)
+            else:
+                IdempotencyRecord.objects.filter(pk=record.pk, status=IN_PROGRESS).delete()
+            self._release_lock(lock_key, token)
+            raise
+
+        if should_store is not None and not should_store(value):
+            IdempotencyRecord.objects.filter(pk=record.pk, status=IN_PROGRESS).delete()
+            self._release_lock(lock_key, token)
+            return value
+
+        response = self._normalize(value)
+        IdempotencyRecord.objects.filter(pk=record.pk).update(status=COMPLETED, response=response)
+        self._set_cached(scope, key, request_hash, response)
+        self._release_lock(lock_key, token)
+        return response
+
+    def _release_lock(self, lock_key, token):
+        # Only drop the lock if it is still ours (it may have expired and
+        # been re-acquired by another worker).
+        if self.cache.get(lock_key) == token:
+            self.cache.delete(lock_key)
+
+    def purge_expired(self, batch_size: int = 1000) -> int:
+        """Delete expired records in batches; returns the number removed."""
+        from transactions.models import IdempotencyRecord
+
+        removed = 0
+        while True:
+            ids = list(
+                IdempotencyRecord.objects.filter(expires_at__lt=timezone.now())
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not ids:
+                return removed
+            removed += IdempotencyRecord.objects.filter(pk__in=ids).delete()[0]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = IdempotencyStore()
+    return _store
@@ -0,0 +1,327 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+log = logging.getLogger("my_logger")
+
+
+DEFAULT_ID_CONFIG = {
+    # Allocates the numeric merchant and profile ids.
+    "ALLOCATOR": "infrastructure.ids.BlockAllocator",
+    # Snowflake epoch (ms since 1970); references count from here.
+    "SNOWFLAKE_EPOCH_MS": 1767225600000,  # 2026-01-01T00:00:00Z
+    # Fixed worker id (0..1023), which must then differ for every process;
+    # by default each process leases one from the snowflake_worker sequence
+    # on first use, and fails if it cannot.
+    "SNOWFLAKE_WORKER_ID": None,
+}
+
+# Holds the sequences on databases other than Postgres: one row per name with
+# the next value to hand out.
+SEQUENCE_TABLE = "ids_sequence"
+
+# Values handed out per database round trip; it is also the increment of the
+# Postgres sequences, so changing it needs ALTER SEQUENCE ... INCREMENT BY.
+BLOCK_SIZE = 100
+
+# name: (start, max value, increment). Account ids are 9 sequence digits plus
+# a check digit, so they never collide with the 9-digit random ids issued
+# before; the worker sequence hands out snowflake worker ids.
+SEQUENCES = {
+    "merchant_id": (100_000_000, 999_999_999, BLOCK_SIZE),
+    "profile_id": (100_000_000, 999_999_999, BLOCK_SIZE),
+    "snowflake_worker": (0, None, 1),
+}
+
+CROCKFORD_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+
+def get_id_config() -> dict:
+    config = dict(DEFAULT_ID_CONFIG)
+    config.update(getattr(settings, "IDS", {}) or {})
+    return config
+
+
+def sequence_name(name: str) -> str:
+    return f"ids_{name}"
+
+
+def create_sequences(schema_editor):
+    """
+    Create the ``SEQUENCES``: Postgres sequences, or rows of ``SEQUENCE_TABLE``
+    on other databases. Safe to run again. For use from a migration.
+    """
+    connection_ = schema_editor.connection
+    if connection_.vendor != "postgresql":
+        _create_sequence_table(connection_)
+        return
+    quote = connection_.ops.quote_name
+    with connection_.cursor() as cursor:
+        for name, (start, max_value, increment) in SEQUENCES.items():
+            # The last block must start early enough to end within max_value.
+            limit = f"MAXVALUE {max_value - increment + 1}" if max_value else "NO MAXVALUE"
+            cursor.execute(
+                f"CREATE SEQUENCE IF NOT EXISTS {quote(sequence_name(name))} "
+                f"START WITH {start} INCREMENT BY {increment} MINVALUE {start} {limit}"
+            )
+
+
+def drop_sequences(schema_editor):
+    connection_ = schema_editor.connection
+    quote = connection_.ops.quote_name
+    if connection_.vendor != "postgresql":
+        with connection_.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {quote(SEQUENCE_TABLE)}")
+        return
+    with connection_.cursor() as cursor:
+        for name in SEQUENCES:
+            cursor.execute(f"DROP SEQUENCE IF EXISTS {quote(sequence_name(name))}")
+
+
+def _create_sequence_table(connection_):
+    table = connection_.ops.quote_name(SEQUENCE_TABLE)
+    with connection_.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (name varchar(64) NOT NULL PRIMARY KEY, next_value bigint NOT NULL)"
+        )
+        cursor.execute(f"SELECT name FROM {table}")
+        existing = {row[0] for row in cursor.fetchall()}
+        for name, (start, _, _) in SEQUENCES.items():
+            if name not in existing:
+                cursor.execute(f"INSERT INTO {table} (name, next_value) VALUES (%s, %s)", [name, start])
+
+
+# -- check digits --------------------------------------------------------------
+
+
+def luhn_check_character(value: str, alphabet: str = "0123456789") -> str:
+    """Luhn mod N check character for ``value`` (digits by default)."""
+    n = len(alphabet)
+    total = 0
+    factor = 2
+    for char in reversed(value):
+        addend = factor * alphabet.index(char)
+        total += addend // n + addend % n
+        factor = 1 if factor == 2 else 2
+    return alphabet[(n - total % n) % n]
+
+
+def has_valid_check_character(value: str, alphabet: str = "0123456789") -> bool:
+    """Whether the last character of ``value`` is its Luhn mod N check character."""
+    if len(value) < 2 or any(char not in alphabet for char in value):
+        return False
+    return luhn_check_character(value[:-1], alphabet) == value[-1]
+
+
+# -- numeric sequences ---------------------------------------------------------
+
+
+class BlockAllocator:
+    """
+    Sequence numbers from Postgres sequences, reserved ``BLOCK_SIZE`` at a
+    time and handed out from memory, so most ids cost no query and none
+    needs an existence check.
+
+    ``nextval`` is not rolled back with the caller's transaction, so a block
+    is never handed out twice; the price is a gap for each block a process
+    exits without using up. The blocks a process holds are discarded in a
+    forked child.
+
+    Other databases (SQLite in development and tests) count in
+    ``SEQUENCE_TABLE`` instead. That update is rolled back with the caller's
+    transaction, so a block reserved inside one is used for a single value
+    and the rest is skipped.
+    """
+
+    def __init__(self):
+        self._blocks = {}
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reset_in_child)
+
+    def _reset_in_child(self):
+        # The parent keeps handing out its blocks.
+        self._blocks = {}
+        self._lock = threading.Lock()
+
+    def next_value(self, name: str) -> int:
+        with self._lock:
+            block = self._blocks.get(name)
+            if block is None or block[0] >= block[1]:
+                durable = connection.vendor == "postgresql" or not connection.in_atomic_block
+                start = self._reserve(name)
+                block = [start, start + SEQUENCES[name][2]]
+                if durable:
+                    self._blocks[name] = block
+                else:
+                    self._blocks.pop(name, None)
+            value = block[0]
+            block[0] += 1
+            return value
+
+    @staticmethod
+    def _reserve(name: str) -> int:
+        if connection.vendor != "postgresql":
+            return BlockAllocator._reserve_from_table(name)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT nextval(%s)", [sequence_name(name)])
+            return cursor.fetchone()[0]
+
+    @staticmethod
+    def _reserve_from_table(name: str) -> int:
+        _, max_value, increment = SEQUENCES[name]
+        table = connection.ops.quote_name(SEQUENCE_TABLE)
+        # The update locks the row (the database, on SQLite) until commit, so
+        # concurrent reservations get consecutive blocks.
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"UPDATE {table} SET next_value = next_value + %s WHERE name = %s", [increment, name])
+            cursor.execute(f"SELECT next_value FROM {table} WHERE name = %s", [name])
+            row = cursor.fetchone()
+            if row is None:
+                raise ImproperlyConfigured(f"Sequence {name} is missing; run the migrations (create_sequences())")
+            start = row[0] - increment
+            if max_value and start + increment - 1 > max_value:
+                raise ImproperlyConfigured(f"Sequence {name} is exhausted")
+            return start
+
+
+_allocator = None
+_allocator_lock = threading.Lock()
+
+
+def get_id_allocator():
+    global _allocator
+    if _allocator is None:
+        with _allocator_lock:
+            if _allocator is None:
+                _allocator = import_string(get_id_config()["ALLOCATOR"])()
+    return _allocator
+
+
+def new_account_id(name: str) -> str:
+    """A 10-digit id (9 sequence digits and a Luhn check digit) from sequence ``name``."""
+    digits = str(get_id_allocator().next_value(name))
+    return digits + luhn_check_character(digits)
+
+
+# -- snowflake references ------------------------------------------------------
+
+
+class SnowflakeGenerator:
+    """
+    64-bit, time-ordered ids: 41 bits of milliseconds since the epoch, 10 bits
+    of worker id and a 12-bit per-millisecond sequence (4096 ids per ms per
+    worker). Generated in memory; unique as long as no two live processes
+    share a worker id.
+
+    If the clock steps back, or a millisecond's sequence runs out, ids keep
+    counting from the last millisecond used rather than waiting, so they
+    stay unique and increasing.
+    """
+
+    def __init__(self, epoch_ms: int, worker_id: int | None = None):
+        if worker_id is not None and not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ImproperlyConfigured(f"IDS['SNOWFLAKE_WORKER_ID'] must be between 0 and {MAX_WORKER_ID}")
+        self.epoch_ms = epoch_ms
+        self._fixed_worker_id = worker_id
+        self._worker_id = worker_id
+        self._last_ms = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reset_in_child)
+
+    def _reset_in_child(self):
+        # A child sharing the parent's worker id would repeat its ids.
+        self._worker_id = self._fixed_worker_id
+        self._last_ms = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _lease_worker_id() -> int:
+        # Worker ids come round again after 1024 leases; that only matters if
+        # a process from 1024 leases ago is still running.
+        def lease():
+            try:
+                return get_id_allocator().next_value("snowflake_worker") & MAX_WORKER_ID
+            finally:
+                connection.close()
+
+        try:
+            # In a thread of its own: the first reference may be made on an
+            # event loop, where the ORM cannot be used.
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                return pool.submit(lease).result()
+        except Exception as e:
+            # A made-up worker id could be live in another process, which
+            # would then hand out the same references.
+            raise ImproperlyConfigured(
+                f"Could not lease a snowflake worker id ({e}); "
+                "set IDS['SNOWFLAKE_WORKER_ID'] to a value unique to this process"
+            ) from e
+
+    @property
+    def worker_id(self) -> int:
+        if self._worker_id is None:
+            self._worker_id = self._lease_worker_id()
+        return self._worker_id
+
+    def next_id(self) -> int:
+        worker_id = self.worker_id
+        with self._lock:
+            now = int(time.time() * 1000) - self.epoch_ms
+            if now > self._last_ms:
+                self._last_ms = now
+                self._sequence = 0
+            elif self._sequence < MAX_SEQUENCE:
+                self._sequence += 1
+            else:
+                self._last_ms += 1
+                self._sequence = 0
+            return (self._last_ms << (WORKER_BITS + SEQUENCE_BITS)) | (worker_id << SEQUENCE_BITS) | self._sequence
+
+    def timestamp(self, snowflake: int) -> datetime:
+        """When ``snowflake`` was generated."""
+        ms = (snowflake >> (WORKER_BITS + SEQUENCE_BITS)) + self.epoch_ms
+        return datetime.fromtimestamp(ms / 1000, tz=dt_timezone.utc)
+
+
+_snowflake = None
+_snowflake_lock = threading.Lock()
+
+
+def get_snowflake() -> SnowflakeGenerator:
+    global _snowflake
+    if _snowflake is None:
+        with _snowflake_lock:
+            if _snowflake is None:
+                config = get_id_config()
+                _snowflake = SnowflakeGenerator(config["SNOWFLAKE_EPOCH_MS"], config["SNOWFLAKE_WORKER_ID"])
+    return _snowflake
+
+
+def encode_snowflake(snowflake: int) -> str:
+    """13 Crockford base32 characters plus a check character; sorts like the number."""
+    chars = []
+    for _ in range(13):
+        chars.append(CROCKFORD_ALPHABET[snowflake & 31])
+        snowflake >>= 5
+    encoded = "".join(reversed(chars))
+    return encoded + luhn_check_character(encoded, CROCKFORD_ALPHABET)
+
+
+def new_reference(prefix: str) -> str:
+    """A globally unique, time-ordered reference such as ``PAY-06G2M0T9K8W00Q``."""
+    return f"{prefix}-{encode_snowflake(get_snowflake().next_id())}"
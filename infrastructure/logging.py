@@ -0,0 +1,211 @@
+import json
+import logging
+import os
+import queue
+import random
+import re
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+
+REDACTED = "[REDACTED]"
+
+# Keys whose values never reach a log file (compared case-insensitively).
+DEFAULT_REDACT_KEYS = frozenset({
+    "authorization", "password", "secret", "secret_key", "api_key", "token",
+    "access_token", "refresh_token", "client_secret", "pin", "otp", "cvv",
+    "card_number", "cardno", "expiry_month", "expiry_year", "bvn", "nin",
+})
+
+# Secrets embedded in free text (pre-formatted f-string messages).
+SECRET_PATTERNS = (
+    (re.compile(r"(Bearer\s+)[A-Za-z0-9._\-]+"), r"\1" + REDACTED),
+    (re.compile(r"\b((?:sk|pk|FLWSECK|FLWPUBK)[_-](?:test|live)?[_-]?)[A-Za-z0-9\-]{8,}"), r"\1" + REDACTED),
+)
+
+# Attributes every LogRecord has; anything else came from ``extra=``.
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def redact(value, keys=DEFAULT_REDACT_KEYS, depth: int = 0):
+    """Copy of ``value`` with sensitive dict keys masked, recursively."""
+    if depth > 8:
+        return value
+    if isinstance(value, dict):
+        return {
+            k: REDACTED if isinstance(k, str) and k.lower() in keys else redact(v, keys, depth + 1)
+            for k, v in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return type(value)(redact(v, keys, depth + 1) for v in value)
+    return value
+
+
+def redact_text(text: str) -> str:
+    for pattern, replacement in SECRET_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def render_message(record, keys=DEFAULT_REDACT_KEYS) -> str:
+    """``record``'s message with dict and list arguments redacted by key and secrets masked."""
+    message = str(record.msg)
+    if record.args:
+        args = record.args
+        if isinstance(args, dict):
+            args = redact(args, keys)
+        else:
+            args = tuple(redact(arg, keys) for arg in args)
+        try:
+            message = message % args
+        except (TypeError, ValueError):
+            message = f"{message} {args!r}"
+    return redact_text(message)
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    One JSON object per line: timestamp, level, logger, message, process,
+    thread, any ``extra=`` fields and the formatted exception.
+
+    The message is rendered here rather than by the caller, with dict and
+    list arguments and extra fields passed through ``redact`` first, so
+    behind a ``BackgroundHandler`` all of it runs on the listener thread.
+    """
+
+    def __init__(self, redact_keys=None, **kwargs):
+        super().__init__(**kwargs)
+        self.redact_keys = frozenset(k.lower() for k in redact_keys) if redact_keys else DEFAULT_REDACT_KEYS
+
+    def format(self, record) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": render_message(record, self.redact_keys),
+            "module": record.module,
+            "process": record.process,
+            "thread": record.thread,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = REDACTED if key.lower() in self.redact_keys else redact(value, self.redact_keys)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, cls=DjangoJSONEncoder, default=str)
+
+
+class RedactingFormatter(logging.Formatter):
+    """
+    Plain-text ``logging.Formatter`` (same ``fmt``/``style`` arguments) that
+    redacts like ``JSONFormatter``, for handlers that are read by people
+    rather than parsed. Tracebacks are masked too.
+    """
+
+    def __init__(self, *args, redact_keys=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.redact_keys = frozenset(k.lower() for k in redact_keys) if redact_keys else DEFAULT_REDACT_KEYS
+
+    def format(self, record) -> str:
+        # A copy: the record is shared with the other handlers.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = render_message(record, self.redact_keys)
+        record.args = None
+        return redact_text(super().format(record))
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of the routine (below WARNING) records from chosen
+    loggers, e.g. ``{"payments.flutterwave": 0.05}`` for success-path request
+    logs. Warnings and errors always pass. The longest matching logger
+    prefix wins; unlisted loggers are not sampled.
+    """
+
+    def __init__(self, rates: dict | None = None, max_level: str | int = logging.INFO):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self.max_level = logging._checkLevel(max_level)
+        self._resolved = {}
+
+    def rate_for(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            prefix = name
+            while prefix:
+                if prefix in self.rates:
+                    rate = float(self.rates[prefix])
+                    break
+                prefix = prefix.rpartition(".")[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record) -> bool:
+        if record.levelno > self.max_level:
+            return True
+        rate = self.rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class BackgroundHandler(QueueHandler):
+    """
+    Hands records to a ``QueueListener`` thread that owns the real handler
+    (``handler`` is its dotted class path, the remaining keyword arguments
+    its constructor's), so file and stream I/O and formatting never run on
+    the request path.
+
+    Records are queued as they are: the message is not rendered first, so
+    the caller pays for a queue put only. Arguments are therefore read
+    later, on the listener thread; do not log objects you mutate straight
+    afterwards. When the queue is full, records are dropped (and counted)
+    rather than blocking the caller.
+
+    The listener is restarted in forked children (Celery prefork, gunicorn).
+    """
+
+    def __init__(self, handler: str = "logging.StreamHandler", queue_size: int = 10_000, **kwargs):
+        self.target = import_string(handler)(**kwargs)
+        self.queue_size = queue_size
+        self.dropped = 0
+        super().__init__(queue.Queue(queue_size))
+        self.listener = None
+        self._start()
+        os.register_at_fork(after_in_child=self._restart_in_child)
+
+    def _start(self):
+        self.listener = QueueListener(self.queue, self.target, respect_handler_level=True)
+        self.listener.start()
+
+    def _restart_in_child(self):
+        # The parent's listener thread does not exist after fork.
+        if self.listener is None:
+            return
+        self.queue = queue.Queue(self.queue_size)
+        self._start()
+
+    def setFormatter(self, fmt):
+        # Formatting happens on the listener thread, in the target handler.
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        self.target.close()
+        super().close()
+
@@ -0,0 +1,379 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+from requests.exceptions import HTTPError, RequestException, Timeout
+
+log = logging.getLogger("my_logger")
+
+
+DEFAULT_METRICS_CONFIG = {
+    # Each process writes its metrics to <DIR>/<pid>.json every
+    # FLUSH_INTERVAL seconds; /metrics sums the files of the processes still
+    # running, so all gunicorn workers (and Celery processes) show up in one
+    # scrape. Files of exited processes are deleted when read, so DIR must
+    # be private to one host (one pid namespace).
+    "DIR": os.path.join(tempfile.gettempdir(), "payinfra-metrics"),
+    "FLUSH_INTERVAL": 5.0,
+    # /metrics answers requests from ALLOWED_NETWORKS, and, when AUTH_TOKEN
+    # is set, requests with "Authorization: Bearer <AUTH_TOKEN>" from
+    # anywhere. REMOTE_ADDR is checked, so behind a proxy use the token.
+    "AUTH_TOKEN": None,
+    "ALLOWED_NETWORKS": ("127.0.0.0/8", "::1/128"),
+}
+
+# Seconds; covers fast cached lookups up to the 30s connector timeout.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def get_metrics_config() -> dict:
+    config = dict(DEFAULT_METRICS_CONFIG)
+    config.update(getattr(settings, "METRICS", {}) or {})
+    return config
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, registry, name: str, documentation: str, labelnames: tuple):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def inc(self, *labels, amount: float = 1.0):
+        values = self.registry.shard().setdefault(self.name, {})
+        values[labels] = values.get(labels, 0.0) + amount
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, registry, name: str, documentation: str, labelnames: tuple, buckets=LATENCY_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels):
+        values = self.registry.shard().setdefault(self.name, {})
+        series = values.get(labels)
+        if series is None:
+            # Per-bucket counts (not cumulative), then +Inf, sum.
+            series = values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+
+def merge_into(total: dict, values: dict):
+    """Add one ``{metric: {labels: value-or-series}}`` snapshot into ``total``."""
+    for name, series in values.items():
+        merged = total.setdefault(name, {})
+        for labels, value in series.items():
+            current = merged.get(labels)
+            if current is None:
+                merged[labels] = list(value) if isinstance(value, list) else value
+            elif isinstance(value, list):
+                for i, v in enumerate(value):
+                    current[i] += v
+            else:
+                merged[labels] = current + value
+
+
+class MetricsRegistry:
+    """
+    In-process counters and histograms without locks on the hot path.
+
+    Every thread records into its own shard (a plain dict only that thread
+    writes to), so ``inc``/``observe`` are a few dict operations under the
+    GIL. Reads sum the shards; shards of finished threads are folded into a
+    retired total so short-lived threads do not accumulate.
+
+    Processes share their numbers through snapshot files (see
+    ``DEFAULT_METRICS_CONFIG``), written by a daemon thread.
+    """
+
+    def __init__(self, config: dict | None = None):
+        self.config = config or get_metrics_config()
+        self.metrics = {}
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+        os.register_at_fork(after_in_child=self._reset_in_child)
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        with self._lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+    def shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            pass
+        shard = self._local.shard = {}
+        with self._lock:
+            self._shards.append((threading.current_thread(), shard))
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_forever, name="metrics-flusher", daemon=True)
+                self._flusher.start()
+        return shard
+
+    def snapshot(self) -> dict:
+        """This process's totals: ``{metric: {labels: value-or-series}}``."""
+        total = {}
+        with self._lock:
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    merge_into(self._retired, shard)
+            self._shards = live
+            merge_into(total, self._retired)
+        for _, shard in live:
+            # Copy first: the owning thread may add series meanwhile (each
+            # dict() copy is a single step under the GIL).
+            merge_into(total, {name: dict(series) for name, series in dict(shard).items()})
+        return total
+
+    # -- cross-process -----------------------------------------------------
+
+    def _path(self, pid: int | None = None) -> str:
+        return os.path.join(self.config["DIR"], f"{pid or os.getpid()}.json")
+
+    @staticmethod
+    def _is_running(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def flush(self):
+        directory = self.config["DIR"]
+        os.makedirs(directory, exist_ok=True)
+        data = {
+            name: [[list(labels), value] for labels, value in series.items()]
+            for name, series in self.snapshot().items()
+        }
+        partial = f"{self._path()}.partial"
+        with open(partial, "w") as f:
+            json.dump(data, f)
+        os.replace(partial, self._path())
+
+    def _flush_forever(self):
+        while True:
+            time.sleep(self.config["FLUSH_INTERVAL"])
+            try:
+                self.flush()
+            except Exception as e:
+                log.warning(f"Writing metrics snapshot failed: {e}")
+
+    def collect(self) -> dict:
+        """Totals across every process that wrote a snapshot, with this one live."""
+        total = self.snapshot()
+        own = self._path()
+        for path in glob.glob(os.path.join(self.config["DIR"], "*.json")):
+            if path == own:
+                continue
+            pid = os.path.basename(path).removesuffix(".json")
+            if pid.isdigit() and not self._is_running(int(pid)):
+                # An exited worker's counts would otherwise be summed forever.
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            merge_into(total, {
+                name: {tuple(labels): value for labels, value in series}
+                for name, series in data.items()
+            })
+        return total
+
+    def _reset_in_child(self):
+        # Counts recorded before the fork belong to the parent's file.
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    # -- exposition --------------------------------------------------------
+
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)."""
+        values = self.collect()
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for labels, value in sorted(values.get(name, {}).items()):
+                pairs = list(zip(metric.labelnames, labels))
+                if metric.kind == "counter":
+                    lines.append(f"{name}{_labels(pairs)} {_number(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + ("+Inf",), value):
+                    cumulative += count
+                    le = bound if bound == "+Inf" else _number(bound)
+                    lines.append(f"{name}_bucket{_labels(pairs + [('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(pairs)} {_number(value[-1])}")
+                lines.append(f"{name}_count{_labels(pairs)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry()
+    return _registry
+
+
+# -- provider calls ----------------------------------------------------------
+
+_provider_metrics = None
+
+
+def get_provider_metrics():
+    """``(requests_total, duration)`` for provider API calls."""
+    global _provider_metrics
+    if _provider_metrics is None:
+        registry = get_metrics_registry()
+        _provider_metrics = (
+            registry.counter(
+                "payinfra_provider_requests_total",
+                "Provider API calls by provider, endpoint family and outcome.",
+                ("provider", "endpoint", "outcome"),
+            ),
+            registry.histogram(
+                "payinfra_provider_request_duration_seconds",
+                "Provider API call latency, including response parsing.",
+                ("provider", "endpoint", "outcome"),
+            ),
+        )
+    return _provider_metrics
+
+
+_hedge_metrics = None
+
+
+def get_hedge_metrics():
+    """``(hedges_total, hedge_delay)`` for hedged requests (routing/hedging.py)."""
+    global _hedge_metrics
+    if _hedge_metrics is None:
+        registry = get_metrics_registry()
+        _hedge_metrics = (
+            registry.counter(
+                "payinfra_hedged_requests_total",
+                "Hedges fired by provider and outcome (won: the hedge answered first).",
+                ("provider", "outcome"),
+            ),
+            registry.histogram(
+                "payinfra_hedge_delay_seconds",
+                "How long the first call had run when its hedge was sent.",
+                ("provider",),
+            ),
+        )
+    return _hedge_metrics
+
+
+def classify_outcome(exc: BaseException | None) -> str:
+    if exc is None:
+        return "success"
+    from infrastructure.circuit_breaker import CircuitOpenError
+
+    if isinstance(exc, asyncio.CancelledError):
+        return "cancelled"
+    if isinstance(exc, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(exc, Timeout):
+        return "timeout"
+    if isinstance(exc, HTTPError):
+        status = getattr(exc.response, "status_code", None)
+        return f"http_{status // 100}xx" if status else "http_error"
+    if isinstance(exc, RequestException):
+        return "network_error"
+    return "api_error"
+
+
+_call_observers = []
+
+
+def add_call_observer(observer):
+    """
+    Also pass every observed provider call to ``observer(provider, endpoint,
+    outcome, seconds)``; it runs on the calling thread, so keep it cheap.
+    """
+    if observer not in _call_observers:
+        _call_observers.append(observer)
+
+
+@contextmanager
+def observe_provider_call(provider: str, endpoint: str):
+    """
+    Count and time one provider API call (sync or inside a coroutine).
+    ``endpoint`` should be the endpoint family, not the raw path, so the
+    number of series stays bounded.
+    """
+    requests_total, duration = get_provider_metrics()
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        outcome = classify_outcome(e)
+        raise
+    else:
+        outcome = "success"
+    finally:
+        elapsed = time.perf_counter() - started
+        requests_total.inc(provider, endpoint, outcome)
+        duration.observe(elapsed, provider, endpoint, outcome)
+        for observer in _call_observers:
+            try:
+                observer(provider, endpoint, outcome, elapsed)
+            except Exception as e:
+                log.warning(f"Provider call observer {observer!r} failed: {e}")
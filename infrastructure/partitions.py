@@ -0,0 +1,401 @@
+import base64
+import gzip
+import json
+import logging
+import os
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+
+log = logging.getLogger("my_logger")
+
+
+DAY = "day"
+MONTH = "month"
+
+DEFAULT_PARTITIONING_CONFIG = {
+    # Per model: the range-partition interval on ``created_at`` (None for a
+    # table that is only pruned), how many days of rows to keep, and whether
+    # rows are exported before they are dropped.
+    "TABLES": {
+        "transactions.WebhookLog": {"INTERVAL": DAY, "RETENTION_DAYS": 90, "ARCHIVE": True},
+        # Content-addressed, so it stays keyed on the digest alone and is
+        # pruned rather than partitioned (partitioning would widen the key).
+        "transactions.WebhookPayload": {"INTERVAL": None, "RETENTION_DAYS": 90, "ARCHIVE": True},
+        # Bounds the deduplication window; a redelivery older than this is
+        # treated as new.
+        "transactions.WebhookReceipt": {"INTERVAL": None, "RETENTION_DAYS": 30, "ARCHIVE": False},
+    },
+    # Partitions created ahead of time, in intervals, so inserts never wait
+    # on DDL.
+    "PREMAKE": 7,
+    # Archived partitions are written here as <table>/<partition>.jsonl.gz.
+    "ARCHIVE_DIR": "archive",
+    # Rows deleted per statement when pruning an unpartitioned table.
+    "BATCH_SIZE": 5000,
+}
+
+
+def get_partitioning_config() -> dict:
+    config = dict(DEFAULT_PARTITIONING_CONFIG)
+    config.update(getattr(settings, "LOG_PARTITIONING", {}) or {})
+    return config
+
+
+def floor_interval(moment: datetime, interval: str) -> datetime:
+    """Start (UTC midnight) of the ``interval`` containing ``moment``."""
+    moment = moment.astimezone(dt_timezone.utc)
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return start.replace(day=1) if interval == MONTH else start
+
+
+def next_interval(start: datetime, interval: str) -> datetime:
+    if interval == MONTH:
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+class ArchiveEncoder(DjangoJSONEncoder):
+    """JSON for archived rows; binary columns are written as base64."""
+
+    def default(self, o):
+        if isinstance(o, (bytes, memoryview)):
+            return base64.b64encode(bytes(o)).decode()
+        return super().default(o)
+
+
+class RowArchive:
+    """
+    Gzipped JSON Lines file of table rows, one object per row.
+
+    Written to a temporary name and renamed on ``close``, so a file under its
+    final name is always complete. The format reads directly into DuckDB,
+    pandas or ``zcat | jq`` for offline queries.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rows = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._partial = f"{path}.partial"
+        self._file = gzip.open(self._partial, "wt", encoding="utf-8")
+
+    def write(self, columns, rows):
+        for row in rows:
+            self._file.write(json.dumps(dict(zip(columns, row)), cls=ArchiveEncoder))
+            self._file.write("\n")
+            self.rows += 1
+
+    def close(self):
+        self._file.close()
+        os.replace(self._partial, self.path)
+
+    def abort(self):
+        self._file.close()
+        os.remove(self._partial)
+
+
+class PartitionedTable:
+    """
+    Retention for one log table.
+
+    On Postgres, a table partitioned by range on ``created_at`` (see
+    ``partition_existing_table``) gets one partition per day or month, named
+    ``<table>_pYYYYMMDD`` / ``<table>_pYYYYMM``, plus a ``<table>_default``
+    catch-all. Expiring data is then a matter of exporting and dropping whole
+    partitions: no bulk DELETE, no dead tuples to vacuum and no index bloat,
+    and hot inserts only touch the current partition's small indexes.
+
+    Tables without an interval, or not (yet) partitioned, are pruned with
+    batched deletes instead.
+    """
+
+    column = "created_at"
+
+    def __init__(self, model, interval: str | None, retention_days: int, archive: bool):
+        self.model = model
+        self.table = model._meta.db_table
+        self.interval = interval
+        self.retention = timedelta(days=retention_days)
+        self.archive = archive
+
+    # -- naming ------------------------------------------------------------
+
+    @property
+    def default_partition(self) -> str:
+        return f"{self.table}_default"
+
+    def partition_name(self, start: datetime) -> str:
+        suffix = start.strftime("%Y%m" if self.interval == MONTH else "%Y%m%d")
+        return f"{self.table}_p{suffix}"
+
+    def partition_start(self, name: str) -> datetime | None:
+        match = re.fullmatch(rf"{re.escape(self.table)}_p(\d{{6}}|\d{{8}})", name)
+        if not match:
+            return None
+        fmt = "%Y%m" if len(match.group(1)) == 6 else "%Y%m%d"
+        return datetime.strptime(match.group(1), fmt).replace(tzinfo=dt_timezone.utc)
+
+    # -- introspection -----------------------------------------------------
+
+    def is_partitioned(self) -> bool:
+        if connection.vendor != "postgresql" or not self.interval:
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [self.table]
+            )
+            return cursor.fetchone() is not None
+
+    def partitions(self) -> dict:
+        """``{start: name}`` of the attached range partitions."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass(%s)",
+                [self.table],
+            )
+            names = [row[0] for row in cursor.fetchall()]
+        found = {}
+        for name in names:
+            start = self.partition_start(name)
+            if start is not None:
+                found[start] = name
+        return found
+
+    # -- maintenance -------------------------------------------------------
+
+    def _lock(self):
+        # Serialize maintenance of this table across workers and beat runs.
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [f"partitions:{self.table}"])
+
+    def create_partition(self, start: datetime) -> str:
+        """
+        Create and attach the partition starting at ``start``. Rows that were
+        written to the default partition for that range are moved into it
+        first, so attaching never fails on them.
+        """
+        quote = connection.ops.quote_name
+        name = self.partition_name(start)
+        end = next_interval(start, self.interval)
+        lower, upper = start.isoformat(), end.isoformat()
+        with transaction.atomic(), connection.cursor() as cursor:
+            self._lock()
+            if start in self.partitions():
+                return name
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {quote(name)} "
+                f"(LIKE {quote(self.table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {quote(self.default_partition)} "
+                f"WHERE {quote(self.column)} >= %s AND {quote(self.column)} < %s RETURNING *) "
+                f"INSERT INTO {quote(name)} SELECT * FROM moved",
+                [start, end],
+            )
+            cursor.execute(
+                f"ALTER TABLE {quote(self.table)} ATTACH PARTITION {quote(name)} "
+                f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+            )
+        log.info(f"Created partition {name} [{lower}, {upper})")
+        return name
+
+    def ensure(self, now: datetime, ahead: int, since: datetime | None = None) -> list:
+        """Create any missing partitions from ``since`` (default: now) to ``ahead`` intervals out."""
+        existing = self.partitions()
+        start = floor_interval(since or now, self.interval)
+        last = floor_interval(now, self.interval)
+        for _ in range(ahead):
+            last = next_interval(last, self.interval)
+        created = []
+        while start <= last:
+            if start not in existing:
+                created.append(self.create_partition(start))
+            start = next_interval(start, self.interval)
+        return created
+
+    def expired(self, now: datetime) -> list:
+        """``(start, name)`` of partitions that lie entirely before the retention cutoff."""
+        cutoff = now - self.retention
+        return sorted(
+            (start, name) for start, name in self.partitions().items()
+            if next_interval(start, self.interval) <= cutoff
+        )
+
+    def archive_partition(self, name: str, directory: str) -> RowArchive:
+        """Stream a partition to ``<directory>/<table>/<name>.jsonl.gz``."""
+        quote = connection.ops.quote_name
+        archive = RowArchive(os.path.join(directory, self.table, f"{name}.jsonl.gz"))
+        try:
+            with transaction.atomic(), connection.chunked_cursor() as cursor:
+                cursor.execute(f"SELECT * FROM {quote(name)}")
+                columns = [column[0] for column in cursor.description]
+                while rows := cursor.fetchmany(2000):
+                    archive.write(columns, rows)
+        except Exception:
+            archive.abort()
+            raise
+        archive.close()
+        return archive
+
+    def drop_partition(self, name: str):
+        quote = connection.ops.quote_name
+        with transaction.atomic(), connection.cursor() as cursor:
+            self._lock()
+            cursor.execute(f"ALTER TABLE {quote(self.table)} DETACH PARTITION {quote(name)}")
+            cursor.execute(f"DROP TABLE {quote(name)}")
+        log.info(f"Dropped partition {name}")
+
+    def prune(self, now: datetime, directory: str, batch_size: int) -> int:
+        """Delete (and optionally archive) expired rows of an unpartitioned table."""
+        cutoff = now - self.retention
+        expired = self.model.objects.filter(**{f"{self.column}__lt": cutoff}).order_by("pk")
+        columns = [field.attname for field in self.model._meta.concrete_fields]
+        archive = None
+        if self.archive:
+            archive = RowArchive(
+                os.path.join(directory, self.table, f"{self.table}_before{cutoff:%Y%m%d%H%M%S}.jsonl.gz")
+            )
+        removed = 0
+        try:
+            while True:
+                rows = list(expired.values_list(*columns)[:batch_size])
+                if not rows:
+                    break
+                if archive:
+                    archive.write(columns, rows)
+                pk_index = columns.index(self.model._meta.pk.attname)
+                removed += self.model.objects.filter(pk__in=[row[pk_index] for row in rows]).delete()[0]
+        except Exception:
+            if archive:
+                archive.abort()
+            raise
+        if archive:
+            if archive.rows:
+                archive.close()
+            else:
+                archive.abort()
+        return removed
+
+    def maintain(self, now: datetime, config: dict, dry_run: bool = False) -> list:
+        """Run one retention pass; returns a description of each action taken."""
+        directory = str(config["ARCHIVE_DIR"])
+        if not self.is_partitioned():
+            if dry_run:
+                cutoff = now - self.retention
+                count = self.model.objects.filter(**{f"{self.column}__lt": cutoff}).count()
+                return [f"would delete {count} rows older than {cutoff:%Y-%m-%d}"] if count else []
+            removed = self.prune(now, directory, config["BATCH_SIZE"])
+            return [f"deleted {removed} rows"] if removed else []
+
+        actions = []
+        if dry_run:
+            existing = self.partitions()
+            start = floor_interval(now, self.interval)
+            for _ in range(config["PREMAKE"] + 1):
+                if start not in existing:
+                    actions.append(f"would create {self.partition_name(start)}")
+                start = next_interval(start, self.interval)
+            actions.extend(f"would drop {name}" for _, name in self.expired(now))
+            return actions
+
+        actions.extend(f"created {name}" for name in self.ensure(now, config["PREMAKE"]))
+        for _, name in self.expired(now):
+            if self.archive:
+                archive = self.archive_partition(name, directory)
+                actions.append(f"archived {archive.rows} rows of {name} to {archive.path}")
+            self.drop_partition(name)
+            actions.append(f"dropped {name}")
+        return actions
+
+
+def get_partitioned_tables(config: dict | None = None) -> list:
+    config = config or get_partitioning_config()
+    return [
+        PartitionedTable(
+            apps.get_model(label),
+            options.get("INTERVAL"),
+            options["RETENTION_DAYS"],
+            options.get("ARCHIVE", False),
+        )
+        for label, options in config["TABLES"].items()
+    ]
+
+
+def maintain_partitions(now: datetime | None = None, dry_run: bool = False) -> dict:
+    """Create upcoming partitions and expire old data for every configured table."""
+    config = get_partitioning_config()
+    now = now or timezone.now()
+    return {
+        table.table: table.maintain(now, config, dry_run=dry_run)
+        for table in get_partitioned_tables(config)
+    }
+
+
+def partition_existing_table(schema_editor, model, interval: str, key: list[str]):
+    """
+    Convert ``model``'s table into a table range-partitioned by ``created_at``
+    (Postgres only; a no-op elsewhere). For use from a migration with the
+    historical model.
+
+    Postgres requires the partition column in every unique constraint, so
+    the primary key becomes ``key + [created_at]``; uniqueness of ``key`` on
+    its own is then no longer enforced by the database, and foreign keys to
+    the table must be declared with ``db_constraint=False``. ``Meta.indexes``
+    are recreated; field-level ``db_index`` is not. Existing rows are copied
+    into partitions covering their whole date range.
+    """
+    connection_ = schema_editor.connection
+    if connection_.vendor != "postgresql":
+        return
+
+    quote = connection_.ops.quote_name
+    table = model._meta.db_table
+    legacy = f"{table}_legacy"
+    config = get_partitioning_config()
+    partitioned = PartitionedTable(model, interval, 0, False)
+    pk = model._meta.pk
+
+    with connection_.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {quote(table)} RENAME TO {quote(legacy)}")
+        cursor.execute(
+            f"CREATE TABLE {quote(table)} (LIKE {quote(legacy)} INCLUDING DEFAULTS) "
+            f"PARTITION BY RANGE ({quote('created_at')})"
+        )
+        cursor.execute(f"CREATE TABLE {quote(partitioned.default_partition)} PARTITION OF {quote(table)} DEFAULT")
+        cursor.execute(f"SELECT min({quote('created_at')}) FROM {quote(legacy)}")
+        oldest = cursor.fetchone()[0]
+
+    partitioned.ensure(timezone.now(), config["PREMAKE"], since=oldest)
+
+    with connection_.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {quote(table)} SELECT * FROM {quote(legacy)}")
+        cursor.execute(f"DROP TABLE {quote(legacy)}")
+        cursor.execute(
+            f"ALTER TABLE {quote(table)} ADD PRIMARY KEY "
+            f"({', '.join(quote(column) for column in key + ['created_at'])})"
+        )
+        if pk.get_internal_type() in ("AutoField", "BigAutoField"):
+            # The identity sequence went with the old table; ids continue from
+            # a plain sequence owned by the new one.
+            sequence = f"{table}_{pk.column}_seq"
+            cursor.execute(f"CREATE SEQUENCE {quote(sequence)} OWNED BY {quote(table)}.{quote(pk.column)}")
+            cursor.execute(
+                f"ALTER TABLE {quote(table)} ALTER COLUMN {quote(pk.column)} "
+                f"SET DEFAULT nextval('{sequence}')"
+            )
+            cursor.execute(
+                f"SELECT setval('{sequence}', COALESCE(max({quote(pk.column)}), 0) + 1, false) "
+                f"FROM {quote(table)}"
+            )
+
+    # Keys and indexes are created on the parent once the old table (and
+    # its index names) is gone; Postgres builds them on every partition.
+    for index in model._meta.indexes:
+        schema_editor.add_index(model, index)
@@ -0,0 +1,313 @@
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+log = logging.getLogger("my_logger")
+
+
+DEFAULT_RATE_LIMIT_CONFIG = {
+    # LocalBackend limits each worker process on its own; RedisBackend shares
+    # one budget across every worker (required for provider quotas).
+    "BACKEND": "infrastructure.rate_limiter.LocalBackend",
+    "REDIS_URL": None,
+    "KEY_PREFIX": "rl",
+    # Outbound quotas per provider. Providers without an entry are unlimited.
+    "OUTBOUND": {},
+    # Inbound API traffic, per merchant (see MerchantRateThrottle).
+    "INBOUND": {"RATE": "50/s", "BURST": 100, "MAX_WAIT": 0.25},
+    # Used on a provider 429 that carries no Retry-After header.
+    "PENALTY_SECONDS": 1.0,
+}
+
+PERIODS = {"s": 1, "sec": 1, "m": 60, "min": 60, "h": 3600, "hour": 3600}
+
+
+def get_rate_limit_config() -> dict:
+    config = dict(DEFAULT_RATE_LIMIT_CONFIG)
+    config.update(getattr(settings, "RATE_LIMITS", {}) or {})
+    return config
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    """Parse ``"<count>/<period>"`` (e.g. ``"50/s"``, ``"600/min"``) into (count, seconds)."""
+    count, period = rate.split("/")
+    return int(count), PERIODS[period.strip().lower()]
+
+
+def parse_retry_after(value) -> float | None:
+    """Seconds from a ``Retry-After`` header (delta-seconds form only)."""
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimitExceeded(Exception):
+    """The caller would have to wait longer than it is allowed to."""
+
+    def __init__(self, key: str, retry_after: float):
+        super().__init__(f"Rate limit exceeded for {key}, retry after {retry_after:.2f}s")
+        self.key = key
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class Limit:
+    """
+    GCRA parameters: one unit every ``interval`` seconds with a burst of
+    ``burst`` units, and the longest a caller may queue for a slot.
+    """
+
+    interval: float
+    burst: int
+    max_wait: float = 0.0
+
+    @classmethod
+    def from_config(cls, config: dict) -> "Limit":
+        count, period = parse_rate(config["RATE"])
+        return cls(
+            interval=period / count,
+            burst=int(config.get("BURST", count)),
+            max_wait=float(config.get("MAX_WAIT", 0.0)),
+        )
+
+
+class LocalBackend:
+    """
+    GCRA state in this process. Each worker enforces the full limit on its
+    own, so the effective rate is ``limit * workers``.
+    """
+
+    # Idle keys are dropped once the table grows past this size.
+    max_keys = 10_000
+
+    def __init__(self, config: dict):
+        self._lock = threading.Lock()
+        self._tat = {}
+
+    def _prune(self, now):
+        self._tat = {key: tat for key, tat in self._tat.items() if tat > now}
+
+    def reserve(self, key, interval, burst, cost, max_wait):
+        """
+        Reserve ``cost`` units. Returns ``(True, wait)`` when the caller got a
+        slot ``wait`` seconds from now, or ``(False, retry_after)``.
+        """
+        with self._lock:
+            now = time.monotonic()
+            tat = max(self._tat.get(key, now), now)
+            new_tat = tat + cost * interval
+            wait = new_tat - burst * interval - now
+            if wait > max_wait:
+                return False, wait
+            if len(self._tat) >= self.max_keys:
+                self._prune(now)
+            self._tat[key] = new_tat
+            return True, max(wait, 0.0)
+
+    def penalize(self, key, interval, burst, seconds):
+        with self._lock:
+            now = time.monotonic()
+            blocked = now + seconds + (burst - 1) * interval
+            self._tat[key] = max(self._tat.get(key, now), blocked)
+
+
+# KEYS[1] = bucket; ARGV = interval, burst, cost, max_wait.
+# Uses the Redis clock so every worker agrees on "now".
+_RESERVE_SCRIPT = """
+local t = redis.call("TIME")
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local max_wait = tonumber(ARGV[4])
+local tat = tonumber(redis.call("GET", KEYS[1])) or now
+if tat < now then tat = now end
+local new_tat = tat + cost * interval
+local wait = new_tat - burst * interval - now
+if wait > max_wait then
+    return {0, tostring(wait)}
+end
+redis.call("SET", KEYS[1], tostring(new_tat), "PX", math.ceil((new_tat - now) * 1000) + 1000)
+if wait < 0 then wait = 0 end
+return {1, tostring(wait)}
+"""
+
+# KEYS[1] = bucket; ARGV = interval, burst, seconds during which no slot is handed out.
+_PENALIZE_SCRIPT = """
+local t = redis.call("TIME")
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local blocked = now + tonumber(ARGV[3]) + (tonumber(ARGV[2]) - 1) * tonumber(ARGV[1])
+local tat = tonumber(redis.call("GET", KEYS[1])) or now
+if tat < blocked then
+    redis.call("SET", KEYS[1], tostring(blocked), "PX", math.ceil((blocked - now) * 1000) + 1000)
+end
+return 1
+"""
+
+
+class RedisBackend:
+    """
+    GCRA state in Redis. Each decision is one atomic Lua script call, so all
+    workers share a single budget per key.
+    """
+
+    def __init__(self, config: dict):
+        import redis
+
+        if not config.get("REDIS_URL"):
+            raise ValueError("RATE_LIMITS['REDIS_URL'] is required for RedisBackend")
+        self.client = redis.Redis.from_url(config["REDIS_URL"])
+        self._reserve = self.client.register_script(_RESERVE_SCRIPT)
+        self._penalize = self.client.register_script(_PENALIZE_SCRIPT)
+
+    def reserve(self, key, interval, burst, cost, max_wait):
+        allowed, value = self._reserve(keys=[key], args=[interval, burst, cost, max_wait])
+        return bool(allowed), max(float(value), 0.0)
+
+    def penalize(self, key, interval, burst, seconds):
+        self._penalize(keys=[key], args=[interval, burst, seconds])
+
+
+class RateLimiter:
+    """
+    Generic cell rate algorithm (GCRA) limiter with queueing.
+
+    A caller that arrives inside the burst passes immediately. A caller that
+    arrives over the rate is given the next free slot and sleeps until then,
+    so bursts are smoothed into a steady stream; only callers that would have
+    to wait longer than ``max_wait`` are rejected with ``RateLimitExceeded``.
+    Reserving a slot and sleeping are separate, so waiting callers hold no
+    lock and queue in arrival order.
+    """
+
+    def __init__(self, config: dict | None = None, backend=None):
+        self.config = config or get_rate_limit_config()
+        self.backend = backend or import_string(self.config["BACKEND"])(self.config)
+        self.prefix = self.config["KEY_PREFIX"]
+        self.outbound = {
+            provider: Limit.from_config(rule)
+            for provider, rule in (self.config["OUTBOUND"] or {}).items()
+            if rule
+        }
+        self.inbound = Limit.from_config(self.config["INBOUND"]) if self.config["INBOUND"] else None
+
+    def reserve(self, key: str, limit: Limit, cost: int = 1, max_wait: float | None = None) -> float:
+        """
+        Reserve a slot without sleeping; returns how long to wait before using it.
+        """
+        max_wait = limit.max_wait if max_wait is None else max_wait
+        allowed, wait = self.backend.reserve(f"{self.prefix}:{key}", limit.interval, limit.burst, cost, max_wait)
+        if not allowed:
+            raise RateLimitExceeded(key, retry_after=wait)
+        return wait
+
+    def acquire(self, key: str, limit: Limit, cost: int = 1, max_wait: float | None = None) -> float:
+        """Reserve a slot and sleep until it is due; returns the time waited."""
+        wait = self.reserve(key, limit, cost, max_wait)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def penalize(self, key: str, limit: Limit, seconds: float):
+        """Hand out no slots for ``key`` during the next ``seconds`` (e.g. after a 429)."""
+        self.backend.penalize(f"{self.prefix}:{key}", limit.interval, limit.burst, seconds)
+
+    def reserve_provider(self, provider: str, max_wait: float | None = None) -> float:
+        """
+        Reserve an outbound slot for ``provider``; returns how long to wait
+        before calling it. Async callers sleep with ``asyncio.sleep``.
+        """
+        limit = self.outbound.get(provider)
+        if limit is None:
+            return 0.0
+        if max_wait is not None:
+            max_wait = max(min(max_wait, limit.max_wait), 0.0)
+        return self.reserve(f"provider:{provider}", limit, max_wait=max_wait)
+
+    def penalize_provider(self, provider: str, retry_after: float | None = None):
+        seconds = retry_after if retry_after else self.config["PENALTY_SECONDS"]
+        limit = self.outbound.get(provider)
+        if limit is None:
+            log.warning(f"Provider {provider} rate limited us but has no OUTBOUND limit configured")
+            return
+        log.warning(f"Provider {provider} rate limited us; pausing outbound calls for {seconds}s")
+        self.penalize(f"provider:{provider}", limit, seconds)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter
+
+
+class MerchantRateThrottle(BaseThrottle):
+    """
+    Per-merchant inbound limit backed by the shared GCRA limiter.
+
+    Requests over the rate are answered with 429 and Retry-After straight
+    away: queueing them would hold a sync worker asleep, so only
+    ``AsyncMerchantRateThrottle`` delays requests (by up to
+    ``INBOUND["MAX_WAIT"]``). Authenticated requests are keyed by the merchant's user, anonymous ones by
+    client IP.
+    """
+
+    def __init__(self):
+        self._retry_after = None
+
+    def get_cache_key(self, request, view):
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return f"merchant:{user.pk}"
+        return f"anon:{self.get_ident(request)}"
+
+    def allow_request(self, request, view):
+        limiter = get_rate_limiter()
+        if limiter.inbound is None:
+            return True
+        try:
+            limiter.reserve(self.get_cache_key(request, view), limiter.inbound, max_wait=0.0)
+        except RateLimitExceeded as e:
+            self._retry_after = e.retry_after
+            return False
+        return True
+
+    def wait(self):
+        return self._retry_after
+
+
+class AsyncMerchantRateThrottle(MerchantRateThrottle):
+    """
+    ``MerchantRateThrottle`` for async (adrf) views: requests slightly over
+    the rate are queued for up to ``INBOUND["MAX_WAIT"]`` with
+    ``asyncio.sleep`` before being rejected.
+    """
+
+    async def allow_request(self, request, view):
+        limiter = get_rate_limiter()
+        if limiter.inbound is None:
+            return True
+        try:
+            wait = await sync_to_async(limiter.reserve, thread_sensitive=False)(
+                self.get_cache_key(request, view), limiter.inbound
+            )
+        except RateLimitExceeded as e:
+            self._retry_after = e.retry_after
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
@@ -0,0 +1,574 @@
+import asyncio
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import mock
+
+import httpx
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+
+from infrastructure.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CacheBackend,
+    CircuitBreaker,
+    CircuitOpenError,
+    InProcessBackend,
+    check_breaker_cache,
+    get_breaker_config,
+)
+from infrastructure.encryption import (
+    DecryptionError,
+    EncryptedCharField,
+    EnvelopeEncryptor,
+    LocalKeyFileKMS,
+    get_encryption_config,
+)
+from infrastructure.http import AsyncProviderTransport
+from infrastructure.ids import (
+    BLOCK_SIZE,
+    CROCKFORD_ALPHABET,
+    MAX_SEQUENCE,
+    BlockAllocator,
+    SnowflakeGenerator,
+    encode_snowflake,
+    has_valid_check_character,
+    luhn_check_character,
+    new_account_id,
+)
+from infrastructure.rate_limiter import (
+    AsyncMerchantRateThrottle,
+    Limit,
+    LocalBackend,
+    MerchantRateThrottle,
+    RateLimiter,
+    RateLimitExceeded,
+    get_rate_limit_config,
+    parse_rate,
+)
+from infrastructure.idempotency import (
+    COMPLETED,
+    IN_PROGRESS,
+    IdempotencyConflict,
+    IdempotencyFailed,
+    IdempotencyInProgress,
+    IdempotencyStore,
+    fingerprint,
+    get_idempotency_config,
+)
+from transactions.models import IdempotencyRecord
+
+
+class Counter:
+    """A ``func`` for the idempotency store that counts its calls."""
+
+    def __init__(self, result=None, error=None):
+        self.calls = 0
+        self.result = result
+        self.error = error
+
+    def __call__(self):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class IdempotencyStoreTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.store = IdempotencyStore({**get_idempotency_config(), "WAIT_TIMEOUT": 0.2, "POLL_INTERVAL": 0.01})
+
+    def run_once(self, func, data=None, **kwargs):
+        return self.store.run("payments:m1", "key-1", data or {"amount": "100"}, func, **kwargs)
+
+    def test_completed_result_is_replayed(self):
+        func = Counter({"status": "success", "amount": 100})
+
+        first = self.run_once(func)
+        second = self.run_once(func)
+
+        self.assertEqual(first, ({"status": "success", "amount": 100}, False))
+        self.assertEqual(second, ({"status": "success", "amount": 100}, True))
+        self.assertEqual(func.calls, 1)
+        self.assertEqual(IdempotencyRecord.objects.get().status, COMPLETED)
+
+    def test_replay_survives_cache_loss(self):
+        func = Counter({"status": "success"})
+        self.run_once(func)
+        caches["default"].clear()
+
+        self.assertEqual(self.run_once(func), ({"status": "success"}, True))
+        self.assertEqual(func.calls, 1)
+
+    def test_key_reused_with_another_payload(self):
+        self.run_once(Counter({"status": "success"}))
+
+        with self.assertRaises(IdempotencyConflict):
+            self.run_once(Counter(), data={"amount": "999"})
+
+    def claimed(self, locked_for):
+        now = timezone.now()
+        IdempotencyRecord.objects.create(
+            scope="payments:m1", key="key-1", request_hash=fingerprint({"amount": "100"}), status=IN_PROGRESS,
+            locked_until=now + locked_for, expires_at=now + timedelta(days=1),
+        )
+
+    def test_running_claim_makes_a_duplicate_wait_then_give_up(self):
+        self.claimed(timedelta(minutes=1))
+        func = Counter({"status": "success"})
+
+        with self.assertRaises(IdempotencyInProgress):
+            self.run_once(func)
+        self.assertEqual(func.calls, 0)
+
+    def test_abandoned_claim_is_taken_over(self):
+        self.claimed(-timedelta(seconds=1))
+        func = Counter({"status": "success"})
+
+        self.assertEqual(self.run_once(func), ({"status": "success"}, False))
+        self.assertEqual(func.calls, 1)
+
+    def test_failure_releases_the_key(self):
+        with self.assertRaises(RuntimeError):
+            self.run_once(Counter(error=RuntimeError("provider down")))
+
+        self.assertFalse(IdempotencyRecord.objects.exists())
+        self.assertEqual(self.run_once(Counter({"status": "success"})), ({"status": "success"}, False))
+
+    def test_rejected_result_releases_the_key(self):
+        func = Counter({"status": "failed"})
+
+        self.run_once(func, should_store=lambda result: result["status"] == "success")
+        self.run_once(func, should_store=lambda result: result["status"] == "success")
+
+        self.assertEqual(func.calls, 2)
+
+    def test_kept_failure_is_not_run_again(self):
+        func = Counter(error=RuntimeError("transfer timed out"))
+
+        with self.assertRaises(RuntimeError):
+            self.run_once(func, keep_failures=True)
+        with self.assertRaisesMessage(IdempotencyFailed, "transfer timed out"):
+            self.run_once(func, keep_failures=True)
+        caches["default"].clear()
+        with self.assertRaises(IdempotencyFailed):
+            self.run_once(func, keep_failures=True)
+
+        self.assertEqual(func.calls, 1)
+
+
+class AsyncProviderTransportTests(SimpleTestCase):
+    def test_limiter_and_breaker_run_off_the_event_loop(self):
+        threads = {}
+
+        def called_in_thread(name, result=None):
+            def call(*args, **kwargs):
+                threads[name] = threading.get_ident()
+                return result
+            return call
+
+        limiter, breaker = mock.Mock(), mock.Mock()
+        limiter.reserve_provider.side_effect = called_in_thread("reserve_provider", 0)
+        limiter.penalize_provider.side_effect = called_in_thread("penalize_provider")
+        breaker.before_call.side_effect = called_in_thread("before_call")
+        breaker.record.side_effect = called_in_thread("record")
+        transport = AsyncProviderTransport("paystack")
+
+        async def call():
+            rate_limited = httpx.MockTransport(lambda request: httpx.Response(429, headers={"Retry-After": "1"}))
+            transport._clients[asyncio.get_running_loop()] = httpx.AsyncClient(transport=rate_limited)
+            response = await transport.request("GET", "https://api.example/")
+            await transport.close()
+            return response, threading.get_ident()
+
+        with mock.patch("infrastructure.http.get_rate_limiter", return_value=limiter), \
+                mock.patch("infrastructure.http.get_breaker_registry") as registry:
+            registry.return_value.get.return_value = breaker
+            response, loop_thread = asyncio.run(call())
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(set(threads), {"reserve_provider", "penalize_provider", "before_call", "record"})
+        self.assertNotIn(loop_thread, threads.values())
+        self.assertIs(breaker.record.call_args.args[0], True)
+
+
+class MerchantRateThrottleTests(SimpleTestCase):
+    def setUp(self):
+        # One request per second, a burst of one, queueing for up to 2s.
+        config = {**get_rate_limit_config(), "INBOUND": {"RATE": "1/s", "BURST": 1, "MAX_WAIT": 2.0}}
+        self.limiter = RateLimiter(config, backend=LocalBackend(config))
+        patcher = mock.patch("infrastructure.rate_limiter.get_rate_limiter", return_value=self.limiter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.request = mock.Mock(user=mock.Mock(is_authenticated=True, pk=7))
+
+    def test_sync_throttle_rejects_instead_of_sleeping(self):
+        throttle = MerchantRateThrottle()
+        self.assertTrue(throttle.allow_request(self.request, None))
+
+        with mock.patch("infrastructure.rate_limiter.time.sleep") as sleep:
+            self.assertFalse(throttle.allow_request(self.request, None))
+
+        sleep.assert_not_called()
+        self.assertAlmostEqual(throttle.wait(), 1.0, delta=0.1)
+
+    def test_async_throttle_queues_within_max_wait(self):
+        throttle = AsyncMerchantRateThrottle()
+
+        async def allow_twice():
+            with mock.patch("infrastructure.rate_limiter.asyncio.sleep") as sleep:
+                allowed = [await throttle.allow_request(self.request, None) for _ in range(2)]
+            return allowed, sleep
+
+        allowed, sleep = asyncio.run(allow_twice())
+
+        self.assertEqual(allowed, [True, True])
+        sleep.assert_awaited_once()
+        self.assertAlmostEqual(sleep.await_args.args[0], 1.0, delta=0.1)
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    backend_class = CacheBackend
+
+    def setUp(self):
+        caches["default"].clear()
+        self.config = {
+            **get_breaker_config(),
+            "CACHE_ALIAS": "default",
+            "MIN_CALLS": 4,
+            "OPEN_SECONDS": 30,
+            "PROBE_INTERVAL": 2,
+            "HALF_OPEN_SUCCESSES": 2,
+            "STATE_CACHE_SECONDS": 0,
+        }
+        # Drives breaker timestamps and both backends' expiry (the cache's too).
+        self.now = 1_000_000.0
+        for clock in ("time", "monotonic"):
+            patcher = mock.patch(f"infrastructure.circuit_breaker.time.{clock}", side_effect=lambda: self.now)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker("paystack:initialize", self.backend_class(self.config), self.config)
+
+    def call(self, success, latency=0.1):
+        self.breaker.before_call()
+        self.breaker.record(success, latency)
+
+    def trip(self):
+        for success in (True, False, False, True):
+            self.call(success)
+
+    def test_counters_stay_apart(self):
+        backend = self.breaker.backend
+        backend.record("b", 1, failed=True, slow=False, ttl=60)
+        backend.record("b", 1, failed=False, slow=True, ttl=60)
+
+        self.assertEqual(backend.record("b", 1, failed=True, slow=True, ttl=60), (3, 2, 2))
+        self.assertEqual(backend.record("b", 2, failed=False, slow=False, ttl=60), (1, 0, 0))
+
+    def test_stays_closed_below_min_calls(self):
+        for _ in range(3):
+            self.call(False)
+
+        self.assertEqual(self.breaker.state()[0], CLOSED)
+
+    def test_failure_rate_opens_the_breaker(self):
+        self.trip()
+
+        self.assertEqual(self.breaker.state()[0], OPEN)
+        with self.assertRaises(CircuitOpenError) as raised:
+            self.breaker.before_call()
+        self.assertEqual(raised.exception.retry_after, 30)
+
+    def test_slow_call_rate_opens_the_breaker(self):
+        for _ in range(4):
+            self.call(True, latency=self.config["SLOW_CALL_SECONDS"])
+
+        self.assertEqual(self.breaker.state()[0], OPEN)
+
+    def test_half_open_lets_one_probe_through_per_interval(self):
+        self.trip()
+        self.now += 30
+
+        self.assertEqual(self.breaker.state()[0], HALF_OPEN)
+        self.breaker.before_call()
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+    def test_successful_probes_close_the_breaker(self):
+        self.trip()
+        self.now += 30
+
+        self.call(True)
+        self.assertEqual(self.breaker.state()[0], HALF_OPEN)
+        self.now += self.config["PROBE_INTERVAL"] + 1
+        self.call(True)
+
+        self.assertEqual(self.breaker.state()[0], CLOSED)
+
+    def test_failed_probe_reopens_the_breaker(self):
+        self.trip()
+        self.now += 30
+
+        self.call(False)
+
+        state, open_until = self.breaker.state()
+        self.assertEqual(state, OPEN)
+        self.assertEqual(open_until, self.now + 30)
+
+
+class InProcessCircuitBreakerTests(CircuitBreakerTests):
+    backend_class = InProcessBackend
+
+
+class BreakerCacheCheckTests(SimpleTestCase):
+    def test_local_memory_cache_fails_the_deploy_check(self):
+        self.assertEqual([e.id for e in check_breaker_cache(None)], ["infrastructure.E001"])
+
+    def test_in_process_backend_is_not_reported(self):
+        with self.settings(CIRCUIT_BREAKER={"BACKEND": "infrastructure.circuit_breaker.InProcessBackend"}):
+            self.assertEqual(check_breaker_cache(None), [])
+
+
+class RateLimiterTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        clock = mock.patch("infrastructure.rate_limiter.time.monotonic", side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+        config = {
+            **get_rate_limit_config(),
+            "OUTBOUND": {"paystack": {"RATE": "10/s", "BURST": 2, "MAX_WAIT": 0.5}},
+            "PENALTY_SECONDS": 3.0,
+        }
+        self.limiter = RateLimiter(config, backend=LocalBackend(config))
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate("50/s"), (50, 1))
+        self.assertEqual(parse_rate("600 / min"), (600, 60))
+        self.assertEqual(Limit.from_config({"RATE": "10/s"}), Limit(interval=0.1, burst=10))
+
+    def test_burst_passes_then_callers_queue_in_order(self):
+        limit = Limit(interval=0.1, burst=2, max_wait=0.25)
+        waits = [self.limiter.reserve("k", limit) for _ in range(4)]
+
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertAlmostEqual(waits[2], 0.1)
+        self.assertAlmostEqual(waits[3], 0.2)
+        with self.assertRaises(RateLimitExceeded) as raised:
+            self.limiter.reserve("k", limit)
+        self.assertAlmostEqual(raised.exception.retry_after, 0.3)
+
+    def test_rejected_call_takes_no_slot(self):
+        limit = Limit(interval=1.0, burst=1)
+        self.limiter.reserve("k", limit)
+        for _ in range(3):
+            with self.assertRaises(RateLimitExceeded):
+                self.limiter.reserve("k", limit)
+
+        self.now += 1.0
+        self.assertEqual(self.limiter.reserve("k", limit), 0.0)
+
+    def test_keys_have_separate_budgets(self):
+        limit = Limit(interval=1.0, burst=1)
+        self.limiter.reserve("a", limit)
+
+        self.assertEqual(self.limiter.reserve("b", limit), 0.0)
+
+    def test_provider_wait_is_capped_by_the_callers_budget(self):
+        for _ in range(2):
+            self.limiter.reserve_provider("paystack")
+
+        with self.assertRaises(RateLimitExceeded):
+            self.limiter.reserve_provider("paystack", max_wait=0.05)
+        self.assertAlmostEqual(self.limiter.reserve_provider("paystack", max_wait=1.0), 0.1)
+
+    def test_unlimited_provider(self):
+        self.assertEqual(self.limiter.reserve_provider("flutterwave"), 0.0)
+
+    def test_penalty_pauses_the_provider(self):
+        self.limiter.penalize_provider("paystack", retry_after=None)
+
+        with self.assertRaises(RateLimitExceeded) as raised:
+            self.limiter.reserve_provider("paystack")
+        self.assertAlmostEqual(raised.exception.retry_after, 3.0)
+        self.now += 3.0
+        self.assertEqual(self.limiter.reserve_provider("paystack"), 0.0)
+
+
+class EnvelopeEncryptorTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.key_file = os.path.join(directory.name, "master.key")
+        self.first_key = LocalKeyFileKMS.add_master_key(self.key_file)
+        self.kms = LocalKeyFileKMS(self.key_file)
+        self.now = 0.0
+        self.encryptor = self.make_encryptor()
+
+    def make_encryptor(self, **config):
+        return EnvelopeEncryptor(
+            {**get_encryption_config(), "DATA_KEY_LIFETIME": 60, "DATA_KEY_MAX_USES": 3, **config},
+            kms=self.kms,
+            clock=lambda: self.now,
+        )
+
+    def test_round_trip(self):
+        value = self.encryptor.encrypt("sk_live_secret")
+
+        self.assertTrue(EnvelopeEncryptor.is_encrypted(value))
+        self.assertNotIn("sk_live_secret", value)
+        self.assertEqual(self.encryptor.key_id_of(value), self.first_key)
+        self.assertEqual(self.encryptor.decrypt(value), "sk_live_secret")
+
+    def test_data_key_is_reused_until_it_expires_or_is_used_up(self):
+        with mock.patch.object(self.kms, "generate_data_key", wraps=self.kms.generate_data_key) as generate:
+            values = [self.encryptor.encrypt("secret") for _ in range(4)]
+            self.now += 61
+            self.encryptor.encrypt("secret")
+
+        self.assertEqual(generate.call_count, 3)
+        self.assertEqual(len(set(values)), 4)
+        self.assertEqual(len({value.split("$")[2] for value in values[:3]}), 1)
+
+    def test_cold_reader_unwraps_each_data_key_once(self):
+        value = self.encryptor.encrypt("secret")
+        reader = self.make_encryptor()
+
+        with mock.patch.object(self.kms, "decrypt_data_key", wraps=self.kms.decrypt_data_key) as unwrap:
+            for _ in range(3):
+                self.assertEqual(reader.decrypt(value), "secret")
+
+        unwrap.assert_called_once()
+
+    def test_master_key_rotation(self):
+        old = self.encryptor.encrypt("secret")
+        new_key = LocalKeyFileKMS.add_master_key(self.key_file)
+
+        new = self.encryptor.encrypt("secret")
+
+        self.assertEqual(self.encryptor.key_id_of(new), new_key)
+        self.assertEqual(self.make_encryptor().decrypt(old), "secret")
+
+    def test_tampered_and_malformed_values_are_rejected(self):
+        value = self.encryptor.encrypt("secret")
+        payload = value.rsplit("$", 1)[1]
+        tampered = value[: -len(payload)] + ("A" if payload[0] != "A" else "B") + payload[1:]
+
+        for bad in (tampered, "enc1$not-an-envelope"):
+            with self.subTest(value=bad), self.assertRaises(DecryptionError):
+                self.encryptor.decrypt(bad)
+
+    def test_unknown_master_key(self):
+        value = self.encryptor.encrypt("secret").replace(self.first_key, "missing", 1)
+
+        with self.assertRaises(DecryptionError):
+            self.make_encryptor().decrypt(value)
+
+    def test_field_encrypts_on_save_and_reads_legacy_plaintext(self):
+        field = EncryptedCharField()
+        with mock.patch("infrastructure.encryption.get_encryptor", return_value=self.encryptor):
+            stored = field.get_prep_value("secret")
+
+            self.assertTrue(EnvelopeEncryptor.is_encrypted(stored))
+            self.assertEqual(field.get_prep_value(stored), stored)
+            self.assertEqual(field.from_db_value(stored, None, None), "secret")
+            self.assertEqual(field.from_db_value("legacy-plaintext", None, None), "legacy-plaintext")
+            self.assertIsNone(field.get_prep_value(None))
+
+
+class CheckCharacterTests(SimpleTestCase):
+    def test_luhn_digit(self):
+        self.assertEqual(luhn_check_character("7992739871"), "3")
+        self.assertTrue(has_valid_check_character("79927398713"))
+        self.assertFalse(has_valid_check_character("79927398714"))
+
+    def test_luhn_catches_adjacent_swaps_in_base32(self):
+        value = "06G2M0T9K8W00"
+        check = luhn_check_character(value, CROCKFORD_ALPHABET)
+        swapped = "60G2M0T9K8W00" + check
+
+        self.assertTrue(has_valid_check_character(value + check, CROCKFORD_ALPHABET))
+        self.assertFalse(has_valid_check_character(swapped, CROCKFORD_ALPHABET))
+        self.assertFalse(has_valid_check_character("06G2M0T9K8W0I" + check, CROCKFORD_ALPHABET))
+
+
+class SnowflakeGeneratorTests(SimpleTestCase):
+    epoch_ms = 1767225600000
+
+    def setUp(self):
+        self.now = self.epoch_ms / 1000 + 100
+        clock = mock.patch("infrastructure.ids.time.time", side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+        self.generator = SnowflakeGenerator(self.epoch_ms, worker_id=5)
+
+    def test_layout(self):
+        snowflake = self.generator.next_id()
+
+        self.assertEqual(snowflake >> 22, 100_000)
+        self.assertEqual((snowflake >> 12) & 1023, 5)
+        self.assertEqual(self.generator.timestamp(snowflake).timestamp(), self.now)
+
+    def test_ids_keep_increasing_through_sequence_overflow_and_clock_steps(self):
+        ids = [self.generator.next_id() for _ in range(MAX_SEQUENCE + 3)]
+        self.now -= 5  # clock stepped back
+        ids += [self.generator.next_id() for _ in range(3)]
+
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertEqual(ids[-1] >> 22, 100_001)
+
+    def test_worker_id_out_of_range(self):
+        with self.assertRaises(ImproperlyConfigured):
+            SnowflakeGenerator(self.epoch_ms, worker_id=1024)
+
+    def test_failed_lease_is_an_error(self):
+        generator = SnowflakeGenerator(self.epoch_ms)
+
+        with mock.patch("infrastructure.ids.get_id_allocator", side_effect=RuntimeError("database down")):
+            with self.assertRaises(ImproperlyConfigured):
+                generator.next_id()
+
+    def test_encoding_sorts_like_the_number(self):
+        ids = [self.generator.next_id() for _ in range(3)] + [1 << 62]
+        encoded = [encode_snowflake(snowflake) for snowflake in ids]
+
+        self.assertEqual(encoded, sorted(encoded))
+        self.assertTrue(all(len(value) == 14 for value in encoded))
+        self.assertTrue(all(has_valid_check_character(value, CROCKFORD_ALPHABET) for value in encoded))
+
+
+class BlockAllocatorTests(TransactionTestCase):
+    def test_values_come_from_one_block_per_round_trip(self):
+        allocator = BlockAllocator()
+        with mock.patch.object(BlockAllocator, "_reserve_from_table", wraps=BlockAllocator._reserve_from_table) as reserve:
+            values = [allocator.next_value("merchant_id") for _ in range(BLOCK_SIZE + 1)]
+
+        self.assertEqual(values, list(range(values[0], values[0] + BLOCK_SIZE + 1)))
+        self.assertEqual(reserve.call_count, 2)
+
+    def test_processes_get_separate_blocks(self):
+        first, second = BlockAllocator().next_value("profile_id"), BlockAllocator().next_value("profile_id")
+
+        self.assertEqual(abs(second - first), BLOCK_SIZE)
+
+    def test_block_reserved_inside_a_transaction_is_used_once(self):
+        allocator = BlockAllocator()
+        with transaction.atomic():
+            first = allocator.next_value("merchant_id")
+            second = allocator.next_value("merchant_id")
+
+        self.assertEqual(second - first, BLOCK_SIZE)
+
+    def test_account_id(self):
+        with mock.patch("infrastructure.ids.get_id_allocator", return_value=BlockAllocator()):
+            account_id = new_account_id("merchant_id")
+
+        self.assertEqual(len(account_id), 10)
+        self.assertTrue(has_valid_check_character(account_id))
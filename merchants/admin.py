@@ -1,12 +1,12 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from .models import Merchant, MerchantAPIKey, KYCDocument, MerchantAccountKey
 
 class MerchantAccountKeyInline(admin.StackedInline):
     model = MerchantAccountKey
     can_delete = False
     max_num = 1
-    readonly_fields = ('merchant_api_key', 'created_at', 'updated_at')
-    fields = ('account_id', 'merchant_api_key', 'environment', 'is_active', 'created_at', 'updated_at')
+    readonly_fields = ('key_prefix', 'created_at', 'updated_at')
+    fields = ('account_id', 'key_prefix', 'environment', 'is_active', 'created_at', 'updated_at')
 
 
 class MerchantAPIKeyInline(admin.TabularInline):
@@ -39,10 +39,23 @@ class MerchantAdmin(admin.ModelAdmin):
 
 @admin.register(MerchantAccountKey)
 class MerchantAccountKeyAdmin(admin.ModelAdmin):
-    list_display = ('merchant', 'merchant_api_key', 'account_id', 'environment', 'is_active', 'created_at')
+    list_display = ('merchant', 'key_prefix', 'account_id', 'environment', 'is_active', 'created_at')
     list_filter = ('environment', 'is_active', 'created_at')
-    search_fields = ('merchant__business_name', 'merchant_api_key', 'account_id')
-    readonly_fields = ('merchant_api_key', 'created_at', 'updated_at')
+    search_fields = ('merchant__business_name', 'key_prefix', 'account_id')
+    readonly_fields = ('key_prefix', 'created_at', 'updated_at')
+    actions = ('reissue_api_keys',)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if getattr(obj, "api_key", None):
+            messages.warning(request, f"API key for {obj.merchant.business_name}: {obj.api_key} (shown only once)")
+
+    @admin.action(description="Reissue API keys (the current keys stop working)")
+    def reissue_api_keys(self, request, queryset):
+        for account_key in queryset:
+            account_key.issue_api_key()
+            account_key.save()
+            messages.warning(request, f"API key for {account_key.merchant.business_name}: {account_key.api_key} (shown only once)")
     
 @admin.register(MerchantAPIKey)
 class MerchantAPIKeyAdmin(admin.ModelAdmin):
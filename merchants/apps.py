@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MerchantsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'merchants'
+
+    def ready(self):
+        from merchants import signals  # noqa: F401
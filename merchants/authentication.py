@@ -0,0 +1,203 @@
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from infrastructure.cache import LRUCache
+
+
+DEFAULT_MERCHANT_API_KEY_CONFIG = {
+    # Shared tier for the per-key generation counters (point it at Redis so
+    # all workers share it).
+    "CACHE_ALIAS": "default",
+    "MAX_KEYS": 10_000,
+    # A worker trusts a resolved key for this long before comparing its
+    # generation in the shared cache (one cache read, no query). Revoking a
+    # key applies at once in the revoking process and within CHECK_INTERVAL
+    # everywhere else.
+    "CHECK_INTERVAL": 5.0,
+    # Resolved keys are dropped after this long regardless.
+    "TTL_SECONDS": 10 * 60,
+}
+
+# Leading characters of a key stored in clear (indexed) to find its row.
+API_KEY_PREFIX_LENGTH = 12
+
+
+def get_merchant_api_key_config() -> dict:
+    config = dict(DEFAULT_MERCHANT_API_KEY_CONFIG)
+    config.update(getattr(settings, "MERCHANT_API_KEYS", {}) or {})
+    return config
+
+
+def generate_api_key() -> str:
+    return secrets.token_urlsafe(32)
+
+
+def api_key_prefix(api_key: str) -> str:
+    return api_key[:API_KEY_PREFIX_LENGTH]
+
+
+def hash_api_key(api_key: str) -> str:
+    # Keys carry 256 random bits, so a plain SHA-256 cannot be brute-forced
+    # and no password-style stretching is needed; checking one is ~1us.
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+class MerchantPrincipal:
+    """``request.auth`` for API-key requests: the merchant the key belongs to."""
+
+    __slots__ = ("account_key_id", "merchant_pk", "merchant_id", "environment")
+
+    def __init__(self, account_key_id, merchant_pk, merchant_id, environment):
+        self.account_key_id = account_key_id
+        self.merchant_pk = merchant_pk
+        self.merchant_id = merchant_id
+        self.environment = environment
+
+
+class _Entry:
+    __slots__ = ("key_hash", "user", "principal", "generation", "checked_at")
+
+    def __init__(self, key_hash, user, principal, generation, checked_at):
+        self.key_hash = key_hash
+        self.user = user
+        self.principal = principal
+        self.generation = generation
+        self.checked_at = checked_at
+
+
+class MerchantAPIKeyIndex:
+    """
+    Resolves merchant API keys to ``(user, MerchantPrincipal)``.
+
+    Keys are looked up by their indexed prefix and checked against the
+    stored hash. Resolved keys stay in an in-process LRU, so a repeat call
+    costs one hash and no query. Each prefix has a generation counter in the
+    shared cache, bumped (after commit) when its key is reissued, deactivated
+    or deleted, or its user deactivated; workers compare it every
+    ``CHECK_INTERVAL``. Unknown and rejected keys are never cached.
+    """
+
+    def __init__(self, config: dict | None = None, clock=time.monotonic):
+        self.config = config or get_merchant_api_key_config()
+        self.cache = caches[self.config["CACHE_ALIAS"]]
+        self.clock = clock
+        self.local = LRUCache(self.config["MAX_KEYS"], clock=clock)
+
+    @staticmethod
+    def _generation_key(prefix: str) -> str:
+        return f"merchant-api-key:{prefix}:generation"
+
+    def authenticate(self, api_key: str):
+        """``(user, MerchantPrincipal)`` for a valid, active key, else None."""
+        prefix = api_key_prefix(api_key)
+        if len(prefix) < API_KEY_PREFIX_LENGTH:
+            return None
+        entry = self.local.get(prefix)
+        now = self.clock()
+        if entry is not None and now - entry.checked_at >= self.config["CHECK_INTERVAL"]:
+            if self.cache.get(self._generation_key(prefix), 0) == entry.generation:
+                entry.checked_at = now
+            else:
+                entry = None
+        if entry is None:
+            entry = self._load(prefix, now)
+            if entry is None:
+                return None
+
+        if not hmac.compare_digest(entry.key_hash, hash_api_key(api_key)):
+            return None
+        return entry.user, entry.principal
+
+    def _load(self, prefix: str, now: float) -> _Entry | None:
+        from merchants.models import MerchantAccountKey
+
+        # Read before the row: a change committed in between is then seen as
+        # a newer generation on the next check.
+        generation = self.cache.get(self._generation_key(prefix), 0)
+        account_key = (
+            MerchantAccountKey.objects.select_related("merchant__user")
+            .filter(key_prefix=prefix, is_active=True)
+            .first()
+        )
+        if account_key is None or not account_key.merchant.user.is_active:
+            self.local.delete(prefix)
+            return None
+
+        merchant = account_key.merchant
+        entry = _Entry(
+            account_key.key_hash,
+            merchant.user,
+            MerchantPrincipal(account_key.pk, merchant.pk, merchant.merchant_id, account_key.environment),
+            generation,
+            now,
+        )
+        self.local.set(prefix, entry, self.config["TTL_SECONDS"])
+        return entry
+
+    def changed(self, *prefixes):
+        """Keys with these prefixes were reissued or revoked; call inside the write's transaction."""
+        prefixes = [prefix for prefix in prefixes if prefix]
+
+        def bump():
+            for prefix in prefixes:
+                key = self._generation_key(prefix)
+                # add() then incr(): incr() on a missing key raises.
+                self.cache.add(key, 0, None)
+                self.cache.incr(key)
+                self.local.delete(prefix)
+
+        if prefixes:
+            transaction.on_commit(bump)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_api_key_index() -> MerchantAPIKeyIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = MerchantAPIKeyIndex()
+    return _index
+
+
+class MerchantAPIKeyAuthentication(BaseAuthentication):
+    """
+    Server-to-server authentication with a merchant's API key
+    (``MerchantAccountKey``), sent as ``Authorization: Api-Key <key>``.
+
+    Authenticates as the merchant's user; ``request.auth`` is a
+    ``MerchantPrincipal``.
+    """
+
+    keyword = "Api-Key"
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed("Invalid API key header.")
+        try:
+            api_key = auth[1].decode()
+        except UnicodeError:
+            raise AuthenticationFailed("Invalid API key header.")
+
+        resolved = get_api_key_index().authenticate(api_key)
+        if resolved is None:
+            raise AuthenticationFailed("Invalid or revoked API key.")
+        return resolved
+
+    def authenticate_header(self, request):
+        return self.keyword
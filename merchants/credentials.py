@@ -0,0 +1,168 @@
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from infrastructure.cache import LRUCache
+
+log = logging.getLogger("my_logger")
+
+
+DEFAULT_MERCHANT_CREDENTIALS_CONFIG = {
+    # Shared tier for the per-merchant generation counters (point it at
+    # Redis so all workers share it).
+    "CACHE_ALIAS": "default",
+    "MAX_MERCHANTS": 10_000,
+    # A worker trusts its copy of a merchant's keys for this long before
+    # comparing generations in the shared cache (one cache read, no query).
+    # Changes made in the same process apply immediately.
+    "CHECK_INTERVAL": 5.0,
+    # Copies are dropped after this long regardless.
+    "TTL_SECONDS": 60 * 60,
+}
+
+# MerchantAPIKey fields passed to each provider's constructor.
+PROVIDER_CREDENTIAL_FIELDS = {
+    "paystack": ("secret_key",),
+    "flutterwave": ("secret_key", "webhook_secret"),
+}
+
+
+def get_merchant_credentials_config() -> dict:
+    config = dict(DEFAULT_MERCHANT_CREDENTIALS_CONFIG)
+    config.update(getattr(settings, "MERCHANT_CREDENTIALS", {}) or {})
+    return config
+
+
+class _Entry:
+    __slots__ = ("generation", "credentials", "checked_at")
+
+    def __init__(self, generation, credentials, checked_at):
+        self.generation = generation
+        self.credentials = credentials
+        self.checked_at = checked_at
+
+
+class MerchantCredentialStore:
+    """
+    Active ``MerchantAPIKey`` rows per merchant, held in an in-process LRU so
+    routing a request on a merchant's own keys costs no database query.
+
+    Each merchant has a generation counter in the shared cache, bumped (after
+    commit) whenever one of its keys is saved or deleted. The saving process
+    drops its copy at once; other workers notice the new generation within
+    ``CHECK_INTERVAL`` and reload. Provider instances built with replaced
+    keys are dropped from the provider registry on reload.
+    """
+
+    def __init__(self, config: dict | None = None, clock=time.monotonic):
+        self.config = config or get_merchant_credentials_config()
+        self.cache = caches[self.config["CACHE_ALIAS"]]
+        self.clock = clock
+        self.local = LRUCache(self.config["MAX_MERCHANTS"], clock=clock)
+
+    @staticmethod
+    def _generation_key(merchant_pk) -> str:
+        return f"merchant-credentials:{merchant_pk}:generation"
+
+    def for_merchant(self, merchant_pk) -> dict:
+        """``{provider: constructor kwargs}`` for the merchant's active keys."""
+        merchant_pk = str(merchant_pk)
+        entry = self.local.get(merchant_pk)
+        now = self.clock()
+        if self._is_fresh(entry, now):
+            return entry.credentials
+
+        # Read before the rows: a change committed in between is then seen as
+        # a newer generation on the next check.
+        generation = self.cache.get(self._generation_key(merchant_pk), 0)
+        if self._is_current(entry, generation, now):
+            return entry.credentials
+
+        return self._replace(merchant_pk, entry, generation, self._load(merchant_pk), now)
+
+    async def afor_merchant(self, merchant_pk) -> dict:
+        """``for_merchant`` for async code: the database is queried off the event loop."""
+        merchant_pk = str(merchant_pk)
+        entry = self.local.get(merchant_pk)
+        now = self.clock()
+        if self._is_fresh(entry, now):
+            return entry.credentials
+
+        generation = await self.cache.aget(self._generation_key(merchant_pk), 0)
+        if self._is_current(entry, generation, now):
+            return entry.credentials
+
+        credentials = await sync_to_async(self._load)(merchant_pk)
+        return self._replace(merchant_pk, entry, generation, credentials, now)
+
+    def _is_fresh(self, entry, now) -> bool:
+        return entry is not None and now - entry.checked_at < self.config["CHECK_INTERVAL"]
+
+    @staticmethod
+    def _is_current(entry, generation, now) -> bool:
+        if entry is not None and entry.generation == generation:
+            entry.checked_at = now
+            return True
+        return False
+
+    def _replace(self, merchant_pk, entry, generation, credentials, now) -> dict:
+        self.local.set(merchant_pk, _Entry(generation, credentials, now), self.config["TTL_SECONDS"])
+        if entry is not None:
+            self._drop_replaced_providers(entry.credentials, credentials)
+        return credentials
+
+    def get(self, merchant_pk, provider: str) -> dict | None:
+        return self.for_merchant(merchant_pk).get(provider)
+
+    @staticmethod
+    def _load(merchant_pk) -> dict:
+        from merchants.models import MerchantAPIKey
+
+        rows = MerchantAPIKey.objects.filter(merchant_id=merchant_pk, is_active=True)
+        return {
+            row.provider: {field: getattr(row, field) for field in PROVIDER_CREDENTIAL_FIELDS.get(row.provider, ("secret_key",))}
+            for row in rows
+        }
+
+    @staticmethod
+    def _drop_replaced_providers(old: dict, new: dict):
+        from connectors.payments.providers.registry import get_provider_registry
+
+        registry = get_provider_registry()
+        for provider, credentials in old.items():
+            if new.get(provider) != credentials:
+                registry.invalidate(credentials=credentials)
+
+    def changed(self, merchant_pk):
+        """A key of this merchant was saved or deleted; call inside the write's transaction."""
+        merchant_pk = str(merchant_pk)
+
+        def bump():
+            entry = self.local.get(merchant_pk)
+            key = self._generation_key(merchant_pk)
+            # add() then incr(): incr() on a missing key raises.
+            self.cache.add(key, 0, None)
+            self.cache.incr(key)
+            self.local.delete(merchant_pk)
+            if entry is not None:
+                self._drop_replaced_providers(entry.credentials, {})
+
+        transaction.on_commit(bump)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_merchant_credentials() -> MerchantCredentialStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = MerchantCredentialStore()
+    return _store
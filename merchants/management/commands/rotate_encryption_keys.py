@@ -0,0 +1,72 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from django.db.models.functions import Cast
+from django.utils.module_loading import import_string
+
+from infrastructure.encryption import EncryptedCharField, get_encryption_config, get_encryptor
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-encrypt every EncryptedCharField value under the active master key, "
+        "in batches (plaintext rows left from before encryption included)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--new-master-key",
+            action="store_true",
+            help="Add a master key to the key file and make it active first.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true", help="Only count the values that would change.")
+
+    def handle(self, *args, **options):
+        if options["new_master_key"]:
+            config = get_encryption_config()
+            key_id = import_string(config["KMS_BACKEND"]).add_master_key(config["KEY_FILE"])
+            self.stdout.write(f"Master key {key_id} is now active")
+
+        encryptor = get_encryptor()
+        active = encryptor.kms.active_key_id()
+        total = 0
+        for model in apps.get_models():
+            fields = [field.name for field in model._meta.concrete_fields if isinstance(field, EncryptedCharField)]
+            if fields:
+                count = self.rotate_model(model, fields, active, options["batch_size"], options["dry_run"])
+                self.stdout.write(f"{model._meta.label}: {count} rows")
+                total += count
+
+        verb = "would be re-encrypted" if options["dry_run"] else "re-encrypted"
+        self.stdout.write(self.style.SUCCESS(f"{total} rows {verb} under master key {active}"))
+
+    def rotate_model(self, model, fields, active, batch_size, dry_run) -> int:
+        encryptor = get_encryptor()
+        # Raw column values (the cast skips decryption), so rows already under
+        # the active key are passed over without touching them.
+        raw_names = [f"raw_{name}" for name in fields]
+        raw = model.objects.order_by("pk").annotate(
+            **{raw_name: Cast(name, models.TextField()) for raw_name, name in zip(raw_names, fields)}
+        ).values_list("pk", *raw_names)
+
+        changed = 0
+        last_pk = None
+        while True:
+            batch = raw if last_pk is None else raw.filter(pk__gt=last_pk)
+            rows = list(batch[:batch_size])
+            if not rows:
+                return changed
+            last_pk = rows[-1][0]
+
+            stale = [
+                pk for pk, *values in rows
+                if any(value and encryptor.key_id_of(value) != active for value in values)
+            ]
+            changed += len(stale)
+            if dry_run or not stale:
+                continue
+            with transaction.atomic():
+                # Loading decrypts, saving encrypts with the current data key.
+                objects = list(model.objects.select_for_update().filter(pk__in=stale).only("pk", *fields))
+                model.objects.bulk_update(objects, fields)
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.11 on 2026-10-18 09:12
+
+import infrastructure.encryption
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchants', '0003_alter_merchant_merchant_type'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='merchantapikey',
+            name='secret_key',
+            field=infrastructure.encryption.EncryptedCharField(max_length=1024),
+        ),
+        migrations.AddField(
+            model_name='merchantapikey',
+            name='webhook_secret',
+            field=infrastructure.encryption.EncryptedCharField(blank=True, max_length=1024, null=True),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.11 on 2026-10-18 10:05
+
+from django.db import migrations, models
+
+from merchants.authentication import api_key_prefix, hash_api_key
+
+
+def hash_existing_keys(apps, schema_editor):
+    # Keys already handed out keep working; only their prefix and hash remain.
+    MerchantAccountKey = apps.get_model("merchants", "MerchantAccountKey")
+    for account_key in MerchantAccountKey.objects.exclude(merchant_api_key__isnull=True).exclude(merchant_api_key=""):
+        account_key.key_prefix = api_key_prefix(account_key.merchant_api_key)
+        account_key.key_hash = hash_api_key(account_key.merchant_api_key)
+        account_key.save(update_fields=["key_prefix", "key_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchants', '0004_encrypt_merchantapikey_secrets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='merchantaccountkey',
+            name='key_prefix',
+            field=models.CharField(blank=True, editable=False, max_length=16, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='merchantaccountkey',
+            name='key_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(hash_existing_keys, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='merchantaccountkey',
+            name='merchant_api_key',
+        ),
+    ]
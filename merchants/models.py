@@ -1,10 +1,11 @@
 import uuid
-import secrets
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from modules.utils.utils import AccountUtils
 from accounts.models import User
+from infrastructure.encryption import EncryptedCharField
+from merchants.authentication import api_key_prefix, generate_api_key, hash_api_key
 
 
 class Merchant(models.Model):
@@ -39,11 +40,7 @@ class Merchant(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.merchant_id:
-            while True:
-                mid = AccountUtils.generate_merchant_id()
-                if not Merchant.objects.filter(merchant_id=mid).exists():
-                    self.merchant_id = mid
-                    break
+            self.merchant_id = AccountUtils.generate_merchant_id()
         super().save(*args, **kwargs)
 
 
@@ -56,7 +53,10 @@ class MerchantAccountKey(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     merchant = models.OneToOneField(Merchant, on_delete=models.CASCADE, related_name="account_keys")
     account_id = models.CharField(max_length=255, blank=True, null=True)
-    merchant_api_key = models.CharField(max_length=255, blank=True, null=True, unique=True)
+    # Keys are shown once, when issued; only a lookup prefix and a hash are
+    # stored (see merchants.authentication).
+    key_prefix = models.CharField(max_length=16, blank=True, null=True, unique=True, editable=False)
+    key_hash = models.CharField(max_length=64, blank=True, null=True, editable=False)
     environment = models.CharField(max_length=20, choices=PROVIDER_CHOICES, default="live")
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -69,11 +69,49 @@ class MerchantAccountKey(models.Model):
     def __str__(self):
         return f"Account key for {self.merchant.business_name}"
 
+    # A new key's prefix is checked by the unique index on insert, not
+    # looked up first; a clash (72 random bits) just draws another key.
+    MAX_KEY_ATTEMPTS = 3
+
     def save(self, *args, **kwargs):
-        if not self.merchant_api_key:
-            self.merchant_api_key = secrets.token_urlsafe(32)
-        super().save(*args, **kwargs)
-    
+        if not self.key_hash:
+            self.issue_api_key()
+        if not getattr(self, "key_pending", False):
+            return super().save(*args, **kwargs)
+
+        for attempt in range(self.MAX_KEY_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                break
+            except IntegrityError:
+                if attempt + 1 == self.MAX_KEY_ATTEMPTS or not self._prefix_taken():
+                    raise
+                self._draw_api_key()
+        self.key_pending = False
+
+    def issue_api_key(self) -> str:
+        """
+        Replace the account's API key and return the new one; save() to apply.
+        The key itself is not stored, so this is the only time it is seen
+        (it stays on ``self.api_key`` until the instance goes away).
+        """
+        if self.key_prefix and not getattr(self, "key_pending", False):
+            # The signal handler revokes the old key once this is saved.
+            self.replaced_prefix = self.key_prefix
+        return self._draw_api_key()
+
+    def _draw_api_key(self) -> str:
+        api_key = generate_api_key()
+        self.key_prefix = api_key_prefix(api_key)
+        self.key_hash = hash_api_key(api_key)
+        self.api_key = api_key
+        self.key_pending = True
+        return api_key
+
+    def _prefix_taken(self) -> bool:
+        return MerchantAccountKey.objects.filter(key_prefix=self.key_prefix).exclude(pk=self.pk).exists()
+
 
 class MerchantAPIKey(models.Model):
     PROVIDER_CHOICES = [
@@ -85,8 +123,9 @@ class MerchantAPIKey(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     merchant = models.ForeignKey(Merchant, on_delete=models.CASCADE, related_name="api_keys")
     provider = models.CharField(max_length=50, choices=PROVIDER_CHOICES)
-    secret_key = models.CharField(max_length=255)
+    secret_key = EncryptedCharField()
     public_key = models.CharField(max_length=255, blank=True, null=True)
+    webhook_secret = EncryptedCharField(blank=True, null=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
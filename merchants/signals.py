@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import get_api_key_index
+from .credentials import get_merchant_credentials
+from .models import MerchantAccountKey, MerchantAPIKey
+
+
+@receiver(post_save, sender=MerchantAPIKey)
+@receiver(post_delete, sender=MerchantAPIKey)
+def merchant_api_key_changed(sender, instance, **kwargs):
+    get_merchant_credentials().changed(instance.merchant_id)
+
+
+@receiver(post_save, sender=MerchantAccountKey)
+@receiver(post_delete, sender=MerchantAccountKey)
+def merchant_account_key_changed(sender, instance, **kwargs):
+    get_api_key_index().changed(instance.key_prefix, getattr(instance, "replaced_prefix", None))
+    instance.replaced_prefix = None
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_deactivated(sender, instance, created=False, update_fields=None, **kwargs):
+    if created or instance.is_active or (update_fields is not None and "is_active" not in update_fields):
+        return
+    prefixes = MerchantAccountKey.objects.filter(merchant__user=instance).values_list("key_prefix", flat=True)
+    get_api_key_index().changed(*prefixes)
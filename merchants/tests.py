@@ -1,3 +1,46 @@
+from unittest import mock
+
+from django.db import IntegrityError
 from django.test import TestCase
 
-# Create your tests here.
+from accounts.models import User
+from merchants.models import Merchant, MerchantAccountKey
+
+
+class MerchantAccountKeyTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="owner@example.com", password="secret")
+
+    def account_key(self, name):
+        return MerchantAccountKey(merchant=Merchant.objects.create(user=self.user, business_name=name))
+
+    def test_prefix_clash_draws_another_key(self):
+        first = self.account_key("First")
+        first.save()
+        clash = first.api_key[:12] + "x" * 31
+
+        second = self.account_key("Second")
+        with mock.patch("merchants.models.generate_api_key", side_effect=[clash, "y" * 43]):
+            second.save()
+
+        self.assertEqual(second.api_key, "y" * 43)
+        self.assertEqual(MerchantAccountKey.objects.get(pk=second.pk).key_prefix, "y" * 12)
+
+    def test_other_integrity_errors_are_raised(self):
+        first = self.account_key("First")
+        first.save()
+        duplicate = MerchantAccountKey(merchant=first.merchant)
+
+        with self.assertRaises(IntegrityError):
+            duplicate.save()
+
+    def test_reissue_revokes_the_saved_key(self):
+        account_key = self.account_key("First")
+        account_key.save()
+        old_prefix = account_key.key_prefix
+
+        with mock.patch("merchants.signals.get_api_key_index") as index:
+            account_key.issue_api_key()
+            account_key.save()
+
+        index.return_value.changed.assert_called_once_with(account_key.key_prefix, old_prefix)
@@ -3,6 +3,7 @@ import requests
 import logging
 import environ
 from django.conf import settings
+from infrastructure.http import get_async_transport
 
 log = logging.getLogger(__name__)
 env = environ.Env()
@@ -26,6 +27,9 @@ class MailgunGateway:
 
     def send_email(self, to_email, subject, text, html=None, attachments=None):
         return send_via_mailgun(to_email, subject, text, html, attachments)
+
+    async def send_email_async(self, to_email, subject, text, html=None, attachments=None):
+        return await send_via_mailgun_async(to_email, subject, text, html, attachments)
     
 
 def send_via_mailgun(to_email, subject, text, html=None, attachments=None):
@@ -37,6 +41,34 @@ def send_via_mailgun(to_email, subject, text, html=None, attachments=None):
     :param html: optional HTML body
     :param attachments: list of (filename, file_content, mimetype)
     """
+    data, files = _mailgun_payload(to_email, subject, text, html, attachments)
+
+    response = requests.post(
+        f"{MAILGUN_BASE_URL}/{MAILGUN_DOMAIN}/messages",
+        auth=("api", MAILGUN_API_KEY),
+        data=data,
+        files=files if files else None,
+    )
+    return response
+
+
+async def send_via_mailgun_async(to_email, subject, text, html=None, attachments=None):
+    """
+    Async counterpart of ``send_via_mailgun`` using the pooled httpx client.
+    Returns an ``httpx.Response``.
+    """
+    data, files = _mailgun_payload(to_email, subject, text, html, attachments)
+
+    return await get_async_transport("mailgun").post(
+        f"{MAILGUN_BASE_URL}/{MAILGUN_DOMAIN}/messages",
+        auth=("api", MAILGUN_API_KEY),
+        data=data,
+        files=files if files else None,
+        timeout=getattr(settings, "EMAIL_TIMEOUT", None),
+    )
+
+
+def _mailgun_payload(to_email, subject, text, html=None, attachments=None):
     from_email = f"{EMAIL_PREFIX} <{DEFAULT_FROM_EMAIL}>"
 
     data = {
@@ -56,11 +88,4 @@ def send_via_mailgun(to_email, subject, text, html=None, attachments=None):
                 ("attachment", (filename, file_content, mimetype))
             )
 
-    response = requests.post(
-        f"{MAILGUN_BASE_URL}/{MAILGUN_DOMAIN}/messages",
-        auth=("api", MAILGUN_API_KEY),
-        data=data,
-        files=files if files else None,
-    )
-    return response
-
+    return data, files
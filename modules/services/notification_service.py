@@ -44,8 +44,9 @@ class NotificationService(BaseNotification):
                 "email_body": email_body,
             }
 
-            # Call your util function
-            util.send_email(
+            # Call your util function; it logs and swallows Mailgun errors, so
+            # the response is the only sign of whether the email went out.
+            response = util.send_email(
                 email_provider=self.email_provider,
                 subject=subject,
                 to_email=to_email,
@@ -54,6 +55,9 @@ class NotificationService(BaseNotification):
                 attachments=attachments,
                 text=None,  # util will generate plain text from template automatically
             )
+            if response is None or response.status_code not in (200, 202):
+                logger.error("Email to %s was not accepted by the provider", to_email)
+                return False
 
             logger.info("Email sent successfully to: %s", to_email)
             return True
@@ -1,12 +1,24 @@
 import logging
-import uuid
 from decimal import Decimal
 from typing import Optional
 
 from django.core.exceptions import ImproperlyConfigured
 from django.db import transaction as db_transaction
 
-from connectors.payments.providers import PAYMENT_PROVIDERS
+from connectors.payments.providers import ASYNC_PAYMENT_PROVIDERS, PAYMENT_PROVIDERS
+from connectors.payments.providers.registry import get_provider_registry
+from infrastructure.ids import new_reference
+from merchants.credentials import get_merchant_credentials
+from routing.engine import get_routing_engine
+from routing.fallover import (
+    AsyncFailoverExecutor,
+    FailoverAborted,
+    FailoverExecutor,
+    FailoverExhausted,
+    InvalidPaymentRequest,
+    ProviderResponseError,
+)
+from routing.hedging import get_request_hedger
 
 log = logging.getLogger("my_logger")
 
@@ -33,13 +45,50 @@ class PaymentService:
     # ---------------------------------------------------------------------
     # PROVIDER
     # ---------------------------------------------------------------------
-    def get_default_provider_class(self):
+    def get_ranked_providers(
+        self,
+        currency: str = "NGN",
+        payment_method: Optional[str] = None,
+        bank_code: Optional[str] = None,
+    ):
+        """
+        Returns the eligible provider names, best first, as ranked by the
+        routing engine for this currency and payment method. With a
+        ``bank_code``, providers currently failing for that bank rank lower.
+        """
+        return get_routing_engine().rank(currency, payment_method, bank_code)
+
+    def get_default_provider_class(
+        self,
+        currency: str = "NGN",
+        payment_method: Optional[str] = None,
+        bank_code: Optional[str] = None,
+    ):
         """
-        Returns the first active payment provider.
+        Returns the highest-ranked active payment provider.
         """
-        provider_name, provider_class = next(iter(self.payment_providers.items()))
+        ranked = self.get_ranked_providers(currency, payment_method, bank_code)
+        provider_name = ranked[0] if ranked else next(iter(self.payment_providers))
         log.info(f"Using payment provider: {provider_name}")
-        return provider_class
+        return self.payment_providers[provider_name]
+
+    def get_provider(self, provider_name: str, merchant=None):
+        """
+        Shared instance of the named provider (see ``ProviderRegistry``), on
+        ``merchant``'s own keys when it has some for this provider and on the
+        platform keys otherwise. Credential lookups are served from memory
+        (``merchants.credentials``).
+        """
+        return self._provider(provider_name, self._merchant_credentials(merchant))
+
+    @staticmethod
+    def _merchant_credentials(merchant) -> Optional[dict]:
+        return get_merchant_credentials().for_merchant(merchant) if merchant is not None else None
+
+    def _provider(self, provider_name: str, merchant_credentials: Optional[dict] = None):
+        """``get_provider`` on credentials already loaded with ``_merchant_credentials``."""
+        credentials = (merchant_credentials or {}).get(provider_name)
+        return get_provider_registry().get(self.payment_providers[provider_name], credentials)
 
     # ---------------------------------------------------------------------
     # PAYMENT INITIALIZATION (NO MONEY MOVES HERE)
@@ -53,76 +102,241 @@ class PaymentService:
         profile_id: str,
         reference: Optional[str] = None,
         description: str = "Donation",
-        
+        currency: str = "NGN",
+        payment_method: Optional[str] = None,
+        merchant=None,
+        merchant_id: Optional[str] = None,
     ):
         """
         Step 1:
-        - Initialize payment with Paystack
+        - Initialize payment with the best-ranked provider, failing over
+          to the next one within the PAYMENT_FAILOVER deadline
         - Create a PENDING donation transaction
         - DO NOT credit any wallet yet
+
+        With a ``merchant`` (primary key) the providers are called with that
+        merchant's own ``MerchantAPIKey`` credentials. ``merchant_id`` (its
+        public id) goes into the transaction metadata, which the provider
+        echoes back in webhooks for the per-merchant analytics.
         """
 
+        merchant_credentials = self._merchant_credentials(merchant)
+        try:
+            amount, reference, ranked = self._prepare_initialization(
+                amount, email, profile_id, reference, currency, payment_method, merchant_credentials
+            )
+        except ValueError as e:
+            return self._initialization_failed(reference, str(e))
+        transaction_kwargs = self._transaction_kwargs(
+            amount, email, profile_id, reference, description, net_amount, currency, merchant_id
+        )
+
+        def attempt(provider_name):
+            provider = self._provider(provider_name, merchant_credentials)
+            init_data = provider.initialize_transaction(**transaction_kwargs)
+            log.info(f"Payment initialized with {provider_name}: {init_data}")
+            return self._payment_link(provider, init_data)
+
+        executor = FailoverExecutor(engine=get_routing_engine())
+        try:
+            provider_name, cleaned_data = executor.execute(
+                ranked,
+                attempt,
+                currency=currency,
+                payment_method=payment_method,
+            )
+        except FailoverAborted as e:
+            log.warning(f"Payment {reference} was rejected by {e.attempts[-1].provider}: {e}")
+            return self._initialization_failed(reference, str(e))
+        except FailoverExhausted as e:
+            log.error(f"Payment {reference} could not be initialized: {e}")
+            return self._initialization_failed(reference)
+
+        return self._initialization_succeeded(provider_name, cleaned_data, reference, amount)
+
+    def _prepare_initialization(self, amount, email, profile_id, reference, currency, payment_method, merchant_credentials=None):
+        """
+        Validate the request and pick the failover candidates.
+        Returns ``(amount, reference, ranked_providers)``.
+        """
         if not amount:
-            raise ValueError("Amount is required")
+            raise InvalidPaymentRequest("Amount is required")
 
         if not email:
-            raise ValueError("Email is required")
+            raise InvalidPaymentRequest("Email is required")
 
         if not profile_id:
-            raise ValueError("profile_id is required")
+            raise InvalidPaymentRequest("profile_id is required")
         
         if not amount:
-            raise ValueError("Amount is required for payment initialization.")
+            raise InvalidPaymentRequest("Amount is required for payment initialization.")
 
         amount = Decimal(amount)
 
-        provider_class = self.get_default_provider_class()
-        provider = provider_class()
-        log.info(f"Initializing payment of {amount} for {email} using {provider_class.__name__}")
+        # The async service only has connectors for some providers.
+        ranked = [name for name in self.get_ranked_providers(currency, payment_method) if name in self.payment_providers]
+        if merchant_credentials:
+            # A merchant with keys of its own is only routed to those providers.
+            ranked = [name for name in ranked if name in merchant_credentials]
+        if not ranked:
+            raise ValueError(f"No payment provider supports {currency} {payment_method or ''}".strip())
 
+        # The same reference is reused on every failover attempt, so a late
+        # success on an abandoned provider still maps to this payment.
         if not reference:
-            reference = f"PAY-{uuid.uuid4().hex[:10]}"
-
-        log.info(f"Initializing payment {reference} for {email}")
-
-        # ---- Initialize with Paystack ----
-        init_data = provider.initialize_transaction(
-            amount=int(amount * 100),  # Paystack expects kobo
-            email=email,
-            reference=reference,
-            metadata={
-                "profile_id": profile_id,
-                "description": description,
-                "net_amount": str(net_amount),
-            },
-        )
-        log.info(f"Payment initialized with data: {init_data}")
+            reference = new_reference("PAY")
 
+        log.info(f"Initializing payment {reference} of {amount} for {email} (candidates: {ranked})")
+        return amount, reference, ranked
+
+    @staticmethod
+    def _transaction_kwargs(amount, email, profile_id, reference, description, net_amount, currency, merchant_id=None):
+        metadata = {
+            "profile_id": profile_id,
+            "description": description,
+            "net_amount": str(net_amount),
+        }
+        if merchant_id:
+            metadata["merchant_id"] = merchant_id
+        return {
+            "amount": int(amount * 100),  # providers expect minor units (kobo)
+            "email": email,
+            "reference": reference,
+            "currency": currency,
+            "metadata": metadata,
+        }
+
+    @staticmethod
+    def _payment_link(provider, init_data):
         cleaned_data = provider.clean_init_data(init_data)
+        if not cleaned_data.get("payment_url"):
+            raise ProviderResponseError(
+                cleaned_data.get("message") or "Provider returned no payment link",
+                status_code=(init_data.get("error") or {}).get("status_code"),
+                response_data=init_data,
+            )
+        return cleaned_data
 
+    @staticmethod
+    def _initialization_failed(reference, message="Payment providers are currently unavailable"):
+        return {"status": "failed", "message": message, "reference": reference}
+
+    @staticmethod
+    def _initialization_succeeded(provider_name, cleaned_data, reference, amount):
         return {
             "status": "success",
             "payment_url": cleaned_data.get("payment_url"),
             "reference": reference,
+            "provider": provider_name,
             "amount": amount,
         }
             
     # ---------------------------------------------------------------------
     # OPTIONAL: MANUAL VERIFICATION (NOT WEBHOOK)
     # ---------------------------------------------------------------------
-    def verify_payment(self, reference: str):
+    def verify_payment(self, reference: str, provider: Optional[str] = None, merchant=None):
         """
         Optional manual verification endpoint.
         Webhook should always be primary.
+
+        ``provider`` should be the one returned by ``initialize_payment``;
+        after a failover it is not necessarily the top-ranked provider.
+
+        Verification is an idempotent read, so with ``PAYMENT_HEDGING`` enabled
+        a slow call is hedged (see ``routing.hedging.RequestHedger``).
         """
 
-        provider_class = self.get_default_provider_class()
-        provider = provider_class()
+        provider_name = self._verification_provider(provider)
+        provider = self.get_provider(provider_name, merchant)
+        data = get_request_hedger().call(provider_name, lambda: provider.verify_transaction(reference))
+        return self._verification_result(data)
+
+    def _verification_provider(self, provider: Optional[str] = None) -> str:
+        if provider and provider in self.payment_providers:
+            return provider
+        ranked = self.get_ranked_providers()
+        provider_name = ranked[0] if ranked else next(iter(self.payment_providers))
+        log.info(f"Using payment provider: {provider_name}")
+        return provider_name
 
-        data = provider.verify_transaction(reference)
+    @staticmethod
+    def _verification_result(data):
         status = data.get("data", {}).get("status")
 
         if status != "success":
             return {"status": "failed", "message": f"Payment {status}"}
 
         return {"status": "success", "message": "Payment verified"}
+
+
+class AsyncPaymentService(PaymentService):
+    """
+    asyncio variant of ``PaymentService`` for async views.
+
+    Provider calls run on the event loop through the async connectors, so a
+    single worker can keep many gateway calls in flight. Routing, failover
+    and response handling are shared with the sync service.
+    """
+
+    payment_providers = ASYNC_PAYMENT_PROVIDERS
+
+    async def initialize_payment(
+        self,
+        *,
+        amount: Optional[Decimal],
+        net_amount: Optional[Decimal],
+        email: str,
+        profile_id: str,
+        reference: Optional[str] = None,
+        description: str = "Donation",
+        currency: str = "NGN",
+        payment_method: Optional[str] = None,
+        merchant=None,
+        merchant_id: Optional[str] = None,
+        merchant_credentials: Optional[dict] = None,
+    ):
+        """
+        ``merchant_credentials`` (from ``MerchantCredentialStore.afor_merchant``)
+        saves the lookup when initializing many payments for one merchant.
+        """
+        if merchant_credentials is None and merchant is not None:
+            merchant_credentials = await get_merchant_credentials().afor_merchant(merchant)
+        try:
+            amount, reference, ranked = self._prepare_initialization(
+                amount, email, profile_id, reference, currency, payment_method, merchant_credentials
+            )
+        except ValueError as e:
+            return self._initialization_failed(reference, str(e))
+        transaction_kwargs = self._transaction_kwargs(
+            amount, email, profile_id, reference, description, net_amount, currency, merchant_id
+        )
+
+        async def attempt(provider_name):
+            provider = self._provider(provider_name, merchant_credentials)
+            init_data = await provider.initialize_transaction(**transaction_kwargs)
+            log.info(f"Payment initialized with {provider_name}: {init_data}")
+            return self._payment_link(provider, init_data)
+
+        executor = AsyncFailoverExecutor(engine=get_routing_engine())
+        try:
+            provider_name, cleaned_data = await executor.execute(
+                ranked,
+                attempt,
+                currency=currency,
+                payment_method=payment_method,
+            )
+        except FailoverAborted as e:
+            log.warning(f"Payment {reference} was rejected by {e.attempts[-1].provider}: {e}")
+            return self._initialization_failed(reference, str(e))
+        except FailoverExhausted as e:
+            log.error(f"Payment {reference} could not be initialized: {e}")
+            return self._initialization_failed(reference)
+
+        return self._initialization_succeeded(provider_name, cleaned_data, reference, amount)
+
+    async def verify_payment(self, reference: str, provider: Optional[str] = None, merchant=None):
+        provider_name = self._verification_provider(provider)
+        merchant_credentials = await get_merchant_credentials().afor_merchant(merchant) if merchant is not None else None
+        provider = self._provider(provider_name, merchant_credentials)
+        data = await get_request_hedger().call_async(provider_name, lambda: provider.verify_transaction(reference))
+        return self._verification_result(data)
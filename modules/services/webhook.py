@@ -3,8 +3,9 @@ from decimal import Decimal
 from django.conf import settings
 from django.db import transaction as db_transaction
 from wallet.models import WalletTransaction
-from account.models import User, Profile
-from transaction.models import WebhookLog
+from accounts.models import User, Profile
+from transactions.models import WebhookLog, WebhookPayload
+from transactions.tasks import enqueue_notifications
 from modules.services.notification_service import NotificationService
 from modules.utils.emails import support_gift_email
 
@@ -15,14 +16,18 @@ log = logging.getLogger("my_logger")
 
 class WebhookService:
 
-     def process_webhook_payment(self, reference: str, metadata: dict):
+    def post_ledger_entries(self, webhook_log_id: int, reference: str, metadata: dict):
         """
-        Step 2:
-        - Called ONLY by webhook
+        Step 2 (Celery ledger stage, queued by the webhook ingress in
+        webhooks/batcher.py once the delivery is stored):
         - Marks transaction successful
         - Splits donation
         - Credits artist wallet
         - Credits platform commission wallet
+        - Queues the notifications once the ledger is committed
+
+        Safe to run more than once: a reference that is already successful
+        is skipped.
         """
 
         net_amount = Decimal(metadata.get("net_amount"))
@@ -41,6 +46,7 @@ class WebhookService:
 
             if trans.status == "successful":
                 log.info(f"Duplicate webhook ignored for {reference}")
+                WebhookLog.objects.filter(pk=webhook_log_id).update(status="ignored")
                 return
 
             # ---- Mark donation successful ----
@@ -48,7 +54,6 @@ class WebhookService:
             trans.save()
 
             profile = Profile.objects.get(profile_id=metadata.get("profile_id"))
-            print(f"Profile ID {profile}")
 
             creator_wallet = profile.user.wallet.currency_wallets.get(currency__code="NGN")
 
@@ -90,18 +95,39 @@ class WebhookService:
                 status="successful",
             )
 
-            support_gift_email(profile.user, net_amount)
-            service.send(
-                channels=["inapp"],
-                user=profile.user,
-                title = "Support Received!",
-                inapp_message = f"Congratulations! ₦{net_amount} has been gifted to you. Keep inspiring lives!"
-                )
+            WebhookLog.objects.filter(pk=webhook_log_id).update(status="processed")
+
+            # Notifications are sent after commit, outside the wallet row locks.
+            db_transaction.on_commit(
+                lambda: enqueue_notifications(webhook_log_id, reference, profile.user_id, str(net_amount))
+            )
 
             log.info(
                 f"Payment {reference} processed | "
                 f"Creator: {creator_amount}, Platform: {platform_commission}"
             )
+
+    def send_payment_notification(self, channel: str, user_id: str, net_amount: str):
+        """
+        Step 3 (Celery notification stage): one channel per call. Raises when
+        the channel reports failure so the task is retried.
+        """
+        user = User.objects.get(pk=user_id)
+
+        if channel == "email":
+            results = support_gift_email(user, net_amount)
+        elif channel == "inapp":
+            results = service.send(
+                channels=["inapp"],
+                user=user,
+                title = "Support Received!",
+                inapp_message = f"Congratulations! ₦{net_amount} has been gifted to you. Keep inspiring lives!"
+                )
+        else:
+            raise ValueError(f"Unsupported notification channel: {channel}")
+
+        if not results.get(channel):
+            raise RuntimeError(f"Sending {channel} notification to user {user_id} failed")
             
             
 class WebhookLogService:
@@ -117,23 +143,26 @@ class WebhookLogService:
         self.error = error
         self.payload = payload
         self.provider = provider
+        self.stored_payload = WebhookPayload.from_data(payload)
 
     def create_log(self):
         """
         Create a new webhook log entry.
         """
+        WebhookPayload.objects.bulk_create([self.stored_payload], ignore_conflicts=True)
         WebhookLog.objects.create(
-            payload=self.payload,
+            payload_digest=self.stored_payload.digest,
             status=self.status,
             error=self.error,
             provider=self.provider,
         )
 
+    def _logs(self):
+        # Indexed on the payload digest, never on the JSON document itself.
+        return WebhookLog.objects.filter(provider=self.provider, payload_digest=self.stored_payload.digest)
+
     def update_log(self, status: str, error: str = None):
-        log = WebhookLog.objects.get(payload=self.payload)
-        log.status = status
-        log.error = error
-        log.save()
+        self._logs().update(status=status, error=error)
 
     def get_log(self):
-        return WebhookLog.objects.get(payload=self.payload)
\ No newline at end of file
+        return self._logs().get()
\ No newline at end of file
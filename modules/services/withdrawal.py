@@ -1,25 +1,47 @@
 # modules/transactions/services/wallet_withdrawal.py
 
+import hashlib
 from decimal import Decimal
 from django.db import transaction
 from django.contrib.auth.hashers import check_password
 from requests.exceptions import HTTPError
 from django.core.exceptions import ValidationError
-from account.models import Profile
+from accounts.models import Profile
 from wallet.models import Wallet, CurrencyWallet, WalletTransaction
 from modules.utils.exceptions import WalletWithdrawalError
 from modules.utils.utils import TransUtils
+from connectors.payments.providers import PAYMENT_PROVIDERS
+from connectors.payments.providers.registry import get_provider_registry
+from infrastructure.idempotency import IdempotencyFailed, get_idempotency_store
+from routing.engine import get_routing_engine
 
 class WithdrawalService:
     """
     Handles wallet withdrawal business logic
+
+    Each payout goes to the best-ranked provider for its destination bank
+    (``routing.engine``), among those that can pay out to an account
+    (``transfer_to_account``). A ``provider`` instance pins every payout
+    to that provider instead.
     """
 
-    def __init__(self, user, provider, currency_code="NGN"):
+    def __init__(self, user, provider=None, currency_code="NGN"):
         self.user = user
         self.provider = provider
         self.currency_code = currency_code
 
+    def _get_transfer_provider(self, bank_code: str):
+        if self.provider is not None:
+            return self.provider
+
+        # No failover here: a transfer that timed out may still have been
+        # paid, so retrying it elsewhere could pay twice.
+        for provider_name in get_routing_engine().rank(self.currency_code, None, bank_code):
+            provider_class = PAYMENT_PROVIDERS.get(provider_name)
+            if provider_class is not None and hasattr(provider_class, "transfer_to_account"):
+                return get_provider_registry().get(provider_class)
+        raise WalletWithdrawalError("Service unavailable")
+
     def _get_currency_wallet(self) -> CurrencyWallet:
         try:
             wallet = Wallet.objects.select_related("user").get(user=self.user)
@@ -52,7 +74,6 @@ class WithdrawalService:
         if not check_password(pin, profile.pin):
             raise WalletWithdrawalError("Incorrect transaction pin")
 
-    @transaction.atomic
     def withdraw(
         self,
         amount,
@@ -60,21 +81,71 @@ class WithdrawalService:
         account_name: str,
         bank_code: str,
         pin: str = None,
-        **kwargs,
+        idempotency_key: str = None,
+        narration: str = None,
     ):
         """
         Withdraw funds from wallet and initiate transfer.
         Always return a generic 'Service unavailable' on failure.
+
+        With an ``idempotency_key`` a retried withdrawal returns the first
+        result instead of debiting the wallet and calling the provider again.
+        A failure is kept as well: the transfer may still have gone out (a
+        timeout), so retrying the same key fails again instead of paying a
+        second time. The transfer reference is derived from the key, so the
+        provider also rejects a repeat.
         """
 
         self._validate_transaction_pin(pin)
 
+        if not idempotency_key:
+            return self._withdraw(amount, account_number, account_name, bank_code, narration)
+
+        scope = f"withdrawal:{self.user.pk}"
+        reference = self._transfer_reference(scope, idempotency_key)
+        # The claim is committed outside the wallet transaction below, so
+        # concurrent duplicates see it before the provider is called.
+        try:
+            result, _ = get_idempotency_store().run(
+                scope=scope,
+                key=idempotency_key,
+                fingerprint_data={
+                    "amount": str(amount),
+                    "account_number": account_number,
+                    "bank_code": bank_code,
+                    "currency": self.currency_code,
+                    "narration": narration,
+                },
+                func=lambda: self._withdraw(amount, account_number, account_name, bank_code, narration, reference),
+                keep_failures=True,
+            )
+        except IdempotencyFailed:
+            raise WalletWithdrawalError("Service unavailable")
+        return result
+
+    @staticmethod
+    def _transfer_reference(scope: str, idempotency_key: str) -> str:
+        # Lowercase letters, digits and dashes, 16-50 characters: accepted by
+        # every provider's transfer reference.
+        digest = hashlib.sha256(f"{scope}\x00{idempotency_key}".encode()).hexdigest()
+        return f"wd-{digest[:32]}"
 
+    @transaction.atomic
+    def _withdraw(
+        self,
+        amount,
+        account_number: str,
+        account_name: str,
+        bank_code: str,
+        narration: str = None,
+        reference: str = None,
+    ):
         amount = Decimal(amount)
 
         if amount <= 0:
             raise WalletWithdrawalError("Service unavailable")  # generic
 
+        provider = self._get_transfer_provider(bank_code)
         currency_wallet = self._get_currency_wallet()
 
         if currency_wallet.balance < amount:
@@ -86,12 +157,13 @@ class WithdrawalService:
         currency_wallet.save(update_fields=["balance"])
 
         try:
-            transfer_response = self.provider.initiate_transfer(
-                amount=int(amount),
+            transfer_response = provider.transfer_to_account(
+                amount=amount,
                 account_number=account_number,
                 account_name=account_name,
                 bank_code=bank_code,
-                **kwargs,
+                reference=reference,
+                narration=narration,
             )
 
             # If provider explicitly fails
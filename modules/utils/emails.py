@@ -128,3 +128,26 @@ class OnboardingEmailTasks:
             },
         )
 
+
+
+def support_gift_email(user, amount):
+    subject = "You've Received Support! - PayInfra Terminal"
+
+    body = (
+        f"Dear {user.first_name or 'Valued Partner'},<br><br>"
+        f"Great news! <b>₦{amount}</b> has just been gifted to you and credited to your wallet.<br><br>"
+        "You can view the transaction and your updated balance on your dashboard.<br><br>"
+        "Keep inspiring lives!<br><br>"
+        "Best regards,<br>"
+        "<b>The PayInfra Team</b>"
+    )
+
+    service = NotificationService()
+    return service.send(
+        channels=["email"],
+        email_data={
+            "email_subject": subject,
+            "email_body": body,
+            "to_email": user.email
+        },
+    )
@@ -2,10 +2,8 @@ import logging
 import environ
 import boto3
 import random
-import string
 from django.conf import settings
 from decimal import Decimal
-from datetime import datetime, timedelta
 from django.utils.timezone import now
 from functools import wraps
 from rest_framework.response import Response
@@ -15,6 +13,7 @@ from django.template import TemplateDoesNotExist
 from django.template.loader import render_to_string
 from django.conf import settings
 from modules.gateways.mailgun import MailgunGateway
+from infrastructure.ids import new_account_id, new_reference
 
 env = environ.Env()
 
@@ -34,20 +33,18 @@ def handle_exceptions(func):
 class AccountUtils:
     """ """
     def generate_profile_id():
-        return str(random.randint(100_000_000, 999_999_999))
+        return new_account_id("profile_id")
     
     def generate_merchant_id():
-        return str(random.randint(100_000_000, 999_999_999))
+        return new_account_id("merchant_id")
     
     def generate_otp():
         return str(random.randint(1000, 9999))
 
 class TransUtils:
     def generate_payment_reference(profile_id: int) -> str:
-        prefix = "TXN"
-        date_str = datetime.now().strftime("%Y%m%d")
-        random_str = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-        return f"{prefix}-{date_str}-{profile_id}-{random_str}"
+        # Time-ordered and unique without a lookup (see infrastructure.ids).
+        return f"{new_reference('TXN')}-{profile_id}"
 
 
 
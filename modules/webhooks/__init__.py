@@ -1,9 +1,9 @@
 from modules.webhooks.paystack import PaystackWebhookHandler
-# from modules.webhooks.flutterwave import FlutterwaveWebhookHandler
+from modules.webhooks.flutterwave import FlutterwaveWebhookHandler
 
 
 
 WEBHOOK_PROVIDERS = {
     "paystack": PaystackWebhookHandler(),
-    # "flutterwave": FlutterwaveWebhookHandler(),
+    "flutterwave": FlutterwaveWebhookHandler(),
 }
\ No newline at end of file
@@ -1,10 +1,16 @@
+import hmac
+
 from django.conf import settings
 from modules.webhooks.base import BaseWebhookHandler
 
 class FlutterwaveWebhookHandler(BaseWebhookHandler):
 
     def verify_signature(self, request) -> bool:
-        return request.headers.get("verif-hash") == settings.FLUTTERWAVE_SECRET_HASH
+        secret_hash = getattr(settings, "FLUTTERWAVE_SECRET_HASH", None)
+        signature = request.headers.get("verif-hash")
+        if not secret_hash or not signature:
+            return False
+        return hmac.compare_digest(signature, secret_hash)
 
     def get_event(self, payload: dict) -> str:
         return payload.get("event")
@@ -3,9 +3,7 @@ import hashlib
 import logging
 from django.conf import settings
 
-from modules.services.payment_service import PaymentService
 from modules.webhooks.base import BaseWebhookHandler
-from modules.services.webhook import WebhookLogService
 
 log = logging.getLogger(__name__)
 
@@ -43,12 +41,6 @@ class PaystackWebhookHandler(BaseWebhookHandler):
         metadata = data.get("metadata", {})
         customer = data.get("customer", {})
 
-        WebhookLogService(
-            payload=data,
-            status="success",
-            provider="paystack",
-        ).create_log()
-
         return {
             "reference": data.get("reference"),
             "metadata": metadata,
@@ -1,6 +1,10 @@
 import os
 from pathlib import Path
 
+from .celery import app as celery_app
+
+__all__ = ("celery_app",)
+
 def ensure_logs_dir():
     """Ensure logs directory exists"""
     base_dir = Path(__file__).resolve().parent.parent
@@ -8,4 +12,4 @@ def ensure_logs_dir():
     logs_dir.mkdir(exist_ok=True, parents=True)  # parents=True creates parent directories too
 
 # Call this function when the project loads
-ensure_logs_dir()
\ No newline at end of file
+ensure_logs_dir()
@@ -159,9 +159,13 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20,
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'merchants.authentication.MerchantAPIKeyAuthentication',
         'rest_framework.authentication.SessionAuthentication',
         
     ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'infrastructure.rate_limiter.MerchantRateThrottle',
+    ],
 }
 
 
@@ -176,6 +180,12 @@ DATABASES = {
     }
 }
 
+# Shared cache used by the circuit breakers and other cross-worker state.
+# Set CACHE_URL=redis://... in production so workers see the same state.
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
+}
+
 MAILGUN_BASE_URL= env("MAILGUN_BASE_URL")
 MAILGUN_DOMAIN=env("MAILGUN_DOMAIN")
 MAILGUN_API_KEY=env("MAILGUN_API_KEY")
@@ -186,6 +196,277 @@ SUPPORT_EMAIL = "support@payinfra.co"
 EMAIL_PREFIX = "iGospel"
 
 
+# Keep-alive connection pools used by the provider connectors
+# (see infrastructure/http.py). "default" applies to every provider.
+PROVIDER_HTTP_POOLS = {
+    "default": {
+        "POOL_CONNECTIONS": env.int("PROVIDER_HTTP_POOL_CONNECTIONS", default=4),
+        "POOL_MAXSIZE": env.int("PROVIDER_HTTP_POOL_MAXSIZE", default=20),
+        "POOL_BLOCK": env.bool("PROVIDER_HTTP_POOL_BLOCK", default=False),
+        "MAX_RETRIES": 0,
+        # Concurrent connections per event loop for the async (httpx) transport.
+        "ASYNC_MAX_CONNECTIONS": env.int("PROVIDER_HTTP_ASYNC_MAX_CONNECTIONS", default=200),
+    },
+    "paystack": {},
+    "flutterwave": {},
+    "nomba": {},
+}
+
+
+# Smart routing (see routing/engine.py). Providers are ranked per request from
+# a sliding window of their recent success rate, latency and error classes.
+PAYMENT_ROUTING = {
+    "WINDOW_SECONDS": 300,
+    "BUCKETS": 30,
+    "MIN_SAMPLES": 20,
+    "WEIGHTS": {
+        "SUCCESS_WEIGHT": 1.0,
+        "LATENCY_WEIGHT": 0.3,
+        "TIMEOUT_WEIGHT": 0.5,
+        "LATENCY_TARGET": 2.0,
+    },
+    "PROVIDERS": {
+        "paystack": {
+            "currencies": ["NGN", "GHS", "ZAR", "KES", "USD"],
+            "payment_methods": ["card", "bank", "ussd", "bank_transfer", "mobile_money", "qr"],
+        },
+        "flutterwave": {
+            "currencies": ["NGN", "GHS", "KES", "ZAR", "USD", "EUR", "GBP"],
+            "payment_methods": ["card", "bank_transfer", "ussd", "mobile_money", "account"],
+        },
+    },
+}
+
+# Cross-provider failover for payment initialization (see routing/fallover.py).
+# TOTAL_DEADLINE bounds checkout latency regardless of how slow a gateway is.
+PAYMENT_FAILOVER = {
+    "TOTAL_DEADLINE": env.float("PAYMENT_FAILOVER_DEADLINE", default=15.0),
+    "MAX_ATTEMPTS": 3,
+    "MIN_ATTEMPT_TIMEOUT": 2.0,
+    "MAX_ATTEMPT_TIMEOUT": 8.0,
+}
+
+# Per provider/endpoint-family circuit breakers (see infrastructure/circuit_breaker.py).
+# CacheBackend shares state across workers through CACHES["default"], which
+# must then be Redis (on the locmem default it is per process, and
+# `check --deploy` fails); InProcessBackend keeps it per process.
+CIRCUIT_BREAKER = {
+    "BACKEND": "infrastructure.circuit_breaker.CacheBackend",
+    "CACHE_ALIAS": "default",
+    "WINDOW_SECONDS": 30,
+    "MIN_CALLS": 20,
+    "FAILURE_RATE": 0.5,
+    "SLOW_CALL_SECONDS": 10.0,
+    "SLOW_CALL_RATE": 0.5,
+    "OPEN_SECONDS": 30,
+    "PROBE_INTERVAL": 2,
+    "HALF_OPEN_SUCCESSES": 3,
+}
+
+# Idempotency keys for payment and withdrawal endpoints (see infrastructure/idempotency.py).
+# Completed responses are served from CACHES["default"] first, then from
+# transactions.IdempotencyRecord; purge expired rows with
+# `manage.py purge_idempotency_keys`.
+IDEMPOTENCY = {
+    "CACHE_ALIAS": "default",
+    "TTL_SECONDS": env.int("IDEMPOTENCY_TTL_SECONDS", default=24 * 60 * 60),
+    "CACHE_TTL_SECONDS": 60 * 60,
+    "LOCK_SECONDS": 60,
+    "WAIT_TIMEOUT": 30.0,
+}
+
+# GCRA rate limits (see infrastructure/rate_limiter.py). OUTBOUND paces calls to
+# each provider below its published quota; INBOUND limits API traffic per
+# merchant. Callers over the rate queue for up to MAX_WAIT seconds before
+# being rejected (inbound, only on async views; sync views answer 429 at
+# once). Use RedisBackend so all workers share one budget.
+RATE_LIMITS = {
+    "BACKEND": env(
+        "RATE_LIMIT_BACKEND",
+        default="infrastructure.rate_limiter.RedisBackend" if env("REDIS_URL", default=None) else "infrastructure.rate_limiter.LocalBackend",
+    ),
+    "REDIS_URL": env("REDIS_URL", default=None),
+    "OUTBOUND": {
+        "paystack": {"RATE": "50/s", "BURST": 20, "MAX_WAIT": 2.0},
+        "flutterwave": {"RATE": "25/s", "BURST": 10, "MAX_WAIT": 2.0},
+        "nomba": {"RATE": "20/s", "BURST": 10, "MAX_WAIT": 2.0},
+    },
+    "INBOUND": {"RATE": "50/s", "BURST": 100, "MAX_WAIT": 0.25},
+    "PENALTY_SECONDS": 1.0,
+}
+
+# Hedged payment verification (see routing/hedging.py). Off by default: when a
+# verify call has not answered by the provider's rolling p95, a second identical
+# call is sent and the first answer wins. MAX_HEDGE_RATE caps the extra load.
+PAYMENT_HEDGING = {
+    "ENABLED": env.bool("PAYMENT_HEDGING_ENABLED", default=False),
+    "MAX_HEDGE_RATE": 0.1,
+    "MIN_SAMPLES": 20,
+    "DEFAULT_DELAY": 1.0,
+    "MIN_DELAY": 0.05,
+}
+
+# Celery (see payinfra/celery.py). Webhooks are acked after a single insert;
+# ledger posting and notifications run as retried tasks (transactions/tasks.py).
+CELERY_BROKER_URL = env("CELERY_BROKER_URL", default=env("REDIS_URL", default="redis://localhost:6379/0"))
+CELERY_TASK_DEFAULT_QUEUE = "default"
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_SERIALIZER = "json"
+CELERY_ACCEPT_CONTENT = ["json"]
+CELERY_TIMEZONE = TIME_ZONE
+
+# Webhook pipeline queues are partitioned by payment reference; run one
+# single-process worker per partition (webhooks.ledger.<n>,
+# webhooks.notifications.<n>) to keep each reference's tasks in order.
+# Replay dead-lettered tasks with `manage.py replay_dead_letters`. The ledger
+# stage stays off until the wallet ledger app is installed.
+WEBHOOK_PIPELINE = {
+    "PARTITIONS": env.int("WEBHOOK_PIPELINE_PARTITIONS", default=4),
+    "LEDGER_ENABLED": False,
+}
+
+# Unified webhook ingress, POST /v1/webhooks/<provider>/ (see webhooks/). Events
+# are group-committed: one bulk insert per MAX_BATCH events or MAX_DELAY seconds.
+# Serve it from an ASGI worker so a retry burst does not need a thread per request.
+WEBHOOK_INGRESS = {
+    "MAX_BATCH": 500,
+    "MAX_DELAY": 0.005,
+    "ACK_TIMEOUT": 5.0,
+}
+
+# Webhook redeliveries are dropped before any log write or ledger lock
+# (see webhooks/dedup.py): recent keys from a per-process LRU, the rest from
+# the unique transactions.WebhookReceipt index.
+WEBHOOK_DEDUP = {
+    "MAX_KEYS": 100_000,
+}
+
+# Log retention (see infrastructure/partitions.py). On Postgres, webhook logs
+# are partitioned by day; expired partitions are exported to ARCHIVE_DIR as
+# JSONL.gz and dropped. Payload bodies (keyed on their digest) are exported
+# and deleted in batches instead. Runs hourly on Celery beat,
+# or by hand with `manage.py maintain_partitions [--dry-run]`.
+LOG_PARTITIONING = {
+    "TABLES": {
+        "transactions.WebhookLog": {"INTERVAL": "day", "RETENTION_DAYS": 90, "ARCHIVE": True},
+        "transactions.WebhookPayload": {"INTERVAL": None, "RETENTION_DAYS": 90, "ARCHIVE": True},
+        "transactions.WebhookReceipt": {"INTERVAL": None, "RETENTION_DAYS": 30, "ARCHIVE": False},
+    },
+    "PREMAKE": 7,
+    "ARCHIVE_DIR": env("LOG_ARCHIVE_DIR", default=str(BASE_DIR / "archive")),
+}
+
+CELERY_BEAT_SCHEDULE = {
+    "maintain-log-partitions": {
+        "task": "transactions.maintain_partitions",
+        "schedule": 60 * 60,
+    },
+    "prune-analytics-rollups": {
+        "task": "analytics.prune_rollups",
+        "schedule": 60 * 60,
+    },
+}
+
+# Provider call metrics (see infrastructure/metrics.py), scraped from /metrics.
+# Every worker process on a host writes snapshots to DIR, and any worker
+# answers the scrape with the sum. Scrapes are accepted from
+# ALLOWED_NETWORKS, or from anywhere with the bearer AUTH_TOKEN.
+METRICS = {
+    "DIR": env("METRICS_DIR", default="/tmp/payinfra-metrics"),
+    "FLUSH_INTERVAL": 5.0,
+    "AUTH_TOKEN": env("METRICS_AUTH_TOKEN", default=None),
+    "ALLOWED_NETWORKS": env.list("METRICS_ALLOWED_NETWORKS", default=["127.0.0.0/8", "::1/128"]),
+}
+
+# Provider analytics (see analytics/rollups.py): webhook events and provider
+# calls are folded into minute/hour/day rollups, served by /v1/analytics/.
+ANALYTICS_ROLLUPS = {
+    "FLUSH_INTERVAL": 10.0,
+    "RETENTION_DAYS": {"minute": 2, "hour": 90, "day": None},
+}
+
+# Cached provider lookups (see infrastructure/cache.py): bank lists and
+# account name resolution, shared through CACHES["default"]. NEGATIVE_TTL
+# covers definitive misses such as an unknown account number.
+RESPONSE_CACHE = {
+    "CACHE_ALIAS": "default",
+    "CACHES": {
+        "banks": {"TTL": 24 * 60 * 60, "NEGATIVE_TTL": 60},
+        "accounts": {"TTL": 6 * 60 * 60, "NEGATIVE_TTL": 10 * 60},
+    },
+}
+
+# Provider instances are built once per credential set and reused
+# (connectors/payments/providers/registry.py).
+PROVIDER_REGISTRY = {
+    "MAX_ENTRIES": 512,
+    "TTL_SECONDS": 60 * 60,
+}
+
+# Nomba access tokens (see connectors/payments/nomba/tokens.py): one per
+# account, shared by all workers through CACHES["default"] and renewed in
+# the background REFRESH_MARGIN seconds before expiry.
+NOMBA_TOKENS = {
+    "CACHE_ALIAS": "default",
+    "REFRESH_MARGIN": 300,
+}
+
+# Streaming per-bank health (routing/banks.py). Transfers, account lookups
+# and webhook-reported charges are counted per (provider, bank); a provider
+# failing for a bank ranks lower for requests to that bank.
+BANK_HEALTH = {
+    "WINDOW_SECONDS": 600,
+    "MIN_SAMPLES": 10,
+    "FAILURE_RATE": 0.3,
+    "PENALTY": 1.0,
+}
+
+# Merchants' own provider keys (merchants/credentials.py), held in memory
+# per worker. Saving a MerchantAPIKey applies at once in that process and
+# within CHECK_INTERVAL seconds in the others.
+MERCHANT_CREDENTIALS = {
+    "MAX_MERCHANTS": 10_000,
+    "CHECK_INTERVAL": 5.0,
+}
+
+# Merchant API keys (merchants/authentication.py), sent as
+# "Authorization: Api-Key <key>". Resolved keys are held in memory per
+# worker; revoking one applies everywhere within CHECK_INTERVAL seconds.
+MERCHANT_API_KEYS = {
+    "MAX_KEYS": 10_000,
+    "CHECK_INTERVAL": 5.0,
+    "TTL_SECONDS": 10 * 60,
+}
+
+# Batch payment initialization, POST /v1/transactions/batch/ (see
+# transactions/batch.py). Up to MAX_ITEMS payments per request, CONCURRENCY
+# provider calls at a time; results stream back as NDJSON.
+BATCH_PAYMENTS = {
+    "MAX_ITEMS": 500,
+    "CONCURRENCY": 16,
+    "ITEM_TIMEOUT": 60.0,
+}
+
+# Ids and references (infrastructure/ids.py): merchant and profile ids come
+# from Postgres sequences (a table on other databases) in blocks of 100,
+# payment references from an in-memory snowflake generator. Each process
+# leases a snowflake worker id unless SNOWFLAKE_WORKER_ID is set.
+IDS = {
+    "ALLOCATOR": "infrastructure.ids.BlockAllocator",
+    "SNOWFLAKE_WORKER_ID": None,
+}
+
+# Envelope encryption of stored secrets (infrastructure/encryption.py). The
+# key file holds the master keys; create or rotate it with
+# `manage.py rotate_encryption_keys --new-master-key` and keep it out of git.
+ENCRYPTION = {
+    "KEY_FILE": env("ENCRYPTION_KEY_FILE", default=str(BASE_DIR / "keys" / "master.key")),
+    "DATA_KEY_LIFETIME": 60 * 60,
+    "DATA_KEY_CACHE_TTL": 60 * 60,
+}
+
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Pay Infra Terminal API",
     "DESCRIPTION": "API documentation",
@@ -221,7 +502,9 @@ SPECTACULAR_SETTINGS = {
 LOGS_DIR = BASE_DIR / 'logs'
 LOGS_DIR.mkdir(exist_ok=True, parents=True)
 
-# Logging configuration
+# Logging configuration. File output is JSON lines, written by a background
+# thread (infrastructure/logging.py); routine connector request logs are
+# sampled at LOG_SAMPLE_RATE, warnings and errors are always kept.
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -231,21 +514,40 @@ LOGGING = {
             'style': '{',
         },
         'simple': {
-            'format': '{levelname} {message}',
+            '()': 'infrastructure.logging.RedactingFormatter',
+            'fmt': '{levelname} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'infrastructure.logging.JSONFormatter',
+        },
+    },
+    'filters': {
+        'sampling': {
+            '()': 'infrastructure.logging.SamplingFilter',
+            # Connector modules log under connectors.payments.*, or payments.*
+            # when imported through the connectors/ path entry.
+            'rates': {
+                'connectors': env.float('LOG_SAMPLE_RATE', default=0.1),
+                'payments': env.float('LOG_SAMPLE_RATE', default=0.1),
+            },
+        },
     },
     'handlers': {
         'console': {
             'level': 'INFO',
-            'class': 'logging.StreamHandler',
-            'formatter': 'simple'
+            'class': 'infrastructure.logging.BackgroundHandler',
+            'handler': 'logging.StreamHandler',
+            'formatter': 'simple',
+            'filters': ['sampling'],
         },
         'file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
+            'class': 'infrastructure.logging.BackgroundHandler',
+            'handler': 'logging.handlers.WatchedFileHandler',
             'filename': LOGS_DIR / 'django.log',
-            'formatter': 'verbose'
+            'formatter': 'json',
+            'filters': ['sampling'],
         },
     },
     'loggers': {
@@ -264,6 +566,20 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'my_logger': {
+            'handlers': ['console', 'file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'connectors': {
+            'handlers': ['console', 'file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'payments': {
+            'handlers': ['console', 'file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     }
 }
-
@@ -17,6 +17,7 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from analytics.views import metrics
 from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularRedocView,
@@ -28,10 +29,12 @@ urlpatterns = [
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path("doc/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
     path("redoc/", SpectacularRedocView.as_view(url_name="schema"), name="redoc"),
+    path("metrics", metrics, name="metrics"),
 
     path('v1/accounts/', include('accounts.urls')),
     path('v1/merchants/', include('merchants.urls')),
     path('v1/notifications/', include('notifications.urls')),
     path('v1/analytics/', include('analytics.urls')),
     path('v1/transactions/', include('transactions.urls')),
+    path('v1/webhooks/', include('webhooks.urls')),
 ]
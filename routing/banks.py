@@ -0,0 +1,281 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from routing.scoring import classify_error
+
+log = logging.getLogger("my_logger")
+
+
+DEFAULT_BANK_HEALTH_CONFIG = {
+    # Counts cover the last WINDOW_SECONDS (at least half of it right after a
+    # rotation, see BankHealthTracker).
+    "WINDOW_SECONDS": 600,
+    # Count-min sketch size: estimates overshoot by at most ~e/WIDTH of the
+    # window's calls, with probability 1 - e^-DEPTH.
+    "SKETCH_WIDTH": 2048,
+    "SKETCH_DEPTH": 4,
+    # Failing (provider, bank, reason) keys kept as candidates for degraded();
+    # a bank whose failures fall outside the top K is not flagged.
+    "TOP_K": 64,
+    # A (provider, bank) pair is degraded once it has MIN_SAMPLES calls in the
+    # window and at least FAILURE_RATE of them failed.
+    "MIN_SAMPLES": 10,
+    "FAILURE_RATE": 0.3,
+    # Calls slower than this count as slow (reported, not scored).
+    "SLOW_SECONDS": 5.0,
+    # Subtracted from a provider's routing score for a degraded bank, scaled
+    # by the failure rate (scores are roughly 0..1.3, see ProviderScorer).
+    "PENALTY": 1.0,
+}
+
+
+def get_bank_health_config() -> dict:
+    config = dict(DEFAULT_BANK_HEALTH_CONFIG)
+    config.update(getattr(settings, "BANK_HEALTH", {}) or {})
+    return config
+
+
+class CountMinSketch:
+    """
+    Approximate counts for an unbounded key space in ``width * depth``
+    counters. Each key increments one counter per row; its estimate is the
+    smallest of them, which never undercounts.
+    """
+
+    __slots__ = ("width", "depth", "rows")
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.rows = [[0] * width for _ in range(depth)]
+
+    def _indexes(self, key):
+        # Double hashing: one hash() call yields every row's index. Keys are
+        # only compared within this process, so hash randomisation is fine.
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, key, count: int = 1):
+        for row, index in zip(self.rows, self._indexes(key)):
+            row[index] += count
+
+    def estimate(self, key) -> int:
+        return min(row[index] for row, index in zip(self.rows, self._indexes(key)))
+
+
+class SpaceSaving:
+    """
+    Heavy hitters (Metwally et al.): the ``capacity`` most frequent keys of a
+    stream, in bounded memory. A new key replaces the current minimum and
+    inherits its count as the error bound, so every key more frequent than
+    total / capacity is guaranteed to be present.
+    """
+
+    __slots__ = ("capacity", "counts", "errors")
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+
+    def add(self, key, count: int = 1):
+        if key in self.counts:
+            self.counts[key] += count
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[key] = count
+            self.errors[key] = 0
+            return
+        # O(capacity), and only for keys outside the current top K.
+        victim = min(self.counts, key=self.counts.__getitem__)
+        floor = self.counts.pop(victim)
+        del self.errors[victim]
+        self.counts[key] = floor + count
+        self.errors[key] = floor
+
+    def top(self, n: int | None = None) -> list:
+        """``(key, count, error)`` tuples, most frequent first."""
+        ranked = sorted(self.counts.items(), key=lambda item: -item[1])[:n]
+        return [(key, count, self.errors[key]) for key, count in ranked]
+
+
+class _Generation:
+    __slots__ = ("epoch", "calls", "failures", "slow", "failing")
+
+    def __init__(self, epoch: int, config: dict):
+        self.epoch = epoch
+        self.calls = CountMinSketch(config["SKETCH_WIDTH"], config["SKETCH_DEPTH"])
+        self.failures = CountMinSketch(config["SKETCH_WIDTH"], config["SKETCH_DEPTH"])
+        self.slow = CountMinSketch(config["SKETCH_WIDTH"], config["SKETCH_DEPTH"])
+        self.failing = SpaceSaving(config["TOP_K"])
+
+
+class BankHealthTracker:
+    """
+    Per-bank success, latency and failure reasons for calls that name a
+    destination or issuing bank (account resolution, transfers, charges
+    reported by webhooks), in memory of a fixed size.
+
+    Calls, failures and slow calls per ``(provider, bank)`` go into count-min
+    sketches; failures per ``(provider, bank, reason)`` into a space-saving
+    top-K, which supplies the candidates for ``degraded``. Two generations of
+    each are kept, each covering half the window: on rotation the older one
+    is dropped, so estimates always cover between half and all of
+    ``WINDOW_SECONDS``.
+    """
+
+    def __init__(self, config: dict | None = None, clock=time.monotonic):
+        self.config = config or get_bank_health_config()
+        self.clock = clock
+        self.generation_seconds = self.config["WINDOW_SECONDS"] / 2
+        self._current = _Generation(self._epoch(), self.config)
+        self._previous = None
+        self._lock = threading.Lock()
+
+    def _epoch(self) -> int:
+        return int(self.clock() // self.generation_seconds)
+
+    def _rotate(self):
+        # Call with self._lock held.
+        epoch = self._epoch()
+        if epoch == self._current.epoch:
+            return
+        self._previous = self._current if epoch == self._current.epoch + 1 else None
+        self._current = _Generation(epoch, self.config)
+
+    def _generations(self) -> list:
+        return [self._current] if self._previous is None else [self._current, self._previous]
+
+    @staticmethod
+    def _key(provider: str, bank_code) -> tuple:
+        return (provider.lower(), str(bank_code))
+
+    def record(
+        self,
+        provider: str,
+        bank_code,
+        *,
+        success: bool,
+        latency: float | None = None,
+        reason: str | None = None,
+    ):
+        """Count one call for ``bank_code``; ``reason`` is an ``ERROR_CLASSES`` value."""
+        if not bank_code:
+            return
+        key = self._key(provider, bank_code)
+        with self._lock:
+            self._rotate()
+            generation = self._current
+            generation.calls.add(key)
+            if latency is not None and latency > self.config["SLOW_SECONDS"]:
+                generation.slow.add(key)
+            if not success:
+                generation.failures.add(key)
+                generation.failing.add(key + (reason or "other",))
+
+    def _estimate(self, key: tuple) -> tuple[int, int, int]:
+        # Call with self._lock held.
+        calls = failures = slow = 0
+        for generation in self._generations():
+            calls += generation.calls.estimate(key)
+            failures += generation.failures.estimate(key)
+            slow += generation.slow.estimate(key)
+        # Both sketches overestimate independently; a rate above 1 means noise.
+        return calls, min(failures, calls), min(slow, calls)
+
+    def failure_rate(self, provider: str, bank_code) -> float | None:
+        """Estimated failure rate, or None below ``MIN_SAMPLES`` calls."""
+        if not bank_code:
+            return None
+        with self._lock:
+            self._rotate()
+            calls, failures, _ = self._estimate(self._key(provider, bank_code))
+        if calls < self.config["MIN_SAMPLES"]:
+            return None
+        return failures / calls
+
+    def penalty(self, provider: str, bank_code) -> float:
+        """What to subtract from ``provider``'s routing score for this bank."""
+        rate = self.failure_rate(provider, bank_code)
+        if rate is None or rate < self.config["FAILURE_RATE"]:
+            return 0.0
+        return self.config["PENALTY"] * rate
+
+    def degraded(self, provider: str | None = None) -> list[dict]:
+        """
+        Degraded ``(provider, bank)`` pairs, worst first, with their estimated
+        counts and leading failure reasons.
+        """
+        with self._lock:
+            self._rotate()
+            reasons = {}
+            for generation in self._generations():
+                for (name, bank, reason), count, _ in generation.failing.top():
+                    if provider is None or name == provider.lower():
+                        pair = reasons.setdefault((name, bank), {})
+                        pair[reason] = pair.get(reason, 0) + count
+            estimates = {pair: self._estimate(pair) for pair in reasons}
+
+        results = []
+        for (name, bank), (calls, failures, slow) in estimates.items():
+            if calls < self.config["MIN_SAMPLES"] or failures / calls < self.config["FAILURE_RATE"]:
+                continue
+            results.append({
+                "provider": name,
+                "bank": bank,
+                "calls": calls,
+                "failures": failures,
+                "slow": slow,
+                "failure_rate": round(failures / calls, 4),
+                "reasons": dict(sorted(reasons[(name, bank)].items(), key=lambda item: -item[1])),
+            })
+        results.sort(key=lambda entry: -entry["failure_rate"])
+        return results
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_bank_health_tracker() -> BankHealthTracker:
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = BankHealthTracker()
+    return _tracker
+
+
+@contextmanager
+def observe_bank_call(provider: str, bank_code):
+    """
+    Record the outcome and latency of one provider call for ``bank_code``
+    (sync or inside a coroutine). Does nothing without a bank code.
+    """
+    started = time.perf_counter()
+    # Stays None when the call is cancelled: that says nothing about the bank.
+    success = reason = None
+    try:
+        yield
+    except Exception as e:
+        success, reason = False, classify_error(e)
+        raise
+    else:
+        success = True
+    finally:
+        if success is not None:
+            try:
+                get_bank_health_tracker().record(
+                    provider,
+                    bank_code,
+                    success=success,
+                    latency=time.perf_counter() - started,
+                    reason=reason,
+                )
+            except Exception as e:
+                log.warning(f"Recording bank health for {provider}/{bank_code} failed: {e}")
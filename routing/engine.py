@@ -0,0 +1,159 @@
+import logging
+import threading
+
+from django.conf import settings
+
+from routing.rules import RoutingRules
+from routing.scoring import ProviderScorer, SlidingWindowStats
+
+log = logging.getLogger("my_logger")
+
+
+# Subtracted from the score of a provider whose "initialize" circuit breaker
+# is open: it sinks to the bottom of the ranking but is not removed, so the
+# failover executor still has something to try if every breaker is open.
+OPEN_CIRCUIT_PENALTY = 10.0
+
+DEFAULT_ROUTING_CONFIG = {
+    "WINDOW_SECONDS": 300,
+    "BUCKETS": 30,
+    # Below this many samples for a (provider, currency, method) key the
+    # provider-wide window is used instead.
+    "MIN_SAMPLES": 20,
+    "WEIGHTS": {},
+    "PROVIDERS": {},
+}
+
+
+def get_routing_config() -> dict:
+    config = dict(DEFAULT_ROUTING_CONFIG)
+    config.update(getattr(settings, "PAYMENT_ROUTING", {}) or {})
+    return config
+
+
+class RoutingEngine:
+    """
+    Ranks payment providers per request from live, in-memory statistics.
+
+    Every outcome is recorded twice: under ``(provider, currency, method)``
+    and under the provider as a whole. Ranking scores each eligible provider
+    from the most specific window that has enough samples, so one decision
+    touches a fixed number of counters regardless of traffic. Providers whose
+    initialize circuit breaker is open are ranked last, and with a
+    ``bank_code`` a provider currently failing for that bank is penalised
+    (routing/banks.py).
+    """
+
+    def __init__(self, providers: list[str], config: dict | None = None, breakers=None, banks=None):
+        self.config = config or get_routing_config()
+        self.breakers = breakers
+        self.banks = banks
+        self.providers = list(providers)
+        self.rules = RoutingRules(self.providers, self.config["PROVIDERS"])
+        self.scorer = ProviderScorer(**{k.lower(): v for k, v in self.config["WEIGHTS"].items()})
+        self.min_samples = self.config["MIN_SAMPLES"]
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _window(self, key) -> SlidingWindowStats:
+        stats = self._stats.get(key)
+        if stats is None:
+            with self._lock:
+                stats = self._stats.get(key)
+                if stats is None:
+                    stats = SlidingWindowStats(
+                        window_seconds=self.config["WINDOW_SECONDS"],
+                        buckets=self.config["BUCKETS"],
+                    )
+                    self._stats[key] = stats
+        return stats
+
+    @staticmethod
+    def _key(provider, currency=None, payment_method=None):
+        return (provider, (currency or "").upper(), (payment_method or "").lower())
+
+    def record(
+        self,
+        provider: str,
+        *,
+        success: bool,
+        latency: float | None = None,
+        error_class: str | None = None,
+        currency: str | None = None,
+        payment_method: str | None = None,
+    ):
+        """Feed the outcome of one provider call back into the scorer."""
+        self._window(self._key(provider, currency, payment_method)).record(success, latency, error_class)
+        self._window(self._key(provider)).record(success, latency, error_class)
+
+    def score(
+        self,
+        provider: str,
+        currency: str | None = None,
+        payment_method: str | None = None,
+        bank_code: str | None = None,
+    ) -> float:
+        snapshot = self._window(self._key(provider, currency, payment_method)).snapshot()
+        if snapshot["total"] < self.min_samples:
+            snapshot = self._window(self._key(provider)).snapshot()
+        score = self.scorer.score(snapshot, bias=self.rules.bias(provider))
+        if self.breakers is not None and self.breakers.is_open(provider, "initialize"):
+            score -= OPEN_CIRCUIT_PENALTY
+        if bank_code and self.banks is not None:
+            score -= self.banks.penalty(provider, bank_code)
+        return score
+
+    def rank(
+        self,
+        currency: str | None = None,
+        payment_method: str | None = None,
+        bank_code: str | None = None,
+    ) -> list[str]:
+        """
+        Return the eligible providers for this request, best first.
+        ``bank_code`` is the destination (or issuing) bank, when known.
+        """
+        eligible = self.rules.eligible(currency, payment_method)
+        if len(eligible) <= 1:
+            return list(eligible)
+        scores = {name: self.score(name, currency, payment_method, bank_code) for name in eligible}
+        # Ties keep PAYMENT_PROVIDERS order so behaviour is stable on cold start.
+        return sorted(eligible, key=lambda name: -scores[name])
+
+    def select(
+        self,
+        currency: str | None = None,
+        payment_method: str | None = None,
+        bank_code: str | None = None,
+    ) -> str | None:
+        ranked = self.rank(currency, payment_method, bank_code)
+        return ranked[0] if ranked else None
+
+    def health(self) -> dict:
+        """Provider-wide window snapshots, for dashboards and debugging."""
+        return {name: self._window(self._key(name)).snapshot() for name in self.providers}
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_routing_engine() -> RoutingEngine:
+    """
+    Process-wide routing engine over the registered ``PAYMENT_PROVIDERS``.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                from connectors.payments.providers import PAYMENT_PROVIDERS
+                from infrastructure.circuit_breaker import get_breaker_registry
+                from routing.banks import get_bank_health_tracker
+
+                _engine = RoutingEngine(
+                    list(PAYMENT_PROVIDERS.keys()),
+                    breakers=get_breaker_registry(),
+                    banks=get_bank_health_tracker(),
+                )
+                log.info(f"Routing engine initialised for providers: {_engine.providers}")
+    return _engine
@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from django.conf import settings
+
+from infrastructure.http import request_deadline
+from routing.scoring import classify_error
+
+log = logging.getLogger("my_logger")
+
+
+DEFAULT_FAILOVER_CONFIG = {
+    # Hard budget for the whole call, across every provider attempted.
+    "TOTAL_DEADLINE": 15.0,
+    "MAX_ATTEMPTS": 3,
+    # Never start an attempt with less time than this; it would only time out.
+    "MIN_ATTEMPT_TIMEOUT": 2.0,
+    # Upper bound for a single attempt, even when the budget allows more.
+    "MAX_ATTEMPT_TIMEOUT": 8.0,
+}
+
+# Client errors that will fail the same way on any provider.
+NON_RETRIABLE_STATUS_CODES = {400, 409, 422}
+
+
+def get_failover_config() -> dict:
+    config = dict(DEFAULT_FAILOVER_CONFIG)
+    config.update(getattr(settings, "PAYMENT_FAILOVER", {}) or {})
+    return config
+
+
+class InvalidPaymentRequest(ValueError):
+    """The request itself is invalid, so every provider would reject it."""
+
+
+class ProviderResponseError(Exception):
+    """A provider answered, but without a usable result (e.g. no payment link)."""
+
+    def __init__(self, message: str, status_code: int | None = None, response_data: dict | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response_data = response_data or {}
+
+
+@dataclass
+class Attempt:
+    provider: str
+    timeout: float
+    latency: float = 0.0
+    error: str | None = None
+    error_class: str | None = None
+
+
+class FailoverExhausted(Exception):
+    """Every eligible provider failed (or the deadline ran out)."""
+
+    def __init__(self, attempts: list[Attempt], message: str = "All payment providers failed"):
+        super().__init__(message)
+        self.message = message
+        self.attempts = attempts
+
+    def __str__(self):
+        tried = ", ".join(f"{a.provider}: {a.error_class}" for a in self.attempts) or "none"
+        return f"{self.message} ({tried})"
+
+
+class FailoverAborted(Exception):
+    """
+    An attempt failed in a way every other provider would too (an invalid
+    request, or a 400/409/422 answer), so no further provider was tried.
+    ``error`` is that attempt's exception.
+    """
+
+    def __init__(self, attempts: list[Attempt], error: Exception):
+        super().__init__(str(error))
+        self.attempts = attempts
+        self.error = error
+
+
+class FailoverExecutor:
+    """
+    Runs one logical operation against ranked providers until one succeeds.
+
+    The whole call is bounded by ``TOTAL_DEADLINE``. Each attempt gets the
+    smaller of ``MAX_ATTEMPT_TIMEOUT`` and what is left of the budget after
+    reserving ``MIN_ATTEMPT_TIMEOUT`` for every attempt still to come, and that
+    timeout is enforced on the connector's HTTP call through
+    ``infrastructure.http.request_deadline``.
+
+    Callers must pass the same idempotent reference to every attempt, so a
+    late success on an abandoned provider resolves to the same transaction.
+    """
+
+    def __init__(self, engine=None, config: dict | None = None):
+        self.engine = engine
+        self.config = config or get_failover_config()
+
+    def _attempt_timeout(self, remaining: float, attempts_left: int) -> float:
+        reserve = self.config["MIN_ATTEMPT_TIMEOUT"] * (attempts_left - 1)
+        return min(self.config["MAX_ATTEMPT_TIMEOUT"], max(remaining - reserve, self.config["MIN_ATTEMPT_TIMEOUT"]))
+
+    @staticmethod
+    def _is_retriable(exc: Exception) -> bool:
+        # Any other error, including a provider that cannot be built (e.g. a
+        # missing secret key raises ValueError), only rules out that provider.
+        if isinstance(exc, InvalidPaymentRequest):
+            return False
+        return getattr(exc, "status_code", None) not in NON_RETRIABLE_STATUS_CODES
+
+    def execute(
+        self,
+        providers: list[str],
+        call: Callable[[str], Any],
+        *,
+        currency: str | None = None,
+        payment_method: str | None = None,
+    ) -> tuple[str, Any]:
+        """
+        Call ``call(provider_name)`` for each provider in order.
+
+        ``call`` must raise on failure. Returns ``(provider_name, result)`` of
+        the first success; raises ``FailoverAborted`` on a non-retriable
+        error and ``FailoverExhausted`` otherwise.
+        """
+        candidates = providers[: self.config["MAX_ATTEMPTS"]]
+        deadline = time.monotonic() + self.config["TOTAL_DEADLINE"]
+        attempts = []
+
+        for position, provider in enumerate(candidates):
+            attempt = self._next_attempt(provider, position, candidates, deadline, attempts)
+            if attempt is None:
+                break
+
+            started = time.monotonic()
+            try:
+                with request_deadline(attempt.timeout):
+                    result = call(provider)
+            except Exception as e:
+                if not self._failed(attempt, started, e, currency, payment_method):
+                    raise FailoverAborted(attempts, e) from e
+                continue
+
+            self._succeeded(attempt, started, position, currency, payment_method)
+            return provider, result
+
+        raise FailoverExhausted(attempts=attempts)
+
+    def _next_attempt(self, provider, position, candidates, deadline, attempts) -> Attempt | None:
+        remaining = deadline - time.monotonic()
+        if remaining < self.config["MIN_ATTEMPT_TIMEOUT"]:
+            log.warning(f"Failover budget exhausted before trying {provider}")
+            return None
+
+        timeout = self._attempt_timeout(remaining, len(candidates) - position)
+        attempt = Attempt(provider=provider, timeout=timeout)
+        attempts.append(attempt)
+        return attempt
+
+    def _failed(self, attempt, started, exc, currency, payment_method) -> bool:
+        """Record a failed attempt; returns whether the next provider should be tried."""
+        attempt.latency = time.monotonic() - started
+        attempt.error = str(exc)
+        attempt.error_class = classify_error(exc)
+        self._record(attempt.provider, False, attempt, currency, payment_method)
+        log.warning(
+            f"Provider {attempt.provider} failed after {attempt.latency:.2f}s "
+            f"({attempt.error_class}): {exc}"
+        )
+        return self._is_retriable(exc)
+
+    def _succeeded(self, attempt, started, position, currency, payment_method):
+        attempt.latency = time.monotonic() - started
+        self._record(attempt.provider, True, attempt, currency, payment_method)
+        if position:
+            log.info(f"Failover succeeded on {attempt.provider} after {position} failed attempt(s)")
+
+    def _record(self, provider, success, attempt, currency, payment_method):
+        if self.engine is None:
+            return
+        self.engine.record(
+            provider,
+            success=success,
+            latency=attempt.latency,
+            error_class=attempt.error_class,
+            currency=currency,
+            payment_method=payment_method,
+        )
+
+
+class AsyncFailoverExecutor(FailoverExecutor):
+    """
+    ``FailoverExecutor`` for coroutines: ``call(provider_name)`` returns an
+    awaitable, and each attempt is also cancelled once its timeout passes.
+    """
+
+    async def execute(
+        self,
+        providers: list[str],
+        call: Callable[[str], Awaitable[Any]],
+        *,
+        currency: str | None = None,
+        payment_method: str | None = None,
+    ) -> tuple[str, Any]:
+        candidates = providers[: self.config["MAX_ATTEMPTS"]]
+        deadline = time.monotonic() + self.config["TOTAL_DEADLINE"]
+        attempts = []
+
+        for position, provider in enumerate(candidates):
+            attempt = self._next_attempt(provider, position, candidates, deadline, attempts)
+            if attempt is None:
+                break
+
+            started = time.monotonic()
+            try:
+                with request_deadline(attempt.timeout):
+                    result = await asyncio.wait_for(call(provider), attempt.timeout)
+            except Exception as e:
+                if not self._failed(attempt, started, e, currency, payment_method):
+                    raise FailoverAborted(attempts, e) from e
+                continue
+
+            self._succeeded(attempt, started, position, currency, payment_method)
+            return provider, result
+
+        raise FailoverExhausted(attempts=attempts)
@@ -0,0 +1,188 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+
+from infrastructure.metrics import get_hedge_metrics
+from routing.scoring import SlidingWindowStats
+
+log = logging.getLogger("my_logger")
+
+
+DEFAULT_HEDGING_CONFIG = {
+    # Hedging is opt-in: it roughly doubles the load of the slowest calls.
+    "ENABLED": False,
+    "WINDOW_SECONDS": 300,
+    "BUCKETS": 30,
+    # Hedges may be at most this fraction of calls over the window.
+    "MAX_HEDGE_RATE": 0.1,
+    # Until this many latencies are seen, DEFAULT_DELAY is used instead of p95.
+    "MIN_SAMPLES": 20,
+    "DEFAULT_DELAY": 1.0,
+    "MIN_DELAY": 0.05,
+    # Threads shared by all hedged calls (each call uses up to two).
+    "MAX_WORKERS": 32,
+}
+
+
+def get_hedging_config() -> dict:
+    config = dict(DEFAULT_HEDGING_CONFIG)
+    config.update(getattr(settings, "PAYMENT_HEDGING", {}) or {})
+    return config
+
+
+class RequestHedger:
+    """
+    Hedged requests for idempotent reads (e.g. payment verification).
+
+    The call is sent once; if it has not answered by the provider's rolling
+    p95 latency, an identical second call is sent and the first successful
+    answer wins. Hedges are capped at ``MAX_HEDGE_RATE`` of calls, so a slow
+    provider cannot double its own load.
+
+    Per provider, two sliding windows are kept: the latency of every call
+    (including abandoned ones, so p95 is not biased toward winners) and the
+    hedges fired, counting a hedge as "successful" when it beat the original.
+    Hedges and their delays are also exported on ``/metrics``.
+    """
+
+    def __init__(self, config: dict | None = None):
+        self.config = config or get_hedging_config()
+        self.enabled = self.config["ENABLED"]
+        self._latency = {}
+        self._hedges = {}
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _windows(self, name):
+        latency = self._latency.get(name)
+        if latency is None:
+            with self._lock:
+                latency = self._latency.get(name)
+                if latency is None:
+                    self._hedges[name] = SlidingWindowStats(self.config["WINDOW_SECONDS"], self.config["BUCKETS"])
+                    latency = SlidingWindowStats(self.config["WINDOW_SECONDS"], self.config["BUCKETS"])
+                    self._latency[name] = latency
+        return latency, self._hedges[name]
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.config["MAX_WORKERS"], thread_name_prefix="hedge"
+                    )
+        return self._pool
+
+    def hedge_delay(self, name: str) -> float:
+        """How long to wait for the first call before hedging."""
+        snapshot = self._windows(name)[0].snapshot()
+        if snapshot["total"] < self.config["MIN_SAMPLES"] or snapshot["p95"] is None:
+            return self.config["DEFAULT_DELAY"]
+        return max(snapshot["p95"], self.config["MIN_DELAY"])
+
+    def _may_hedge(self, name: str) -> bool:
+        latency, hedges = self._windows(name)
+        calls = latency.snapshot()["total"]
+        return hedges.snapshot()["total"] < self.config["MAX_HEDGE_RATE"] * max(calls, 1)
+
+    def _record_latency(self, name, started, success):
+        self._windows(name)[0].record(success, time.monotonic() - started)
+
+    def _submit(self, name, func):
+        started = time.monotonic()
+        # Each thread gets its own copy of the caller's context, so request
+        # deadlines (infrastructure.http.request_deadline) still apply.
+        future = self.pool.submit(contextvars.copy_context().run, func)
+        future.add_done_callback(lambda f: self._record_latency(name, started, f.exception() is None))
+        return future
+
+    def call(self, name: str, func):
+        """
+        Run ``func()`` for provider ``name``, hedging it when it is slow.
+
+        ``func`` must be safe to run twice concurrently.
+        """
+        if not self.enabled:
+            return func()
+
+        primary = self._submit(name, func)
+        delay = self.hedge_delay(name)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._may_hedge(name):
+            return primary.result()
+
+        hedge = self._submit(name, func)
+        pending = {primary, hedge}
+        first_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self._record_hedge(name, delay, hedge_won=future is hedge)
+                    return future.result()
+                first_error = first_error or future.exception()
+        self._record_hedge(name, delay, hedge_won=False)
+        raise first_error
+
+    async def call_async(self, name: str, func):
+        """asyncio variant of ``call``; ``func`` returns a coroutine."""
+        if not self.enabled:
+            return await func()
+
+        loop = asyncio.get_running_loop()
+
+        def submit():
+            started = time.monotonic()
+            task = loop.create_task(func())
+            task.add_done_callback(
+                lambda t: self._record_latency(name, started, not t.cancelled() and t.exception() is None)
+            )
+            return task
+
+        primary = submit()
+        delay = self.hedge_delay(name)
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not self._may_hedge(name):
+            return await primary
+
+        hedge = submit()
+        pending = {primary, hedge}
+        first_error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    self._record_hedge(name, delay, hedge_won=task is hedge)
+                    return task.result()
+                first_error = first_error or task.exception()
+        self._record_hedge(name, delay, hedge_won=False)
+        raise first_error
+
+    def _record_hedge(self, name, delay, hedge_won):
+        self._windows(name)[1].record(hedge_won)
+        hedges_total, hedge_delay = get_hedge_metrics()
+        hedges_total.inc(name, "won" if hedge_won else "lost")
+        hedge_delay.observe(delay, name)
+        if hedge_won:
+            log.info(f"Hedged request to {name} won")
+
+
+_hedger = None
+_hedger_lock = threading.Lock()
+
+
+def get_request_hedger() -> RequestHedger:
+    global _hedger
+    if _hedger is None:
+        with _hedger_lock:
+            if _hedger is None:
+                _hedger = RequestHedger()
+    return _hedger
@@ -0,0 +1,69 @@
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class ProviderRule:
+    """
+    Static routing constraints for one provider.
+
+    ``currencies`` / ``payment_methods`` left empty mean "no restriction".
+    ``bias`` is added to the provider's score so operators can prefer a
+    provider (e.g. for pricing) without disabling the others.
+    """
+
+    provider: str
+    enabled: bool = True
+    currencies: frozenset = field(default_factory=frozenset)
+    payment_methods: frozenset = field(default_factory=frozenset)
+    bias: float = 0.0
+
+    @classmethod
+    def from_config(cls, provider: str, config: dict) -> "ProviderRule":
+        return cls(
+            provider=provider,
+            enabled=config.get("enabled", True),
+            currencies=frozenset(c.upper() for c in config.get("currencies", ())),
+            payment_methods=frozenset(m.lower() for m in config.get("payment_methods", ())),
+            bias=float(config.get("bias", 0.0)),
+        )
+
+    def supports(self, currency: str | None, payment_method: str | None) -> bool:
+        if not self.enabled:
+            return False
+        if currency and self.currencies and currency.upper() not in self.currencies:
+            return False
+        if payment_method and self.payment_methods and payment_method.lower() not in self.payment_methods:
+            return False
+        return True
+
+
+class RoutingRules:
+    """
+    Resolves which providers may serve a (currency, payment method) pair.
+
+    Results are memoised per pair, so after the first lookup eligibility is a
+    single dict access.
+    """
+
+    def __init__(self, providers: list[str], config: dict | None = None):
+        config = config or {}
+        self.rules = {
+            name: ProviderRule.from_config(name, config.get(name, {}))
+            for name in providers
+        }
+        self._eligible = {}
+
+    def eligible(self, currency: str | None = None, payment_method: str | None = None) -> tuple:
+        key = (currency and currency.upper(), payment_method and payment_method.lower())
+        eligible = self._eligible.get(key)
+        if eligible is None:
+            eligible = tuple(
+                name for name, rule in self.rules.items()
+                if rule.supports(currency, payment_method)
+            )
+            self._eligible[key] = eligible
+        return eligible
+
+    def bias(self, provider: str) -> float:
+        rule = self.rules.get(provider)
+        return rule.bias if rule else 0.0
@@ -0,0 +1,205 @@
+import math
+import threading
+import time
+
+# Upper bounds (seconds) of the latency histogram bins. Log-spaced so p50/p95
+# stay within ~25% of the true value from 25ms up to a minute.
+LATENCY_BOUNDS = (
+    0.025, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5, 0.75,
+    1.0, 1.5, 2.0, 3.0, 4.0, 5.0, 7.5, 10.0, 15.0, 20.0, 30.0, 60.0, math.inf,
+)
+
+ERROR_CLASSES = ("timeout", "network", "server_error", "client_error", "declined", "circuit_open", "other")
+
+
+def classify_error(exc: BaseException | None = None, status_code: int | None = None) -> str:
+    """
+    Map an exception or HTTP status code onto one of ``ERROR_CLASSES``.
+    """
+    if status_code is None and exc is not None:
+        status_code = getattr(exc, "status_code", None)
+        response = getattr(exc, "response", None)
+        if status_code is None and response is not None:
+            status_code = getattr(response, "status_code", None)
+
+    if status_code:
+        return "server_error" if status_code >= 500 else "client_error"
+
+    if exc is None:
+        return "declined"
+
+    name = type(exc).__name__.lower()
+    message = str(exc).lower()
+    if "circuit" in name:
+        return "circuit_open"
+    if "timeout" in name or "timed out" in message or "timeout" in message:
+        return "timeout"
+    if "connection" in name or "network" in name or "connection" in message:
+        return "network"
+    return "other"
+
+
+def _latency_bin(latency: float) -> int:
+    for index, bound in enumerate(LATENCY_BOUNDS):
+        if latency <= bound:
+            return index
+    return len(LATENCY_BOUNDS) - 1
+
+
+class _Bucket:
+    __slots__ = ("epoch", "total", "successes", "observed", "latency", "errors")
+
+    def __init__(self):
+        self.epoch = -1
+        self.total = 0
+        self.successes = 0
+        self.observed = 0
+        self.latency = [0] * len(LATENCY_BOUNDS)
+        self.errors = dict.fromkeys(ERROR_CLASSES, 0)
+
+
+class SlidingWindowStats:
+    """
+    Success rate, latency percentiles and error classes over a sliding window.
+
+    The window is a ring of ``buckets`` time slices. Running totals are kept
+    for the whole window and expired slices are subtracted as time moves on,
+    so both ``record`` and ``snapshot`` cost a bounded amount of work that
+    does not depend on traffic volume.
+    """
+
+    def __init__(self, window_seconds: float = 300, buckets: int = 30, clock=time.monotonic):
+        self.bucket_seconds = window_seconds / buckets
+        self.clock = clock
+        self._ring = [_Bucket() for _ in range(buckets)]
+        self._last_epoch = None
+        self._lock = threading.Lock()
+
+        self.total = 0
+        self.successes = 0
+        self.observed = 0
+        self.latency = [0] * len(LATENCY_BOUNDS)
+        self.errors = dict.fromkeys(ERROR_CLASSES, 0)
+
+    def _expire(self, bucket: _Bucket):
+        self.total -= bucket.total
+        self.successes -= bucket.successes
+        self.observed -= bucket.observed
+        for index, count in enumerate(bucket.latency):
+            if count:
+                self.latency[index] -= count
+                bucket.latency[index] = 0
+        for name, count in bucket.errors.items():
+            if count:
+                self.errors[name] -= count
+                bucket.errors[name] = 0
+        bucket.total = 0
+        bucket.successes = 0
+        bucket.observed = 0
+
+    def _advance(self, epoch: int) -> _Bucket:
+        size = len(self._ring)
+        if self._last_epoch is not None and epoch > self._last_epoch:
+            # Expire at most one full ring no matter how long we were idle.
+            start = max(self._last_epoch + 1, epoch - size + 1)
+            for stale in range(start, epoch + 1):
+                bucket = self._ring[stale % size]
+                if bucket.epoch != stale:
+                    self._expire(bucket)
+                    bucket.epoch = stale
+        elif self._last_epoch is None:
+            self._ring[epoch % size].epoch = epoch
+        if self._last_epoch is None or epoch > self._last_epoch:
+            self._last_epoch = epoch
+        return self._ring[self._last_epoch % size]
+
+    def record(self, success: bool, latency: float | None = None, error_class: str | None = None):
+        epoch = int(self.clock() / self.bucket_seconds)
+        with self._lock:
+            bucket = self._advance(epoch)
+            bucket.total += 1
+            self.total += 1
+            if success:
+                bucket.successes += 1
+                self.successes += 1
+            else:
+                name = error_class if error_class in self.errors else "other"
+                bucket.errors[name] += 1
+                self.errors[name] += 1
+            if latency is not None:
+                index = _latency_bin(latency)
+                bucket.observed += 1
+                self.observed += 1
+                bucket.latency[index] += 1
+                self.latency[index] += 1
+
+    def _percentile(self, fraction: float) -> float | None:
+        if not self.observed:
+            return None
+        target = fraction * self.observed
+        running = 0
+        for index, count in enumerate(self.latency):
+            running += count
+            if running >= target:
+                bound = LATENCY_BOUNDS[index]
+                return LATENCY_BOUNDS[index - 1] if math.isinf(bound) else bound
+        return LATENCY_BOUNDS[-2]
+
+    def snapshot(self) -> dict:
+        epoch = int(self.clock() / self.bucket_seconds)
+        with self._lock:
+            self._advance(epoch)
+            return {
+                "total": self.total,
+                "successes": self.successes,
+                "success_rate": (self.successes / self.total) if self.total else None,
+                "p50": self._percentile(0.50),
+                "p95": self._percentile(0.95),
+                "errors": {name: count for name, count in self.errors.items() if count},
+            }
+
+
+class ProviderScorer:
+    """
+    Turns a provider's window statistics into a single comparable score.
+
+    Higher is better. A cold provider is scored against a prior success rate
+    so that it still receives traffic and can build up history.
+    """
+
+    def __init__(
+        self,
+        success_weight: float = 1.0,
+        latency_weight: float = 0.3,
+        timeout_weight: float = 0.5,
+        latency_target: float = 2.0,
+        prior_success_rate: float = 0.9,
+        prior_weight: int = 10,
+    ):
+        self.success_weight = success_weight
+        self.latency_weight = latency_weight
+        self.timeout_weight = timeout_weight
+        self.latency_target = latency_target
+        self.prior_success_rate = prior_success_rate
+        self.prior_weight = prior_weight
+
+    def score(self, snapshot: dict, bias: float = 0.0) -> float:
+        total = snapshot["total"]
+        success_rate = (
+            (snapshot["successes"] + self.prior_success_rate * self.prior_weight)
+            / (total + self.prior_weight)
+        )
+
+        p95 = snapshot["p95"]
+        latency_score = 1.0 if p95 is None else 1.0 / (1.0 + p95 / self.latency_target)
+
+        errors = snapshot["errors"]
+        slow_failures = errors.get("timeout", 0) + errors.get("network", 0)
+        timeout_rate = slow_failures / total if total else 0.0
+
+        return (
+            self.success_weight * success_rate
+            + self.latency_weight * latency_score
+            - self.timeout_weight * timeout_rate
+            + bias
+        )
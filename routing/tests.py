@@ -0,0 +1,213 @@
+import asyncio
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from infrastructure.metrics import get_metrics_registry
+from routing.fallover import (
+    AsyncFailoverExecutor,
+    FailoverAborted,
+    FailoverExecutor,
+    FailoverExhausted,
+    InvalidPaymentRequest,
+    ProviderResponseError,
+)
+from routing.engine import RoutingEngine, get_routing_config
+from routing.hedging import RequestHedger, get_hedging_config
+from routing.scoring import SlidingWindowStats
+
+CONFIG = {"TOTAL_DEADLINE": 10.0, "MAX_ATTEMPTS": 3, "MIN_ATTEMPT_TIMEOUT": 0.1, "MAX_ATTEMPT_TIMEOUT": 1.0}
+
+
+def failing_with(errors):
+    """A ``call`` raising ``errors[provider]`` (returning "ok" without one), recording the order of calls."""
+    calls = []
+
+    def call(provider):
+        calls.append(provider)
+        if provider in errors:
+            raise errors[provider]
+        return "ok"
+
+    return call, calls
+
+
+class FailoverExecutorTests(SimpleTestCase):
+    def execute(self, errors, providers=("paystack", "flutterwave", "nomba")):
+        call, calls = failing_with(errors)
+        return FailoverExecutor(config=CONFIG).execute(list(providers), call), calls
+
+    def test_fails_over_on_a_server_error(self):
+        result, calls = self.execute({"paystack": ProviderResponseError("down", status_code=502)})
+
+        self.assertEqual(result, ("flutterwave", "ok"))
+        self.assertEqual(calls, ["paystack", "flutterwave"])
+
+    def test_provider_that_cannot_be_built_is_skipped(self):
+        result, calls = self.execute({"paystack": ValueError("Paystack secret key is missing in settings.")})
+
+        self.assertEqual(result, ("flutterwave", "ok"))
+
+    def test_client_error_stops_failover(self):
+        for status_code in (400, 409, 422):
+            with self.subTest(status_code=status_code):
+                call, calls = failing_with({"paystack": ProviderResponseError("bad email", status_code=status_code)})
+
+                with self.assertRaises(FailoverAborted) as aborted:
+                    FailoverExecutor(config=CONFIG).execute(["paystack", "flutterwave"], call)
+
+                self.assertEqual(calls, ["paystack"])
+                self.assertEqual(str(aborted.exception), "bad email")
+                self.assertEqual(aborted.exception.error.status_code, status_code)
+
+    def test_invalid_request_stops_failover(self):
+        call, calls = failing_with({"paystack": InvalidPaymentRequest("Email is required")})
+
+        with self.assertRaises(FailoverAborted):
+            FailoverExecutor(config=CONFIG).execute(["paystack", "flutterwave"], call)
+        self.assertEqual(calls, ["paystack"])
+
+    def test_exhausted_after_max_attempts(self):
+        error = ProviderResponseError("down", status_code=503)
+        call, calls = failing_with({"a": error, "b": error, "c": error, "d": error})
+
+        with self.assertRaises(FailoverExhausted) as exhausted:
+            FailoverExecutor(config=CONFIG).execute(["a", "b", "c", "d"], call)
+
+        self.assertEqual(calls, ["a", "b", "c"])
+        self.assertEqual([attempt.provider for attempt in exhausted.exception.attempts], ["a", "b", "c"])
+
+    def test_async_attempt_is_cancelled_at_its_timeout(self):
+        async def call(provider):
+            if provider == "slow":
+                await asyncio.sleep(5)
+            return provider
+
+        executor = AsyncFailoverExecutor(config={**CONFIG, "MAX_ATTEMPT_TIMEOUT": 0.1})
+        result = asyncio.run(executor.execute(["slow", "fast"], call))
+
+        self.assertEqual(result, ("fast", "fast"))
+
+
+class RequestHedgerTests(SimpleTestCase):
+    def setUp(self):
+        self.hedger = RequestHedger({
+            **get_hedging_config(), "ENABLED": True, "DEFAULT_DELAY": 0.01, "MAX_HEDGE_RATE": 1.0, "MAX_WORKERS": 2,
+        })
+        self.addCleanup(self.hedger.pool.shutdown, wait=False)
+
+    def hedges(self, provider):
+        counts = get_metrics_registry().snapshot().get("payinfra_hedged_requests_total", {})
+        return {outcome: counts.get((provider, outcome), 0) for outcome in ("won", "lost")}
+
+    def test_hedge_that_answers_first_wins_and_is_exported(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        calls = []
+
+        def verify():
+            calls.append(1)
+            if len(calls) == 1:
+                release.wait(5)  # the original call hangs
+                return "original"
+            return "hedge"
+
+        self.assertEqual(self.hedger.call("hedge-test", verify), "hedge")
+        self.assertEqual(self.hedges("hedge-test"), {"won": 1, "lost": 0})
+        self.assertIn('payinfra_hedge_delay_seconds_count{provider="hedge-test"} 1', get_metrics_registry().render())
+
+    def test_fast_call_is_not_hedged(self):
+        self.hedger.config["DEFAULT_DELAY"] = 5.0
+
+        self.assertEqual(self.hedger.call("hedge-fast", lambda: "ok"), "ok")
+        self.assertEqual(self.hedges("hedge-fast"), {"won": 0, "lost": 0})
+
+
+class SlidingWindowStatsTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.stats = SlidingWindowStats(window_seconds=10, buckets=10, clock=lambda: self.now)
+
+    def test_counts_and_percentiles(self):
+        for latency in (0.1,) * 18 + (5.0,) * 2:
+            self.stats.record(True, latency)
+        self.stats.record(False, error_class="timeout")
+
+        snapshot = self.stats.snapshot()
+        self.assertEqual((snapshot["total"], snapshot["successes"]), (21, 20))
+        self.assertEqual(snapshot["p50"], 0.1)
+        self.assertEqual(snapshot["p95"], 5.0)
+        self.assertEqual(snapshot["errors"], {"timeout": 1})
+
+    def test_slices_older_than_the_window_expire(self):
+        self.stats.record(False)
+        self.now = 5
+        self.stats.record(True)
+
+        self.now = 10.5
+        self.assertEqual(self.stats.snapshot()["total"], 1)
+        self.now = 100
+        self.assertEqual(self.stats.snapshot()["total"], 0)
+
+
+class RoutingEngineTests(SimpleTestCase):
+    def engine(self, breakers=None, **config):
+        return RoutingEngine(
+            ["paystack", "flutterwave", "nomba"],
+            config={**get_routing_config(), "MIN_SAMPLES": 5, "WEIGHTS": {}, "PROVIDERS": {}, **config},
+            breakers=breakers,
+        )
+
+    def record(self, engine, provider, successes, failures, **kwargs):
+        for success in [True] * successes + [False] * failures:
+            engine.record(provider, success=success, latency=0.2, **kwargs)
+
+    def test_cold_start_keeps_provider_order(self):
+        self.assertEqual(self.engine().rank("NGN"), ["paystack", "flutterwave", "nomba"])
+
+    def test_failing_provider_is_ranked_last(self):
+        engine = self.engine()
+        self.record(engine, "paystack", 2, 18)
+        self.record(engine, "flutterwave", 20, 0)
+
+        self.assertEqual(engine.rank("NGN"), ["flutterwave", "nomba", "paystack"])
+
+    def test_timeouts_cost_more_than_other_failures(self):
+        engine = self.engine()
+        for provider, error_class in (("paystack", "timeout"), ("flutterwave", "client_error")):
+            for _ in range(5):
+                engine.record(provider, success=False, latency=0.2, error_class=error_class)
+
+        self.assertLess(engine.score("paystack"), engine.score("flutterwave"))
+
+    def test_specific_window_is_used_once_it_has_enough_samples(self):
+        engine = self.engine()
+        self.record(engine, "paystack", 60, 0, currency="NGN", payment_method="card")
+        self.record(engine, "paystack", 0, 4, currency="GHS", payment_method="card")
+
+        # Four GHS samples are too few: paystack is judged on all its calls.
+        self.assertEqual(engine.rank("GHS", "card")[0], "paystack")
+        self.record(engine, "paystack", 0, 1, currency="GHS", payment_method="card")
+        self.assertEqual(engine.rank("GHS", "card")[-1], "paystack")
+        self.assertEqual(engine.rank("NGN", "card")[0], "paystack")
+
+    def test_open_breaker_ranks_last_but_stays_eligible(self):
+        breakers = mock.Mock()
+        breakers.is_open.side_effect = lambda provider, family: provider == "paystack"
+        engine = self.engine(breakers=breakers)
+        self.record(engine, "paystack", 20, 0)
+
+        self.assertEqual(engine.rank("NGN"), ["flutterwave", "nomba", "paystack"])
+        breakers.is_open.assert_any_call("paystack", "initialize")
+
+    def test_rules_filter_and_bias(self):
+        engine = self.engine(PROVIDERS={
+            "paystack": {"currencies": ["NGN"]},
+            "nomba": {"enabled": False},
+            "flutterwave": {"bias": 0.5},
+        })
+
+        self.assertEqual(engine.rank("NGN"), ["flutterwave", "paystack"])
+        self.assertEqual(engine.rank("USD"), ["flutterwave"])
+        self.assertEqual(engine.select("usd"), "flutterwave")
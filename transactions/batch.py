@@ -0,0 +1,225 @@
+import asyncio
+import logging
+from decimal import Decimal, InvalidOperation
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from infrastructure.ids import new_reference
+from merchants.credentials import get_merchant_credentials
+from transactions.models import MerchantTransaction
+
+log = logging.getLogger("my_logger")
+
+
+DEFAULT_BATCH_PAYMENTS_CONFIG = {
+    # Largest number of payments accepted in one request.
+    "MAX_ITEMS": 500,
+    # Provider calls in flight at once for one batch.
+    "CONCURRENCY": 16,
+    # An item still running after this long is reported as failed.
+    "ITEM_TIMEOUT": 60.0,
+}
+
+
+def get_batch_payments_config() -> dict:
+    config = dict(DEFAULT_BATCH_PAYMENTS_CONFIG)
+    config.update(getattr(settings, "BATCH_PAYMENTS", {}) or {})
+    return config
+
+
+class InvalidBatch(ValueError):
+    """The request body is not a usable batch (as opposed to one bad item)."""
+
+
+def parse_batch(data, max_items: int) -> list[dict]:
+    """
+    Normalize the ``payments`` list of a batch request. Each entry becomes
+    either ``{"index", "amount", "email", ...}`` or ``{"index", "error"}``;
+    only a malformed body as a whole raises ``InvalidBatch``.
+    """
+    payments = data.get("payments") if isinstance(data, dict) else None
+    if not isinstance(payments, list) or not payments:
+        raise InvalidBatch("payments must be a non-empty list")
+    if len(payments) > max_items:
+        raise InvalidBatch(f"A batch holds at most {max_items} payments")
+
+    items = []
+    seen = set()
+    for index, payment in enumerate(payments):
+        if not isinstance(payment, dict):
+            items.append({"index": index, "error": "Each payment must be an object"})
+            continue
+        try:
+            amount = Decimal(str(payment.get("amount")))
+        except InvalidOperation:
+            amount = None
+        if amount is None or not amount.is_finite() or amount <= 0:
+            items.append({"index": index, "error": "Amount is required"})
+            continue
+        if not payment.get("email"):
+            items.append({"index": index, "error": "Email is required"})
+            continue
+
+        reference = payment.get("reference") or new_reference("PAY")
+        if reference in seen:
+            items.append({"index": index, "reference": reference, "error": "Duplicate reference in batch"})
+            continue
+        seen.add(reference)
+        items.append({
+            "index": index,
+            "amount": amount,
+            "email": payment["email"],
+            "reference": reference,
+            "currency": payment.get("currency") or "NGN",
+            "payment_method": payment.get("payment_method"),
+            "description": payment.get("description") or "Payment",
+        })
+    return items
+
+
+def _insert_pending(merchant, items) -> set:
+    """
+    Insert a pending row per valid item in one statement; returns the
+    references actually inserted (only those items are initialized).
+    """
+    references = [item["reference"] for item in items if "error" not in item]
+    taken = set(
+        MerchantTransaction.objects.filter(reference__in=references).values_list("reference", flat=True)
+    )
+    # Tags this batch's rows: ignore_conflicts does not say which were skipped.
+    batch = new_reference("BATCH")
+    MerchantTransaction.objects.bulk_create(
+        [
+            MerchantTransaction(
+                merchant_id=merchant,
+                reference=item["reference"],
+                amount=item["amount"],
+                currency=item["currency"],
+                metadata={"email": item["email"], "description": item["description"], "batch": batch},
+            )
+            for item in items
+            if "error" not in item and item["reference"] not in taken
+        ],
+        # A concurrent batch may claim a reference after the check above.
+        ignore_conflicts=True,
+    )
+    return set(
+        MerchantTransaction.objects.filter(
+            merchant_id=merchant, reference__in=references, metadata__batch=batch
+        ).values_list("reference", flat=True)
+    )
+
+
+def _record_outcomes(merchant, results):
+    """Write every item's outcome back: one read and one bulk update per status."""
+    now = timezone.now()
+    by_status = {}
+    for result in results:
+        status = "initialized" if result["status"] == "success" else "failed"
+        by_status.setdefault(status, []).append(result)
+
+    for status, group in by_status.items():
+        rows = {
+            row.reference: row
+            for row in MerchantTransaction.objects.filter(
+                merchant_id=merchant, reference__in=[result["reference"] for result in group], status="pending"
+            )
+        }
+        for result in group:
+            row = rows.get(result["reference"])
+            if row is None:
+                continue
+            row.status = status
+            row.updated_at = now
+            row.provider = result.get("provider") or ""
+            row.metadata = {
+                **(row.metadata or {}),
+                "payment_url": result.get("payment_url"),
+                "message": result.get("message"),
+            }
+        MerchantTransaction.objects.bulk_update(list(rows.values()), ["status", "provider", "metadata", "updated_at"])
+
+
+async def run_batch(service, items: list[dict], *, merchant, profile_id, merchant_id=None, config: dict | None = None):
+    """
+    Initialize a parsed batch for ``merchant`` (primary key; ``merchant_id``
+    is its public id) and yield one result per item, in completion order,
+    each carrying the item's ``index``.
+
+    The merchant's credentials are loaded once for the whole batch. Pending
+    rows are inserted up front with one ``bulk_create``; at most
+    ``CONCURRENCY`` provider calls run at a time, all on the event loop, and
+    outcomes are written back in bulk once the batch ends (also when the
+    client goes away, in which case unfinished items are recorded as failed).
+    """
+    config = config or get_batch_payments_config()
+    merchant_credentials = await get_merchant_credentials().afor_merchant(merchant)
+    inserted = await sync_to_async(_insert_pending)(merchant, items)
+    semaphore = asyncio.Semaphore(config["CONCURRENCY"])
+
+    async def initialize(item):
+        async with semaphore:
+            try:
+                result = await asyncio.wait_for(
+                    service.initialize_payment(
+                        amount=item["amount"],
+                        net_amount=item["amount"],
+                        email=item["email"],
+                        profile_id=profile_id,
+                        reference=item["reference"],
+                        description=item["description"],
+                        currency=item["currency"],
+                        payment_method=item["payment_method"],
+                        merchant=merchant,
+                        merchant_id=merchant_id,
+                        merchant_credentials=merchant_credentials,
+                    ),
+                    config["ITEM_TIMEOUT"],
+                )
+            except asyncio.TimeoutError:
+                result = {"status": "failed", "message": "Timed out", "reference": item["reference"]}
+            except ValueError as e:
+                result = {"status": "failed", "message": str(e), "reference": item["reference"]}
+            except Exception as e:
+                log.error(f"Batch payment {item['reference']} failed: {e!r}")
+                result = {"status": "failed", "message": "Payment could not be initialized", "reference": item["reference"]}
+        return {"index": item["index"], **result}
+
+    # Rejected items have no row of their own; only finished ones are recorded.
+    rejected = []
+    finished = []
+    tasks = []
+    for item in items:
+        if "error" in item:
+            rejected.append({"index": item["index"], "status": "failed", "message": item["error"], "reference": item.get("reference")})
+        elif item["reference"] not in inserted:
+            rejected.append({"index": item["index"], "status": "failed", "message": "Reference already exists", "reference": item["reference"]})
+        else:
+            tasks.append(asyncio.ensure_future(initialize(item)))
+
+    try:
+        for result in rejected:
+            yield result
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            finished.append(result)
+            yield result
+    finally:
+        references = {result.get("reference") for result in finished}
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled() and task.result()["reference"] not in references:
+                # Completed but not yet streamed when the client left.
+                finished.append(task.result())
+        references = {result.get("reference") for result in finished}
+        for item in items:
+            if "error" not in item and item["reference"] in inserted and item["reference"] not in references:
+                finished.append({"status": "failed", "message": "Cancelled", "reference": item["reference"]})
+        try:
+            # Shielded: the stream may be closing because the client left.
+            await asyncio.shield(sync_to_async(_record_outcomes)(merchant, finished))
+        except Exception as e:
+            log.error(f"Recording batch outcomes for merchant {merchant} failed: {e!r}")
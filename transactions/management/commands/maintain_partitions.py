@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from infrastructure.partitions import maintain_partitions
+
+
+class Command(BaseCommand):
+    help = "Create upcoming log partitions, archive and drop expired ones, prune unpartitioned log tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be done.")
+
+    def handle(self, *args, **options):
+        for table, actions in maintain_partitions(dry_run=options["dry_run"]).items():
+            for action in actions:
+                self.stdout.write(f"{table}: {action}")
+        self.stdout.write(self.style.SUCCESS("Partition maintenance finished"))
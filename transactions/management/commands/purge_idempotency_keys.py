@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from infrastructure.idempotency import get_idempotency_store
+
+
+class Command(BaseCommand):
+    help = "Delete idempotency records whose TTL has expired."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        removed = get_idempotency_store().purge_expired(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} expired idempotency records"))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from payinfra.celery import app
+from transactions.models import WebhookDeadLetter
+
+
+class Command(BaseCommand):
+    help = "Send dead-lettered webhook pipeline tasks again."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--task", help="Only replay tasks with this name.")
+        parser.add_argument("--limit", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        dead_letters = WebhookDeadLetter.objects.filter(replayed_at__isnull=True).order_by("created_at")
+        if options["task"]:
+            dead_letters = dead_letters.filter(task_name=options["task"])
+
+        replayed = 0
+        for dead_letter in dead_letters[:options["limit"]]:
+            app.send_task(dead_letter.task_name, kwargs=dead_letter.kwargs, queue=dead_letter.queue or None)
+            WebhookDeadLetter.objects.filter(pk=dead_letter.pk).update(replayed_at=timezone.now())
+            replayed += 1
+        self.stdout.write(self.style.SUCCESS(f"Replayed {replayed} dead-lettered tasks"))
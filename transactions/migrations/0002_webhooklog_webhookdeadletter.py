@@ -0,0 +1,50 @@
+# Generated by Django 5.2.11 on 2026-10-18 00:58
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(blank=True, max_length=50, null=True)),
+                ('event', models.CharField(blank=True, max_length=100, null=True)),
+                ('reference', models.CharField(blank=True, max_length=100, null=True)),
+                ('payload', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('status', models.CharField(choices=[('received', 'Received'), ('ignored', 'Ignored'), ('processed', 'Processed'), ('dead_letter', 'Dead letter')], default='received', max_length=20)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'webhook log',
+                'verbose_name_plural': 'webhook logs',
+            },
+        ),
+        migrations.CreateModel(
+            name='WebhookDeadLetter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_name', models.CharField(max_length=255)),
+                ('queue', models.CharField(max_length=100)),
+                ('kwargs', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('error', models.TextField()),
+                ('replayed_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('webhook_log', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='dead_letters', to='transactions.webhooklog')),
+            ],
+            options={
+                'verbose_name': 'webhook dead letter',
+                'verbose_name_plural': 'webhook dead letters',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.11 on 2026-10-18 01:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0002_webhooklog_webhookdeadletter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=50)),
+                ('event_key', models.CharField(max_length=150)),
+                ('payload_hash', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'webhook receipt',
+                'verbose_name_plural': 'webhook receipts',
+                'unique_together': {('provider', 'event_key')},
+            },
+        ),
+    ]
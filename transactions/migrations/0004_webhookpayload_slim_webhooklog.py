@@ -0,0 +1,87 @@
+# Generated by Django 5.2.11 on 2026-10-18 02:40
+
+import hashlib
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, models
+
+
+def move_payloads(apps, schema_editor):
+    WebhookLog = apps.get_model("transactions", "WebhookLog")
+    WebhookPayload = apps.get_model("transactions", "WebhookPayload")
+
+    logs = WebhookLog.objects.only("pk", "payload").order_by("pk")
+    batch = []
+    for webhook_log in logs.iterator(chunk_size=2000):
+        body = json.dumps(
+            webhook_log.payload, sort_keys=True, separators=(",", ":"), cls=DjangoJSONEncoder
+        ).encode()
+        digest = hashlib.sha256(body).hexdigest()
+        batch.append((webhook_log.pk, digest, body))
+        if len(batch) >= 2000:
+            _store(WebhookLog, WebhookPayload, batch)
+            batch = []
+    if batch:
+        _store(WebhookLog, WebhookPayload, batch)
+
+
+def _store(WebhookLog, WebhookPayload, batch):
+    WebhookPayload.objects.bulk_create(
+        [WebhookPayload(digest=digest, body=zlib.compress(body), size=len(body)) for _, digest, body in batch],
+        ignore_conflicts=True,
+    )
+    WebhookLog.objects.bulk_update(
+        [WebhookLog(pk=pk, payload_digest=digest) for pk, digest, _ in batch], ["payload_digest"]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0003_webhookreceipt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookPayload',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('body', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'webhook payload',
+                'verbose_name_plural': 'webhook payloads',
+            },
+        ),
+        migrations.AddField(
+            model_name='webhooklog',
+            name='payload_digest',
+            field=models.CharField(default='', max_length=64),
+            preserve_default=False,
+        ),
+        migrations.RunPython(move_payloads, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='webhooklog',
+            name='payload',
+        ),
+        migrations.AddIndex(
+            model_name='webhooklog',
+            index=models.Index(fields=['provider', 'reference'], name='webhooklog_provider_ref_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='webhooklog',
+            index=models.Index(fields=['provider', 'event'], name='webhooklog_provider_event_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='webhooklog',
+            index=models.Index(fields=['payload_digest'], name='webhooklog_digest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='webhooklog',
+            index=models.Index(fields=['status', 'created_at'], name='webhooklog_status_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.11 on 2026-10-18 03:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from infrastructure.partitions import DAY, partition_existing_table
+
+
+def partition_webhook_tables(apps, schema_editor):
+    # WebhookPayload stays a plain table: partitioning it would make
+    # (digest, created_at) the key and stop ignore_conflicts de-duplicating.
+    partition_existing_table(schema_editor, apps.get_model("transactions", "WebhookLog"), DAY, ["id"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0004_webhookpayload_slim_webhooklog'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='webhookdeadletter',
+            name='webhook_log',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='dead_letters', to='transactions.webhooklog'),
+        ),
+        migrations.RunPython(partition_webhook_tables, migrations.RunPython.noop),
+    ]
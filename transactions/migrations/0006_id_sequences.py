@@ -0,0 +1,24 @@
+# Generated by Django 5.2.11 on 2026-10-18 11:20
+
+from django.db import migrations
+
+from infrastructure.ids import create_sequences, drop_sequences
+
+
+def create_id_sequences(apps, schema_editor):
+    create_sequences(schema_editor)
+
+
+def drop_id_sequences(apps, schema_editor):
+    drop_sequences(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0005_partition_webhook_logs'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_id_sequences, drop_id_sequences),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.11 on 2026-10-18 01:48
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchants', '0005_merchantaccountkey_hashed_api_key'),
+        ('transactions', '0006_id_sequences'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MerchantTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(blank=True, max_length=50)),
+                ('reference', models.CharField(max_length=100, unique=True)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=18)),
+                ('currency', models.CharField(default='NGN', max_length=5)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('initialized', 'Initialized'), ('success', 'Success'), ('failed', 'Failed')], default='pending', max_length=50)),
+                ('metadata', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('merchant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to='merchants.merchant')),
+            ],
+            options={
+                'verbose_name': 'merchant transaction',
+                'verbose_name_plural': 'merchant transactions',
+                'indexes': [models.Index(fields=['merchant', 'created_at'], name='transaction_merchan_f6f772_idx')],
+            },
+        ),
+    ]
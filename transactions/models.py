@@ -1,14 +1,208 @@
-# from django.db import models
-# from merchants.models import Merchant
-
-
-# class MerchantTransaction(models.Model):
-#     merchant = models.ForeignKey(Merchant, on_delete=models.CASCADE, related_name="transactions")
-#     provider = models.CharField(max_length=50)  # Paystack, Flutterwave, OPay
-#     reference = models.CharField(max_length=100, unique=True)
-#     amount = models.DecimalField(max_digits=18, decimal_places=2)
-#     currency = models.CharField(max_length=5, default="NGN")
-#     status = models.CharField(max_length=50)  # pending, success, failed
-#     metadata = models.JSONField(blank=True, null=True)
-#     created_at = models.DateTimeField(auto_now_add=True)
-#     updated_at = models.DateTimeField(auto_now=True)
\ No newline at end of file
+import hashlib
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class IdempotencyRecord(models.Model):
+    """
+    Durable tier of the idempotency store (see infrastructure/idempotency.py).
+
+    One row per (scope, key): claimed as ``in_progress`` before the provider is
+    called and turned into ``completed`` with the response once it returns,
+    or ``failed`` when the caller keeps failures (withdrawals).
+    """
+    STATUS_CHOICES = [
+        ("in_progress", "In progress"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+
+    scope = models.CharField(max_length=100)
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="in_progress")
+    response = models.JSONField(blank=True, null=True, encoder=DjangoJSONEncoder)
+    # An in-progress claim older than this is treated as abandoned (crashed worker).
+    locked_until = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("scope", "key")
+        verbose_name = "idempotency record"
+        verbose_name_plural = "idempotency records"
+
+    def __str__(self):
+        return f"{self.scope}:{self.key} ({self.status})"
+
+
+class WebhookPayload(models.Model):
+    """
+    Raw webhook bodies, zlib-compressed and stored once per SHA-256 digest.
+
+    Append-only: rows are inserted with ``ignore_conflicts`` and never
+    updated, so the hot ``WebhookLog`` table stays narrow and a redelivered
+    body costs nothing extra. Not partitioned: that would make
+    ``(digest, created_at)`` the key and let the same body be stored again.
+    """
+    digest = models.CharField(max_length=64, primary_key=True)
+    body = models.BinaryField()
+    size = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "webhook payload"
+        verbose_name_plural = "webhook payloads"
+
+    def __str__(self):
+        return f"{self.digest} ({self.size} bytes)"
+
+    @classmethod
+    def from_body(cls, body: bytes) -> "WebhookPayload":
+        return cls(digest=hashlib.sha256(body).hexdigest(), body=zlib.compress(body), size=len(body))
+
+    @classmethod
+    def from_data(cls, data) -> "WebhookPayload":
+        """For payloads that only exist as parsed JSON: stored in canonical form."""
+        return cls.from_body(
+            json.dumps(data, sort_keys=True, separators=(",", ":"), cls=DjangoJSONEncoder).encode()
+        )
+
+    def raw(self) -> bytes:
+        return zlib.decompress(bytes(self.body))
+
+    def data(self):
+        return json.loads(self.raw())
+
+
+class WebhookLog(models.Model):
+    """
+    One row per provider webhook delivery, written on the fast path before the
+    provider is acked. Ledger posting and notifications then run on the Celery
+    pipeline (transactions/tasks.py), which moves ``status`` along.
+
+    Rows are looked up by (provider, reference), (provider, event) or the
+    payload digest; the body itself lives in ``WebhookPayload``. On Postgres
+    the table is partitioned by day on ``created_at`` and old partitions are
+    archived and dropped (infrastructure/partitions.py).
+    """
+    STATUS_CHOICES = [
+        ("received", "Received"),
+        ("ignored", "Ignored"),
+        ("processed", "Processed"),
+        ("dead_letter", "Dead letter"),
+    ]
+
+    provider = models.CharField(max_length=50, blank=True, null=True)
+    event = models.CharField(max_length=100, blank=True, null=True)
+    reference = models.CharField(max_length=100, blank=True, null=True)
+    payload_digest = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="received")
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "webhook log"
+        verbose_name_plural = "webhook logs"
+        indexes = [
+            models.Index(fields=["provider", "reference"], name="webhooklog_provider_ref_idx"),
+            models.Index(fields=["provider", "event"], name="webhooklog_provider_event_idx"),
+            models.Index(fields=["payload_digest"], name="webhooklog_digest_idx"),
+            models.Index(fields=["status", "created_at"], name="webhooklog_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.provider}:{self.reference} ({self.status})"
+
+    @property
+    def payload(self):
+        """The stored body, parsed (one primary-key read)."""
+        stored = WebhookPayload.objects.filter(digest=self.payload_digest).first()
+        return stored.data() if stored else None
+
+
+class WebhookReceipt(models.Model):
+    """
+    Durable tier of webhook deduplication (see webhooks/dedup.py).
+
+    One row per distinct delivery: ``event_key`` is the provider's event id
+    when the payload carries one, otherwise the payload digest. The unique
+    index makes "first time we see this?" a single insert.
+    """
+    provider = models.CharField(max_length=50)
+    event_key = models.CharField(max_length=150)
+    payload_hash = models.CharField(max_length=64)
+    created_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ("provider", "event_key")
+        verbose_name = "webhook receipt"
+        verbose_name_plural = "webhook receipts"
+
+    def __str__(self):
+        return f"{self.provider}:{self.event_key}"
+
+
+class WebhookDeadLetter(models.Model):
+    """
+    A webhook pipeline task that still failed after all its retries.
+
+    Holds everything needed to send it again once the cause is fixed
+    (``manage.py replay_dead_letters``).
+    """
+    # No database constraint: WebhookLog is partitioned, and its partitions
+    # are dropped on expiry independently of dead letters.
+    webhook_log = models.ForeignKey(
+        WebhookLog, on_delete=models.CASCADE, related_name="dead_letters", blank=True, null=True,
+        db_constraint=False,
+    )
+    task_name = models.CharField(max_length=255)
+    queue = models.CharField(max_length=100)
+    kwargs = models.JSONField(encoder=DjangoJSONEncoder)
+    error = models.TextField()
+    replayed_at = models.DateTimeField(blank=True, null=True, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "webhook dead letter"
+        verbose_name_plural = "webhook dead letters"
+
+    def __str__(self):
+        return f"{self.task_name} ({self.created_at})"
+
+
+class MerchantTransaction(models.Model):
+    """
+    A payment initialized on behalf of a merchant. Batch initialization
+    (``POST /v1/transactions/batch/``) inserts the rows as ``pending`` in one
+    statement before any provider is called, then records each outcome.
+    """
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("initialized", "Initialized"),
+        ("success", "Success"),
+        ("failed", "Failed"),
+    ]
+
+    merchant = models.ForeignKey("merchants.Merchant", on_delete=models.CASCADE, related_name="transactions")
+    provider = models.CharField(max_length=50, blank=True)  # Paystack, Flutterwave, OPay
+    reference = models.CharField(max_length=100, unique=True)
+    amount = models.DecimalField(max_digits=18, decimal_places=2)
+    currency = models.CharField(max_length=5, default="NGN")
+    status = models.CharField(max_length=50, choices=STATUS_CHOICES, default="pending")
+    metadata = models.JSONField(blank=True, null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["merchant", "created_at"])]
+        verbose_name = "merchant transaction"
+        verbose_name_plural = "merchant transactions"
+
+    def __str__(self):
+        return f"{self.reference} ({self.status})"
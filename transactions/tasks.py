@@ -0,0 +1,159 @@
+import logging
+import zlib
+from collections import defaultdict
+
+from celery import Task, shared_task
+from django.conf import settings
+
+log = logging.getLogger("my_logger")
+
+
+DEFAULT_WEBHOOK_PIPELINE_CONFIG = {
+    # Each stage's queue is split into this many partitions by reference.
+    # Run one single-process worker per partition queue
+    # (e.g. ``celery -A payinfra worker -Q webhooks.ledger.0 -c 1``) so the
+    # tasks for one reference are handled in order.
+    "PARTITIONS": 4,
+    "LEDGER_QUEUE": "webhooks.ledger",
+    "NOTIFICATION_QUEUE": "webhooks.notifications",
+    # The ledger stage posts to wallet.models, which this project does not
+    # have yet. Until it does, actionable deliveries are only stored, with
+    # status "received", and no ledger task is sent.
+    "LEDGER_ENABLED": False,
+}
+
+
+def get_webhook_pipeline_config() -> dict:
+    config = dict(DEFAULT_WEBHOOK_PIPELINE_CONFIG)
+    config.update(getattr(settings, "WEBHOOK_PIPELINE", {}) or {})
+    return config
+
+
+def partition_queue(queue: str, reference: str) -> str:
+    """The partition of ``queue`` that owns ``reference`` (stable across processes)."""
+    partitions = get_webhook_pipeline_config()["PARTITIONS"]
+    return f"{queue}.{zlib.crc32(reference.encode()) % partitions}"
+
+
+class PipelineTask(Task):
+    """
+    Base for the webhook pipeline stages.
+
+    Any error is retried with jittered exponential backoff. Messages are acked
+    only after the task finishes, so work on a worker that dies is delivered
+    again. A task that still fails after ``max_retries`` is dead-lettered to
+    ``WebhookDeadLetter`` instead of being dropped. The ledger stage is
+    idempotent and notifications are at-least-once, so redelivery and replay
+    are safe.
+
+    Stages take keyword arguments only, so a dead letter can be replayed as is.
+    """
+
+    autoretry_for = (Exception,)
+    max_retries = 8
+    retry_backoff = 2
+    retry_backoff_max = 600
+    retry_jitter = True
+    acks_late = True
+    reject_on_worker_lost = True
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        from transactions.models import WebhookDeadLetter, WebhookLog
+
+        webhook_log_id = kwargs.get("webhook_log_id")
+        delivery_info = self.request.delivery_info or {}
+        log.error(f"Webhook task {self.name} dead-lettered (log {webhook_log_id}): {exc!r}")
+        WebhookDeadLetter.objects.create(
+            webhook_log_id=webhook_log_id,
+            task_name=self.name,
+            queue=delivery_info.get("routing_key") or "",
+            kwargs=kwargs,
+            error=repr(exc),
+        )
+        if webhook_log_id is not None:
+            WebhookLog.objects.filter(pk=webhook_log_id).update(status="dead_letter", error=repr(exc))
+
+
+def enqueue_ledger_posting(webhook_log_id: int, reference: str, metadata: dict):
+    post_ledger_entries.apply_async(
+        kwargs={"webhook_log_id": webhook_log_id, "reference": reference, "metadata": metadata},
+        queue=partition_queue(get_webhook_pipeline_config()["LEDGER_QUEUE"], reference),
+    )
+
+
+def enqueue_ledger_batch(entries: list[dict]):
+    """
+    Queue a batch of ``{"webhook_log_id", "reference", "metadata"}`` entries
+    as one message per partition, keeping their order within each partition.
+    Used by the webhook ingress, where one message per event would cost more
+    than storing the events.
+    """
+    queue = get_webhook_pipeline_config()["LEDGER_QUEUE"]
+    partitions = defaultdict(list)
+    for entry in entries:
+        partitions[partition_queue(queue, entry["reference"])].append(entry)
+    for partition, partition_entries in partitions.items():
+        post_ledger_batch.apply_async(kwargs={"entries": partition_entries}, queue=partition)
+
+
+def enqueue_notifications(webhook_log_id: int, reference: str, user_id, net_amount: str):
+    queue = partition_queue(get_webhook_pipeline_config()["NOTIFICATION_QUEUE"], reference)
+    # One task per channel, so a failing channel is retried on its own
+    # without sending the other one twice. A retry is delayed and may run
+    # after notifications queued later, so notifications are not ordered;
+    # each reference only ever gets this one (payment credited) notification,
+    # so there is no earlier status for it to overtake.
+    for channel in ("email", "inapp"):
+        send_payment_notification.apply_async(
+            kwargs={
+                "webhook_log_id": webhook_log_id,
+                "channel": channel,
+                "user_id": str(user_id),
+                "net_amount": net_amount,
+            },
+            queue=queue,
+        )
+
+
+@shared_task(base=PipelineTask, name="transactions.post_ledger_entries")
+def post_ledger_entries(*, webhook_log_id: int, reference: str, metadata: dict):
+    """Ledger stage: credit the wallets, then queue the notifications."""
+    from modules.services.webhook import WebhookService
+
+    WebhookService().post_ledger_entries(webhook_log_id, reference, metadata)
+
+
+@shared_task(base=PipelineTask, name="transactions.post_ledger_batch")
+def post_ledger_batch(*, entries: list[dict]):
+    """
+    Ledger stage for a batch from ``enqueue_ledger_batch``, in order. An entry
+    that fails is queued on its own as ``post_ledger_entries``, which retries
+    and dead-letters it without holding up the rest of the batch.
+    """
+    from modules.services.webhook import WebhookService
+
+    service = WebhookService()
+    for entry in entries:
+        try:
+            service.post_ledger_entries(entry["webhook_log_id"], entry["reference"], entry["metadata"])
+        except Exception as e:
+            log.warning(f"Ledger posting for webhook {entry['webhook_log_id']} failed, retrying on its own: {e!r}")
+            enqueue_ledger_posting(entry["webhook_log_id"], entry["reference"], entry["metadata"])
+
+
+@shared_task(base=PipelineTask, name="transactions.send_payment_notification")
+def send_payment_notification(*, webhook_log_id: int, channel: str, user_id: str, net_amount: str):
+    """Notification stage: tell the recipient about a credited payment."""
+    from modules.services.webhook import WebhookService
+
+    WebhookService().send_payment_notification(channel, user_id, net_amount)
+
+
+@shared_task(name="transactions.maintain_partitions")
+def maintain_partitions():
+    """Periodic log retention (CELERY_BEAT_SCHEDULE); see infrastructure/partitions.py."""
+    from infrastructure.partitions import maintain_partitions as run
+
+    for table, actions in run().items():
+        for action in actions:
+            log.info(f"{table}: {action}")
@@ -1,3 +1,97 @@
-from django.test import TestCase
+import asyncio
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+from django.urls import resolve, reverse
+from rest_framework.test import APIClient
+
+from accounts.models import Profile, User
+from modules.services.payment_services import AsyncPaymentService, PaymentService
+from transactions.views import AsyncPaymentViewSets
+
+
+class PaymentRoutesTests(SimpleTestCase):
+    def assertRoutedTo(self, name, method, action):
+        match = resolve(reverse(name))
+        self.assertIs(match.func.cls, AsyncPaymentViewSets)
+        self.assertEqual(match.func.actions, {method: action})
+
+    def test_initialize_is_routed_to_the_async_viewset(self):
+        self.assertRoutedTo("transactions-initialize", "post", "make_payment")
+
+    def test_verify_is_routed_to_the_async_viewset(self):
+        self.assertRoutedTo("transactions-verify", "get", "verify_payment")
+
+    def test_batch_is_routed_to_the_async_viewset(self):
+        self.assertRoutedTo("transactions-batch", "post", "batch")
+
+
+class InitializePaymentViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="payer@example.com", password="secret")
+        self.profile = Profile.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def initialize(self, result):
+        service = AsyncPaymentViewSets.payment_provider
+        # autospec: the view must call the service with its real signature.
+        with mock.patch.object(service, "initialize_payment", autospec=True, return_value=result) as initialize_payment:
+            response = self.client.post(
+                reverse("transactions-initialize"), {"amount": "1500", "email": "payer@example.com"}, format="json"
+            )
+        return response, initialize_payment
+
+    def test_initialize_passes_the_callers_profile(self):
+        response, initialize_payment = self.initialize(
+            {"status": "success", "payment_url": "https://pay.example/x", "reference": "PAY-1"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["payment_url"], "https://pay.example/x")
+        self.assertEqual(initialize_payment.call_args.kwargs["profile_id"], self.profile.profile_id)
+
+    def test_failed_initialization_is_a_bad_request(self):
+        response, _ = self.initialize({"status": "failed", "message": "Amount is required", "reference": None})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["status"], "failed")
+
+
+class PaymentServiceFailureTests(SimpleTestCase):
+    """Errors that no other provider would fix come back as a failed result, not an exception."""
+
+    request = {
+        "amount": "1500", "net_amount": "1500", "email": "payer@example.com",
+        "profile_id": "1000000008", "reference": "PAY-TEST",
+    }
+
+    def setUp(self):
+        ranked = mock.patch.object(PaymentService, "get_ranked_providers", return_value=["paystack", "flutterwave"])
+        ranked.start()
+        self.addCleanup(ranked.stop)
+
+    def test_invalid_request(self):
+        result = PaymentService().initialize_payment(**{**self.request, "profile_id": None})
+
+        self.assertEqual(result["status"], "failed")
+        self.assertEqual(result["message"], "profile_id is required")
+
+    def test_provider_rejection(self):
+        provider = mock.Mock()
+        provider.initialize_transaction.return_value = {"status": False, "error": {"status_code": 422}}
+        provider.clean_init_data.return_value = {"message": "Invalid currency"}
+
+        with mock.patch.object(PaymentService, "_provider", return_value=provider):
+            result = PaymentService().initialize_payment(**self.request)
+
+        self.assertEqual(result["status"], "failed")
+        self.assertEqual(result["message"], "Invalid currency")
+        self.assertEqual(provider.initialize_transaction.call_count, 1)
+
+    def test_no_async_connector_for_the_ranked_providers(self):
+        with mock.patch.object(AsyncPaymentService, "get_ranked_providers", return_value=["nomba"]):
+            result = asyncio.run(AsyncPaymentService().initialize_payment(**self.request))
+
+        self.assertEqual(result["status"], "failed")
+        self.assertEqual(result["message"], "No payment provider supports NGN")
@@ -1,44 +1,171 @@
 import json
 import logging
 from decimal import Decimal
-from rest_framework import viewsets, status
+from functools import partial
+from adrf.viewsets import ViewSet as AsyncViewSet
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.exceptions import NotAuthenticated
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from modules.services.payment_services import PaymentService
+from modules.services.payment_services import AsyncPaymentService
+from infrastructure.idempotency import IdempotencyConflict, IdempotencyInProgress, get_idempotency_store
+from infrastructure.rate_limiter import AsyncMerchantRateThrottle
+from merchants.authentication import MerchantPrincipal
+from accounts.models import Profile
+from transactions.batch import InvalidBatch, get_batch_payments_config, parse_batch, run_batch
 
 
+def idempotency_scope(request, operation):
+    """
+    Namespace for the caller's ``Idempotency-Key`` values: its merchant, or
+    the user without one. Keys are picked by clients, so anonymous callers
+    (who have nothing to tell them apart) cannot use them.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        raise NotAuthenticated("Authentication is required to use an Idempotency-Key.")
+    if isinstance(request.auth, MerchantPrincipal):
+        return f"{operation}:{request.auth.merchant_id}"
+    merchant = user.merchants.only("merchant_id").first()
+    owner = merchant.merchant_id if merchant else f"user-{user.pk}"
+    return f"{operation}:{owner}"
 
-class PaymentViewSets(viewsets.ViewSet):
+
+def request_merchant_ids(request):
+    """``(primary key, merchant_id)`` of the caller's merchant; ``(None, None)`` without one."""
+    user = request.user
+    if not user.is_authenticated:
+        return None, None
+    if isinstance(request.auth, MerchantPrincipal):
+        return request.auth.merchant_pk, request.auth.merchant_id
+    return user.merchants.values_list("pk", "merchant_id").first() or (None, None)
+
+
+def request_merchant(request):
+    """Primary key of the caller's merchant, whose own provider keys are used if it has any."""
+    return request_merchant_ids(request)[0]
+
+
+def idempotency_error_response(error):
+    if isinstance(error, IdempotencyConflict):
+        return Response({"status": "failed", "message": str(error)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    if isinstance(error, IdempotencyInProgress):
+        response = Response({"status": "failed", "message": str(error)}, status=status.HTTP_409_CONFLICT)
+        response["Retry-After"] = str(max(int(error.retry_after or 1), 1))
+        return response
+    return Response({"status": "failed", "message": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+def replayable_response(result, status_code, replayed):
+    response = Response(result, status=status_code)
+    if replayed:
+        response["Idempotent-Replayed"] = "true"
+    return response
+
+
+class AsyncPaymentViewSets(AsyncViewSet):
+    """
+    Payment initialization, verification and batches (``/v1/transactions/``).
+
+    Served under ASGI: provider calls are awaited on the event loop, so a
+    worker is not tied up for the duration of a gateway call.
+    """
     permission_classes = [AllowAny]
+    throttle_classes = [AsyncMerchantRateThrottle]
 
-    payment_provider = PaymentService()
+    payment_provider = AsyncPaymentService()
 
-    def make_payment(self, request):
-        amount = request.data.get('amount')
+    async def _initialize_payment(self, request, amount):
         reference = request.data.get('reference')
-        provider = request.data.get('provider')
-        environment = request.data.get('environment')
-        
-        if not amount:
-            return Response({"status": "failed", "message": "Amount is required"}, status=status.HTTP_400_BAD_REQUEST)
-
-        amount = Decimal(str(amount))
-        result = self.payment_provider.initialize_payment(
+        merchant, merchant_id = await sync_to_async(request_merchant_ids)(request)
+        profile_id = await Profile.objects.filter(user_id=request.user.pk).values_list("profile_id", flat=True).afirst()
+        result = await self.payment_provider.initialize_payment(
             email=request.data.get("email"),
             amount=amount,
             net_amount=amount,
+            profile_id=profile_id,
             reference=reference if reference else None,
+            merchant=merchant,
+            merchant_id=merchant_id,
         )
-
         status_code = 200 if result.get("status") == "success" else 400
-        return Response(result, status=status_code)
-    
-    def verify_payment(self, request):
+        return status_code, result
+
+    async def make_payment(self, request):
+        amount = request.data.get('amount')
+
+        if not amount:
+            return Response({"status": "failed", "message": "Amount is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        amount = Decimal(str(amount))
+        idempotency_key = request.headers.get("Idempotency-Key")
+        if not idempotency_key:
+            status_code, result = await self._initialize_payment(request, amount)
+            return Response(result, status=status_code)
+
+        # The idempotency store is database-backed and may block while a
+        # duplicate waits, so it runs in a worker thread (not the shared
+        # thread-sensitive one); the provider call is handed back to the loop.
+        try:
+            scope = await sync_to_async(idempotency_scope)(request, "payments")
+            (status_code, result), replayed = await sync_to_async(get_idempotency_store().run, thread_sensitive=False)(
+                scope=scope,
+                key=idempotency_key,
+                fingerprint_data=request.data,
+                func=partial(async_to_sync(self._initialize_payment), request, amount),
+                should_store=lambda outcome: outcome[0] == 200,
+            )
+        except (ValueError, IdempotencyConflict, IdempotencyInProgress) as e:
+            return idempotency_error_response(e)
+
+        return replayable_response(result, status_code, replayed)
+
+    async def verify_payment(self, request):
         reference = request.query_params.get("reference")
         if not reference:
             return Response({"status": "failed", "message": "Reference is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        result = self.payment_provider.verify_payment(reference=reference)
+        result = await self.payment_provider.verify_payment(
+            reference=reference,
+            provider=request.query_params.get("provider"),
+            merchant=await sync_to_async(request_merchant)(request),
+        )
         status_code = 200 if result.get("status") == "success" else 400
         return Response(result, status=status_code)
-    
\ No newline at end of file
+
+    async def batch(self, request):
+        """
+        ``POST /v1/transactions/batch/`` with ``{"payments": [{"amount",
+        "email", "reference"?, "currency"?, "payment_method"?,
+        "description"?}, ...]}``.
+
+        Answers with NDJSON, one line per payment as it completes (in
+        completion order; ``index`` is its position in the request), so the
+        client sees links as soon as they exist and no thread is held while
+        providers are called.
+        """
+        if not request.user.is_authenticated:
+            return Response({"status": "failed", "message": "Authentication required"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        config = get_batch_payments_config()
+        try:
+            items = parse_batch(request.data, config["MAX_ITEMS"])
+        except InvalidBatch as e:
+            return Response({"status": "failed", "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        merchant, merchant_id = await sync_to_async(request_merchant_ids)(request)
+        if merchant is None:
+            return Response({"status": "failed", "message": "A merchant account is required"}, status=status.HTTP_403_FORBIDDEN)
+        profile_id = await Profile.objects.filter(user_id=request.user.pk).values_list("profile_id", flat=True).afirst()
+
+        async def lines():
+            async for result in run_batch(
+                self.payment_provider, items, merchant=merchant, merchant_id=merchant_id,
+                profile_id=profile_id, config=config,
+            ):
+                yield json.dumps(result, cls=DjangoJSONEncoder) + "\n"
+
+        return StreamingHttpResponse(lines(), content_type="application/x-ndjson")
@@ -0,0 +1,195 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from analytics.rollups import get_rollup_aggregator
+from routing.banks import get_bank_health_tracker
+from webhooks.dedup import claim_receipts, get_seen_events
+
+log = logging.getLogger("my_logger")
+
+
+DEFAULT_WEBHOOK_INGRESS_CONFIG = {
+    # A batch is written when it reaches MAX_BATCH events or MAX_DELAY seconds
+    # after its first event arrived, whichever comes first.
+    "MAX_BATCH": 500,
+    "MAX_DELAY": 0.005,
+    # How long a request waits for its batch to commit before answering 503
+    # (the provider then retries).
+    "ACK_TIMEOUT": 5.0,
+}
+
+
+def get_webhook_ingress_config() -> dict:
+    config = dict(DEFAULT_WEBHOOK_INGRESS_CONFIG)
+    config.update(getattr(settings, "WEBHOOK_INGRESS", {}) or {})
+    return config
+
+
+class WebhookBatcher:
+    """
+    Group commit for webhook events.
+
+    Requests hand their ``NormalizedEvent`` to ``submit`` and get a future
+    back; one flusher thread writes everything that queued up in a single
+    transaction, then resolves the futures. Each batch first claims its
+    ``WebhookReceipt`` rows, and only deliveries seen for the first time are
+    logged and passed on; redeliveries resolve to ``None``. A request is
+    only acked once its row is committed, but the cost of the commit is shared
+    by the whole batch, so a burst of provider retries costs a few inserts
+    rather than one transaction per event.
+
+    After the commit, actionable events are handed to the ledger stage of the
+    Celery pipeline (transactions/tasks.py), one message per partition per
+    batch, when that stage is enabled (``WEBHOOK_PIPELINE["LEDGER_ENABLED"]``).
+    """
+
+    def __init__(self, config: dict | None = None):
+        self.config = config or get_webhook_ingress_config()
+        self.max_batch = self.config["MAX_BATCH"]
+        self.max_delay = self.config["MAX_DELAY"]
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._thread = None
+        # Publishing to the broker happens off the flusher thread, so the next
+        # batch is not held up by it.
+        self._dispatcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="webhook-dispatch")
+
+    def submit(self, event) -> Future:
+        """Queue ``event`` for the next batch; the future resolves to its WebhookLog id."""
+        future = Future()
+        with self._condition:
+            self._pending.append((event, future))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="webhook-batcher", daemon=True)
+                self._thread.start()
+            # Wake the flusher to open a batch, or to write a full one early.
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+                self._condition.notify()
+        return future
+
+    def _next_batch(self):
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+            # Let the batch fill up for at most max_delay.
+            deadline = time.monotonic() + self.max_delay
+            while len(self._pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            count = min(len(self._pending), self.max_batch)
+            return [self._pending.popleft() for _ in range(count)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self.flush(batch)
+            except Exception as e:
+                log.error(f"Writing {len(batch)} webhook events failed: {e}", exc_info=True)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                # Drop a connection that may have been broken by the failure.
+                close_old_connections()
+
+    def flush(self, batch):
+        from transactions.models import WebhookLog, WebhookPayload
+
+        # The first delivery of a key in the batch claims it; the rest are
+        # redeliveries that arrived together.
+        first = {}
+        for event, _ in batch:
+            first.setdefault((event.provider, event.dedup_key), event)
+
+        with transaction.atomic():
+            claimed = claim_receipts(list(first.values()))
+            fresh = [first[key] for key in first if key in claimed]
+            WebhookPayload.objects.bulk_create(
+                [WebhookPayload.from_body(event.body) for event in fresh],
+                batch_size=self.max_batch,
+                ignore_conflicts=True,
+            )
+            rows = [
+                WebhookLog(
+                    provider=event.provider,
+                    event=event.event,
+                    reference=event.reference,
+                    payload_digest=event.payload_hash,
+                    status="received" if event.actionable else "ignored",
+                )
+                for event in fresh
+            ]
+            WebhookLog.objects.bulk_create(rows, batch_size=self.max_batch)
+
+        get_seen_events().add_many(first)
+        rollups = get_rollup_aggregator()
+        banks = get_bank_health_tracker()
+        for event in fresh:
+            rollups.record_event(event)
+            if event.bank and event.status in ("success", "failed"):
+                # Charge and transfer outcomes reported by the provider; a
+                # failure here is the bank or issuer saying no.
+                banks.record(event.provider, event.bank, success=event.status == "success", reason="declined")
+        stored = {id(event): row.pk for event, row in zip(fresh, rows)}
+        for event, future in batch:
+            if not future.done():
+                # Duplicates resolve to None: acked, but nothing was stored.
+                future.set_result(stored.get(id(event)))
+        actionable = [(row.pk, event) for event, row in zip(fresh, rows) if event.actionable]
+        if actionable:
+            self._dispatcher.submit(self._dispatch, actionable)
+
+    @staticmethod
+    def _dispatch(actionable):
+        from transactions.models import WebhookDeadLetter
+        from transactions.tasks import (
+            enqueue_ledger_batch,
+            get_webhook_pipeline_config,
+            partition_queue,
+            post_ledger_entries,
+        )
+
+        if not get_webhook_pipeline_config()["LEDGER_ENABLED"]:
+            return
+
+        entries = [
+            {"webhook_log_id": webhook_log_id, "reference": event.reference, "metadata": event.metadata}
+            for webhook_log_id, event in actionable
+        ]
+        try:
+            enqueue_ledger_batch(entries)
+        except Exception as e:
+            # Already acked: park each event for `manage.py replay_dead_letters`.
+            log.error(f"Queueing ledger posting for {len(entries)} webhooks failed: {e}")
+            queue = get_webhook_pipeline_config()["LEDGER_QUEUE"]
+            WebhookDeadLetter.objects.bulk_create([
+                WebhookDeadLetter(
+                    webhook_log_id=entry["webhook_log_id"],
+                    task_name=post_ledger_entries.name,
+                    queue=partition_queue(queue, entry["reference"]),
+                    kwargs=entry,
+                    error=repr(e),
+                )
+                for entry in entries
+            ])
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_webhook_batcher() -> WebhookBatcher:
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = WebhookBatcher()
+    return _batcher
@@ -0,0 +1,95 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+
+DEFAULT_WEBHOOK_DEDUP_CONFIG = {
+    # Most recent delivery keys remembered per process. Provider redeliveries
+    # of these are answered without touching the database at all.
+    "MAX_KEYS": 100_000,
+}
+
+
+def get_webhook_dedup_config() -> dict:
+    config = dict(DEFAULT_WEBHOOK_DEDUP_CONFIG)
+    config.update(getattr(settings, "WEBHOOK_DEDUP", {}) or {})
+    return config
+
+
+class SeenEvents:
+    """
+    Bounded LRU of delivery keys (``(provider, dedup_key)``) this process has
+    already stored. Only ever holds keys known to be in ``WebhookReceipt``, so
+    a hit is a certain duplicate; a miss falls through to the table.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            if key in self._keys:
+                self._keys.move_to_end(key)
+                return True
+            return False
+
+    def add_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._keys[key] = None
+                self._keys.move_to_end(key)
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+
+    def __len__(self):
+        return len(self._keys)
+
+
+def claim_receipts(events) -> set:
+    """
+    Insert a ``WebhookReceipt`` per event and return the ``(provider,
+    dedup_key)`` pairs that were new. One ``INSERT ... ON CONFLICT DO NOTHING
+    RETURNING`` statement, so concurrent workers agree on who saw an event
+    first without locking. Call inside the batch's transaction.
+    """
+    from transactions.models import WebhookReceipt
+
+    if not events:
+        return set()
+
+    meta = WebhookReceipt._meta
+    quote = connection.ops.quote_name
+    columns = ["provider", "event_key", "payload_hash", "created_at"]
+    created_at = meta.get_field("created_at").get_db_prep_value(timezone.now(), connection)
+
+    params = []
+    for event in events:
+        params.extend([event.provider, event.dedup_key, event.payload_hash, created_at])
+
+    sql = (
+        f"INSERT INTO {quote(meta.db_table)} ({', '.join(quote(c) for c in columns)}) "
+        f"VALUES {', '.join(['(%s, %s, %s, %s)'] * len(events))} "
+        f"ON CONFLICT ({quote('provider')}, {quote('event_key')}) DO NOTHING "
+        f"RETURNING {quote('provider')}, {quote('event_key')}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {tuple(row) for row in cursor.fetchall()}
+
+
+_seen = None
+_seen_lock = threading.Lock()
+
+
+def get_seen_events() -> SeenEvents:
+    global _seen
+    if _seen is None:
+        with _seen_lock:
+            if _seen is None:
+                _seen = SeenEvents(get_webhook_dedup_config()["MAX_KEYS"])
+    return _seen
@@ -0,0 +1,64 @@
+import json
+import logging
+from concurrent.futures import Future
+
+from modules.webhooks import WEBHOOK_PROVIDERS
+from webhooks.batcher import get_webhook_batcher
+from webhooks.dedup import get_seen_events
+from webhooks.normalizer import NormalizedEvent, normalize
+
+log = logging.getLogger("my_logger")
+
+
+class UnknownWebhookProvider(Exception):
+    """No ``BaseWebhookHandler`` is registered for the provider."""
+
+
+class WebhookSignatureError(Exception):
+    """The webhook did not carry a valid provider signature."""
+
+
+class InvalidWebhookPayload(Exception):
+    """The webhook body is not a JSON object."""
+
+
+def get_handler(provider: str):
+    handler = WEBHOOK_PROVIDERS.get(provider)
+    if handler is None:
+        raise UnknownWebhookProvider(f"Unsupported webhook provider: {provider}")
+    return handler
+
+
+def parse_webhook(provider: str, request) -> NormalizedEvent:
+    """
+    Verify and normalize one delivery. Runs on the request path, so it does
+    no I/O: signature check, JSON parse and field mapping only.
+    """
+    handler = get_handler(provider)
+    if not handler.verify_signature(request):
+        raise WebhookSignatureError(f"Invalid {provider} webhook signature")
+    try:
+        payload = json.loads(request.body)
+    except (TypeError, ValueError):
+        raise InvalidWebhookPayload("Webhook body is not valid JSON")
+    if not isinstance(payload, dict):
+        raise InvalidWebhookPayload("Webhook body must be a JSON object")
+    return normalize(provider, handler, payload, request.body)
+
+
+def accept_webhook(provider: str, request):
+    """
+    Fast path: verify, normalize and queue the event for the next group
+    commit. Returns a future that resolves to the stored WebhookLog id, or to
+    ``None`` for a redelivery of an event we already have; the provider
+    should only be acked once it has resolved.
+
+    Redeliveries this process has seen recently are answered from memory,
+    without any database work.
+    """
+    event = parse_webhook(provider, request)
+    if (event.provider, event.dedup_key) in get_seen_events():
+        future = Future()
+        future.set_result(None)
+        return future
+    return get_webhook_batcher().submit(event)
@@ -0,0 +1,120 @@
+import hashlib
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+
+@dataclass(frozen=True, slots=True)
+class NormalizedEvent:
+    """
+    Provider-independent view of one webhook delivery.
+
+    Slotted so the ingress can hold thousands of pending events in a batch
+    cheaply. ``body`` is the raw request body, kept only for storage;
+    ``payload_hash`` is its SHA-256.
+    """
+
+    provider: str
+    event: str
+    reference: str | None
+    status: str
+    payload_hash: str
+    event_id: str | None = None
+    amount: Decimal | None = None
+    currency: str | None = None
+    bank: str | None = None
+    metadata: dict = field(default_factory=dict)
+    body: bytes = field(default=b"", repr=False)
+
+    @property
+    def dedup_key(self) -> str:
+        """
+        Identity of the delivery for deduplication: the provider's event id
+        (scoped by event type, as some providers reuse ids across events),
+        or the payload hash when there is none.
+        """
+        if self.event_id:
+            return f"{self.event}:{self.event_id}"
+        return self.payload_hash
+
+    @property
+    def actionable(self) -> bool:
+        """Whether the event should go on to the ledger stage."""
+        return bool(self.reference) and self.status == "success"
+
+
+def _decimal(value) -> Decimal | None:
+    try:
+        return Decimal(str(value)) if value is not None else None
+    except InvalidOperation:
+        return None
+
+
+def _paystack_amount(data: dict):
+    # Paystack reports amounts in the currency's minor unit (kobo).
+    amount = _decimal(data.get("amount"))
+    return (amount / 100 if amount is not None else None), data.get("currency")
+
+
+def _flutterwave_amount(data: dict):
+    return _decimal(data.get("amount")), data.get("currency")
+
+
+# Provider status words mapped onto ours ("success" / "failed").
+STATUS_ALIASES = {
+    "successful": "success",
+    "completed": "success",
+    "failure": "failed",
+}
+
+AMOUNT_EXTRACTORS = {
+    "paystack": _paystack_amount,
+    "flutterwave": _flutterwave_amount,
+}
+
+
+def _paystack_bank(data: dict):
+    # Transfers name the recipient's bank code. Card and bank charges only
+    # carry the issuing bank's name, which would not match the codes the
+    # connectors record, so they have no bank.
+    details = (data.get("recipient") or {}).get("details") or {}
+    return details.get("bank_code")
+
+
+def _flutterwave_bank(data: dict):
+    return data.get("bank_code") or (data.get("account") or {}).get("bank_code")
+
+
+BANK_EXTRACTORS = {
+    "paystack": _paystack_bank,
+    "flutterwave": _flutterwave_bank,
+}
+
+
+def normalize(provider: str, handler, payload: dict, body: bytes) -> NormalizedEvent:
+    """
+    Build a ``NormalizedEvent`` from a webhook body (raw and parsed) using the
+    provider's ``BaseWebhookHandler``.
+    """
+    payment_data = handler.extract_payment_data(payload)
+    data = payload.get("data") or {}
+    extract_amount = AMOUNT_EXTRACTORS.get(provider)
+    amount, currency = extract_amount(data) if extract_amount else (None, None)
+    extract_bank = BANK_EXTRACTORS.get(provider)
+    bank = extract_bank(data) if extract_bank else None
+    status = (payment_data.get("status") or "").lower()
+    # Paystack and Flutterwave both put their id for the object in data.id.
+    event_id = data.get("id")
+
+    return NormalizedEvent(
+        provider=provider,
+        event=handler.get_event(payload) or "",
+        reference=payment_data.get("reference"),
+        status=STATUS_ALIASES.get(status, status),
+        payload_hash=hashlib.sha256(body).hexdigest(),
+        event_id=str(event_id) if event_id is not None else None,
+        amount=amount,
+        currency=currency,
+        bank=str(bank) if bank else None,
+        metadata=payment_data.get("metadata") or {},
+        body=body,
+    )
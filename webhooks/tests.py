@@ -0,0 +1,105 @@
+import hashlib
+from concurrent.futures import Future
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from transactions.models import WebhookLog, WebhookPayload, WebhookReceipt
+from webhooks.batcher import WebhookBatcher, get_webhook_ingress_config
+from webhooks.dedup import SeenEvents, claim_receipts
+from webhooks.handlers import accept_webhook
+from webhooks.normalizer import NormalizedEvent
+
+
+def event(event_id="1001", body=b'{"event": "charge.success"}', provider="paystack", name="charge.success"):
+    return NormalizedEvent(
+        provider=provider,
+        event=name,
+        reference="PAY-1",
+        status="failed",
+        payload_hash=hashlib.sha256(body).hexdigest(),
+        event_id=event_id,
+        body=body,
+    )
+
+
+class DedupKeyTests(SimpleTestCase):
+    def test_event_id_is_scoped_by_event_type(self):
+        self.assertEqual(event().dedup_key, "charge.success:1001")
+        self.assertNotEqual(event(name="refund.processed").dedup_key, event().dedup_key)
+
+    def test_payload_hash_without_an_event_id(self):
+        delivery = event(event_id=None)
+
+        self.assertEqual(delivery.dedup_key, delivery.payload_hash)
+
+
+class SeenEventsTests(SimpleTestCase):
+    def test_least_recently_seen_key_is_evicted(self):
+        seen = SeenEvents(max_keys=2)
+        seen.add_many(["a", "b"])
+        self.assertIn("a", seen)  # "b" is now the oldest
+
+        seen.add_many(["c"])
+
+        self.assertEqual(len(seen), 2)
+        self.assertNotIn("b", seen)
+        self.assertIn("a", seen)
+        self.assertIn("c", seen)
+
+
+class ClaimReceiptsTests(TestCase):
+    def test_only_new_deliveries_are_claimed(self):
+        first = claim_receipts([event("1"), event("2")])
+        again = claim_receipts([event("2"), event("3")])
+
+        self.assertEqual(first, {("paystack", "charge.success:1"), ("paystack", "charge.success:2")})
+        self.assertEqual(again, {("paystack", "charge.success:3")})
+        self.assertEqual(WebhookReceipt.objects.count(), 3)
+
+    def test_same_key_from_another_provider_is_new(self):
+        claim_receipts([event()])
+
+        self.assertEqual(claim_receipts([event(provider="flutterwave")]), {("flutterwave", "charge.success:1001")})
+
+
+class WebhookBatcherFlushTests(TestCase):
+    def setUp(self):
+        self.seen = SeenEvents(max_keys=100)
+        for target, value in (
+            ("webhooks.batcher.get_seen_events", self.seen),
+            ("webhooks.handlers.get_seen_events", self.seen),
+            ("webhooks.batcher.get_rollup_aggregator", mock.Mock()),
+            ("webhooks.batcher.get_bank_health_tracker", mock.Mock()),
+        ):
+            patcher = mock.patch(target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.batcher = WebhookBatcher(get_webhook_ingress_config())
+        self.addCleanup(self.batcher._dispatcher.shutdown)
+
+    def flush(self, *events):
+        batch = [(delivery, Future()) for delivery in events]
+        self.batcher.flush(batch)
+        return [future.result() for _, future in batch]
+
+    def test_redeliveries_are_logged_once(self):
+        first, together = self.flush(event(), event())
+        (later,) = self.flush(event())
+
+        self.assertEqual(WebhookLog.objects.count(), 1)
+        self.assertEqual(first, WebhookLog.objects.get().pk)
+        self.assertIsNone(together)
+        self.assertIsNone(later)
+        self.assertEqual(WebhookPayload.objects.count(), 1)
+
+    def test_seen_redelivery_is_acked_without_a_batch(self):
+        self.flush(event())
+        request = mock.Mock()
+
+        with mock.patch("webhooks.handlers.parse_webhook", return_value=event()), \
+                mock.patch("webhooks.handlers.get_webhook_batcher") as get_batcher:
+            future = accept_webhook("paystack", request)
+
+        self.assertIsNone(future.result())
+        get_batcher.assert_not_called()
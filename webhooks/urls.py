@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .views import webhook_ingress
+
+urlpatterns = [
+    path("<str:provider>/", webhook_ingress, name="webhook-ingress"),
+]
@@ -0,0 +1,49 @@
+import asyncio
+import logging
+
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from webhooks.batcher import get_webhook_ingress_config
+from webhooks.handlers import (
+    InvalidWebhookPayload,
+    UnknownWebhookProvider,
+    WebhookSignatureError,
+    accept_webhook,
+)
+
+log = logging.getLogger("my_logger")
+
+
+@csrf_exempt
+@require_POST
+async def webhook_ingress(request, provider):
+    """
+    Unified webhook endpoint: ``POST /v1/webhooks/<provider>/``.
+
+    Async so that a retry burst is a set of coroutines waiting on one group
+    commit rather than a thread per request. Answers 200 once the event is
+    stored; ledger posting and notifications happen on the Celery pipeline.
+    A 503 tells the provider to retry later.
+    """
+    provider = provider.lower()
+    try:
+        future = accept_webhook(provider, request)
+    except UnknownWebhookProvider as e:
+        return JsonResponse({"status": "failed", "message": str(e)}, status=404)
+    except WebhookSignatureError as e:
+        log.warning(str(e))
+        return JsonResponse({"status": "failed", "message": "Invalid signature"}, status=401)
+    except InvalidWebhookPayload as e:
+        return JsonResponse({"status": "failed", "message": str(e)}, status=400)
+
+    try:
+        # Shielded: giving up on the ack must not cancel the write itself.
+        webhook_log_id = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), get_webhook_ingress_config()["ACK_TIMEOUT"])
+    except Exception as e:
+        log.error(f"{provider} webhook could not be stored: {e!r}")
+        return JsonResponse({"status": "failed", "message": "Webhook could not be stored"}, status=503)
+
+    # Redeliveries are acked too, so the provider stops retrying them.
+    return JsonResponse({"status": "success", "duplicate": webhook_log_id is None})